@@ -0,0 +1,89 @@
+from discord.ext import commands
+import logging
+import json
+import time
+from datetime import datetime
+from utils.loop_watchdog import LoopWatchdog
+from utils.memory_report import format_memory_report, memory_report
+
+class AdminCog(commands.Cog):
+    """Comandos de diagnóstico para o dono do bot."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+        # Carrega as configurações do config.json
+        try:
+            with open('config.json', 'r') as config_file:
+                config = json.load(config_file)
+            watchdog_config = config.get('loop_watchdog', {})
+            self.watchdog_enabled = watchdog_config.get('enabled', True)
+            self.watchdog_threshold = watchdog_config.get('threshold_ms', 250) / 1000
+            self.watchdog_interval = watchdog_config.get('interval_ms', 100) / 1000
+        except Exception as e:
+            logging.error(f"Erro ao carregar config.json: {str(e)}")
+            raise
+
+        self.watchdog = LoopWatchdog(self.watchdog_threshold, self.watchdog_interval) if self.watchdog_enabled else None
+
+    async def cog_load(self):
+        if self.watchdog is not None:
+            self.watchdog.start()
+
+    async def cog_unload(self):
+        if self.watchdog is not None:
+            self.watchdog.stop()
+
+    async def cog_check(self, ctx):
+        # Apenas o dono da aplicação do bot pode usar estes comandos
+        return await self.bot.is_owner(ctx.author)
+
+    @commands.command(name="memoria")
+    async def memoria(self, ctx):
+        """Mostra a memória do processo e o tamanho dos caches."""
+        text = format_memory_report(memory_report(self.bot))
+        logging.info(f"Relatório de memória: {text}")
+        lines = text.replace(" | ", "\n")
+        await ctx.send(f"🧠 **Memória**\n{lines}")
+
+    @commands.command(name="latencia")
+    async def latencia(self, ctx):
+        """Mostra o histograma de atraso do event loop e os bloqueios mais recentes."""
+        if self.watchdog is None:
+            await ctx.send("O monitor do event loop está desativado no config.json.")
+            return
+        report = self.watchdog.report()
+        histogram = "\n".join(f"{label}: {count}" for label, count in report["histogram"] if count)
+        stalls = "\n".join(
+            f"{datetime.utcfromtimestamp(when).strftime('%Y-%m-%d %H:%M:%S UTC')} - {lag * 1000:.0f} ms em {where}"
+            for when, lag, where in report["stalls"][-5:]
+        )
+        await ctx.send(
+            f"⏱️ **Event Loop**\n"
+            f"Latência do gateway: {self.bot.latency * 1000:.0f} ms\n"
+            f"Maior atraso: {report['max_lag_ms']} ms\n"
+            f"**Histograma**\n{histogram or 'Sem medições ainda'}\n"
+            f"**Bloqueios recentes**\n{stalls or 'Nenhum'}"
+        )
+
+    @commands.command(name="recarregar")
+    async def recarregar(self, ctx, extensao: str):
+        """Recarrega um cog sem reiniciar o bot, mantendo o estado em memória (ex.: !recarregar economy_cog)."""
+        name = extensao if extensao.startswith("cogs.") else f"cogs.{extensao}"
+        started = time.perf_counter()
+        try:
+            # Em caso de erro, o discord.py volta para a versão anterior do cog
+            await self.bot.reload_extension(name)
+        except commands.ExtensionError as e:
+            await ctx.send(f"❌ Erro ao recarregar {name}: {str(e)}")
+            logging.error(f"Erro ao recarregar o cog {name}: {str(e)}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        await ctx.send(f"🔄 {name} recarregado em {elapsed:.0f} ms.")
+        logging.info(f"Cog {name} recarregado por {ctx.author} ({ctx.author.id}) em {elapsed:.0f} ms")
+
+# Função setup para registrar o cog
+async def setup(bot):
+    cog = AdminCog(bot)
+    bot.admin_cog = cog
+    await bot.add_cog(cog)
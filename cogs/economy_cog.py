@@ -4,24 +4,39 @@ import logging
 import json
 from datetime import datetime, timedelta
 import asyncio
-import os
+import io
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.economy_api import EconomyAPI, EconomySnapshot, freeze_users
+from utils.economy_stats import EconomyStats
+from utils.economy_store import EconomyStore
+from utils.expiry import ExpiryScheduler
+from utils.achievements import AchievementEngine, DEFAULT_ACHIEVEMENTS
+from utils.avatar_cache import acquire_avatar_cache, get_avatar_cache, release_avatar_cache
+from utils.image_assets import acquire_render_pool, get_render_pool, release_render_pool
+from utils.ledger import InsufficientFunds, Ledger
+from utils.members import all_members, get_or_fetch_member
+from utils.prompts import PromptRouter
+from utils.rank_card import RankCardCache, render_rank_card
+from utils.sheets_export import SheetsExporter
+from utils.spam_detector import SpamDetector
 
 class EconomyCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.cooldowns = {}  # Controle de cooldown para mensagens
         self.voice_cooldowns = {}  # Controle de cooldown para tempo em voz
-        self.message_history = {}  # Histórico de mensagens para detectar spam
-        self.economy_file = "economy.json"
-        self.users = self.load_economy()
+        self.economy_file = "economy.json"  # Arquivo antigo, compartilhado por todos os servidores
         self.daily_limits = {}  # Controle de limites diários
         self.message_cooldown = 60  # Cooldown de 60 segundos para mensagens
         self.voice_cooldown = 300  # 5 minutos para recompensa por voz
         self.daily_message_limit = 10  # Limite diário de Rupias por mensagens
         self.daily_voice_limit = 20  # Limite diário de Rupias por tempo em voz
-        self.voice_time_tracking = {}  # Rastreia o tempo total em voz por usuário (para conquistas)
         self.private_channels = {}  # Armazena canais de voz privados temporários
+        self.rank_cards = RankCardCache()  # Cartões de perfil já renderizados
+        self.rankings = {}  # guild_id -> EconomySnapshot usado só para a posição no ranking do !perfil
+        self.prompts = PromptRouter()  # Respostas pendentes dos prompts da loja
 
         # Carrega as configurações do config.json
         try:
@@ -29,48 +44,177 @@ class EconomyCog(commands.Cog):
                 config = json.load(config_file)
             self.log_channel_id = config['economy_log_channel_id']
             self.items = config['economy_items']
+            self.private_voice_category_id = int(config.get('private_voice_category_id', 627874145085947957))
+            self.economy_dir = config.get('economy_dir', 'economy')
+            self.shard_idle_timeout = config.get('economy_shard_idle_seconds', 900)
+            legacy_guild_id = config.get('economy_legacy_guild_id')
+            self.achievements = AchievementEngine(config.get('achievements', DEFAULT_ACHIEVEMENTS))
+            # API HTTP de consulta (somente leitura), desativada por padrão
+            self.api_enabled = config.get('economy_api_enabled', False)
+            self.api_host = config.get('economy_api_host', '127.0.0.1')
+            self.api_port = config.get('economy_api_port', 8082)
+            self.api_snapshot_interval = config.get('economy_api_snapshot_seconds', 5)
+            # Exportação periódica para o Google Sheets, desativada por padrão
+            self.sheets_config = config.get('sheets_export', {})
+            # Detecção de mensagens quase idênticas (de um usuário ou de vários)
+            spam_config = config.get('spam_detection', {})
+            self.spam_detector = SpamDetector(
+                window=spam_config.get('window_seconds', 600),
+                capacity=spam_config.get('max_messages', 20000),
+                threshold=spam_config.get('similarity', 0.6),
+                min_users=spam_config.get('min_users', 3),
+                min_repeats=spam_config.get('min_repeats', 3)
+            )
+            # Retenção das estatísticas da economia (baldes por hora e por dia)
+            self.stats_hourly_retention = config.get('economy_stats_hourly_retention', 48)
+            self.stats_daily_retention = config.get('economy_stats_daily_retention', 30)
+            # Intervalo mínimo entre recálculos do ranking usado no !perfil
+            self.ranking_refresh_seconds = config.get('economy_ranking_refresh_seconds', 60)
         except Exception as e:
             logging.error(f"Erro ao carregar config.json: {str(e)}")
-            print(f"[ERROR] Erro ao carregar config.json: {str(e)}")
             raise
 
+        # Sem servidor configurado, o economy.json antigo vai para o único servidor do bot
+        # (com vários shards, este processo não enxerga todos os servidores)
+        if legacy_guild_id is None and len(bot.guilds) == 1 and (bot.shard_count or 1) == 1:
+            legacy_guild_id = bot.guilds[0].id
+        self.store = EconomyStore(
+            self.economy_dir,
+            self.items,
+            idle_timeout=self.shard_idle_timeout,
+            legacy_file=self.economy_file,
+            legacy_guild_id=int(legacy_guild_id) if legacy_guild_id else None
+        )
+        self.stats = EconomyStats(self.economy_dir, self.stats_hourly_retention, self.stats_daily_retention)
+        self.ledger = Ledger(self.store, stats=self.stats)
+        # Fim dos itens temporários da loja, agendado sem prender o comando que fez a compra
+        self.expiries = ExpiryScheduler({
+            "cargo_vip": self.expire_vip_role,
+            "mute_voz": self.expire_voice_mute,
+            "mute_texto": self.expire_text_mute,
+            "cargo_personalizado": self.expire_custom_role,
+            "canal_voz_privado": self.expire_private_channel
+        })
+
+        # Estado em memória entregue pela instância anterior no !recarregar. São os mesmos objetos,
+        # não cópias, para que comandos ainda em andamento na instância antiga continuem consistentes
+        handoff = bot.state_handoff.get(self.qualified_name)
+        if handoff:
+            self.cooldowns = handoff["cooldowns"]
+            self.voice_cooldowns = handoff["voice_cooldowns"]
+            self.daily_limits = handoff["daily_limits"]
+            self.private_channels = handoff["private_channels"]
+            self.store = handoff["store"]
+            self.stats = handoff["stats"]
+            self.ledger = handoff["ledger"]
+
         # Inicia a tarefa de verificação de tempo em voz
         self.check_voice_time.start()
-
-    def load_economy(self):
-        """Carrega os dados da economia do arquivo JSON."""
-        try:
-            if not os.path.exists(self.economy_file) or os.path.getsize(self.economy_file) == 0:
-                logging.info("Arquivo economy.json não existe ou está vazio. Criando novo dicionário vazio.")
-                print("[INFO] Arquivo economy.json não existe ou está vazio. Criando novo dicionário vazio.")
-                return {}
-            with open(self.economy_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logging.info("Arquivo economy.json não encontrado. Criando novo dicionário vazio.")
-            print("[INFO] Arquivo economy.json não encontrado. Criando novo dicionário vazio.")
-            return {}
-        except json.JSONDecodeError as e:
-            logging.error(f"Erro ao decodificar economy.json (formato inválido): {str(e)}. Retornando dicionário vazio.")
-            print(f"[ERROR] Erro ao decodificar economy.json (formato inválido): {str(e)}. Retornando dicionário vazio.")
-            return {}
-        except Exception as e:
-            logging.error(f"Erro ao carregar economy.json: {str(e)}")
-            print(f"[ERROR] Erro ao carregar economy.json: {str(e)}")
-            return {}
-
-    def save_economy(self):
-        """Salva os dados da economia no arquivo JSON."""
-        try:
-            with open(self.economy_file, 'w') as f:
-                json.dump(self.users, f, indent=4)
-        except Exception as e:
-            logging.error(f"Erro ao salvar economy.json: {str(e)}")
-            print(f"[ERROR] Erro ao salvar economy.json: {str(e)}")
+        self.evict_idle_shards.start()
+        self.flush_achievements.start()
+
+        self.api = EconomyAPI(
+            self.achievements.definitions, self.api_host, self.api_port, stats=self.stats, loader=self.build_cold_snapshot
+        ) if self.api_enabled else None
+
+        self.sheets = None
+        if self.sheets_config.get('enabled'):
+            self.sheets = SheetsExporter(
+                self.sheets_config['spreadsheet_id'],
+                self.achievements.definitions,
+                credentials_file=self.sheets_config.get('credentials_file'),
+                api_base=self.sheets_config.get('api_base', 'https://sheets.googleapis.com/v4')
+            )
+            self.sheets_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets")
+            self.sheets_versions = {}  # guild_id -> versão da economia já exportada
+            self.export_sheets.change_interval(seconds=self.sheets_config.get('interval_seconds', 300))
+            self.export_sheets.start()
+
+    async def cog_load(self):
+        # Usados pelo !perfil; compartilhados com o WelcomeCog
+        acquire_avatar_cache()
+        acquire_render_pool()
+        # As expirações só são reagendadas aqui, quando o cog já vai ser registrado
+        handoff = self.bot.state_handoff.pop(self.qualified_name, None)
+        if handoff:
+            self.expiries.restore(handoff["expiries"])
+            logging.info(f"Estado da economia recebido da instância anterior ({len(handoff['expiries'])} expirações pendentes)")
+        if self.api is not None:
+            await self.api.start()
+            self.publish_snapshots.change_interval(seconds=self.api_snapshot_interval)
+            self.publish_snapshots.start()
+            logging.info(f"API da economia ouvindo em http://{self.api_host}:{self.api_port}")
+
+    async def cog_unload(self):
+        # Para as tarefas, avalia o progresso pendente e salva todas as economias carregadas
+        self.check_voice_time.cancel()
+        self.evict_idle_shards.cancel()
+        self.flush_achievements.cancel()
+        self.prompts.cancel_all()
+        # Entrega o estado em memória para a próxima instância (!recarregar)
+        self.bot.state_handoff[self.qualified_name] = {
+            "cooldowns": self.cooldowns,
+            "voice_cooldowns": self.voice_cooldowns,
+            "daily_limits": self.daily_limits,
+            "private_channels": self.private_channels,
+            "store": self.store,
+            "stats": self.stats,
+            "ledger": self.ledger,
+            "expiries": self.expiries.export()
+        }
+        await self.process_achievements()
+        self.store.save_all()
+        self.stats.save_all()
+        if self.api is not None:
+            self.publish_snapshots.cancel()
+            await self.api.stop()
+        if self.sheets is not None:
+            self.export_sheets.cancel()
+            self.sheets_executor.shutdown(wait=False)
+        await release_avatar_cache()
+        release_render_pool()
+
+    async def cog_check(self, ctx):
+        # A economia é separada por servidor, então os comandos não funcionam em DM
+        return ctx.guild is not None
+
+    def get_users(self, guild):
+        """Retorna o dicionário de usuários da economia do servidor."""
+        return self.store.get(guild.id).users
+
+    def get_items(self, guild):
+        """Retorna o catálogo de itens da loja do servidor."""
+        return self.store.get(guild.id).items
+
+    def save_economy(self, guild):
+        """Salva os dados da economia do servidor."""
+        self.store.save(guild.id)
+
+    @tasks.loop(minutes=5)
+    async def evict_idle_shards(self):
+        """Descarrega da memória as economias de servidores ociosos."""
+        evicted = set(self.store.evict_idle())
+        self.stats.retain(self.store.shards)  # Estatísticas de economias descarregadas saem junto
+        self.stats.save_all()
+        if self.api is not None:
+            self.api.retain(self.store.shards)  # Snapshots de economias descarregadas saem junto
+        for guild_id in evicted:
+            self.rankings.pop(guild_id, None)
+        if evicted:
+            # Cooldowns desses servidores já expiraram, pois ficaram ociosos por mais tempo que eles
+            for tracker in (self.cooldowns, self.voice_cooldowns):
+                for key in [key for key in tracker if key[0] in evicted]:
+                    del tracker[key]
+            logging.info(f"Economias descarregadas por inatividade: {len(evicted)} servidores")
+
+        # Remove limites diários de dias anteriores
+        today = datetime.utcnow().date()
+        for key in list(self.daily_limits):
+            if all(limit["date"] != today for limit in self.daily_limits[key].values()):
+                del self.daily_limits[key]
 
     def check_daily_limit(self, user_id, limit_type):
-        """Verifica e atualiza o limite diário do usuário."""
-        user_id = str(user_id)
+        """Verifica e atualiza o limite diário do usuário. `user_id` é a chave (guild_id, user_id)."""
         current_date = datetime.utcnow().date()
         
         if user_id not in self.daily_limits:
@@ -87,70 +231,143 @@ class EconomyCog(commands.Cog):
 
     def increment_daily_limit(self, user_id, limit_type, max_limit):
         """Incrementa o contador de limite diário."""
-        user_id = str(user_id)
         count = self.check_daily_limit(user_id, limit_type)
         if count >= max_limit:
             return False
         self.daily_limits[user_id][limit_type]["count"] += 1
         return True
 
-    def initialize_user_achievements(self, user_id):
-        """Inicializa as conquistas de um usuário, se não existirem."""
-        user_id = str(user_id)
-        if "achievements" not in self.users[user_id]:
-            self.users[user_id]["achievements"] = {
-                "mensageiro": {"completed": False, "progress": 0},  # 100 mensagens
-                "voz_ativa": {"completed": False, "progress": 0},  # 10 horas (36.000 segundos)
-                "comprador": {"completed": False, "progress": 0}  # 5 compras
-            }
-            self.save_economy()
-
-    async def check_achievement(self, user_id, achievement, progress_increment, target, reward, user, guild):
-        """Verifica e atualiza o progresso de uma conquista."""
-        user_id = str(user_id)
-        self.initialize_user_achievements(user_id)
-        
-        achievement_data = self.users[user_id]["achievements"][achievement]
-        if achievement_data["completed"]:
-            return
-
-        achievement_data["progress"] += progress_increment
-        self.save_economy()
+    @tasks.loop(seconds=5)
+    async def publish_snapshots(self):
+        """Publica para a API um snapshot imutável de cada economia salva desde o último snapshot."""
+        loop = asyncio.get_running_loop()
+        for guild_id, shard in list(self.store.shards.items()):
+            if self.api.published_version(guild_id) == shard.version:
+                continue
+            frozen = freeze_users(shard.users)
+            # Decodificar e ordenar o ranking é a parte cara; roda fora do event loop
+            snapshot = await loop.run_in_executor(None, EconomySnapshot, guild_id, shard.version, frozen)
+            self.api.publish(snapshot)
+
+    @publish_snapshots.before_loop
+    async def before_publish_snapshots(self):
+        await self.bot.wait_until_ready()
+        # Com um único servidor, a API responde sem ?guild= mesmo antes de a economia ser carregada
+        if len(self.bot.guilds) == 1 and (self.bot.shard_count or 1) == 1:
+            self.api.default_guild_id = self.bot.guilds[0].id
+
+    async def build_cold_snapshot(self, guild_id):
+        """Snapshot de um servidor ainda não publicado; se a economia não estiver carregada, lê o arquivo fora do event loop."""
+        loop = asyncio.get_running_loop()
+        shard = self.store.shards.get(guild_id)
+        if shard is not None:
+            frozen, version = freeze_users(shard.users), shard.version
+        else:
+            if self.bot.get_guild(guild_id) is None:
+                return None  # Servidor de outro processo de shards ou em que o bot não está
+            users = await loop.run_in_executor(None, self.store.peek, guild_id)
+            if users is None:
+                return None
+            frozen, version = freeze_users(users), next(self.store.versions)
+        return await loop.run_in_executor(None, EconomySnapshot, guild_id, version, frozen)
+
+    async def get_ranking(self, guild_id):
+        """Snapshot com o ranking do servidor, recalculado no máximo a cada `ranking_refresh_seconds`.
+
+        Usa o snapshot da API quando ela está ativa; senão monta um próprio fora do event loop.
+        """
+        if self.api is not None and guild_id in self.api.snapshots:
+            return self.api.snapshots[guild_id]
+        shard = self.store.get(guild_id)
+        ranking = self.rankings.get(guild_id)
+        if ranking is None or (ranking.version != shard.version and time.time() - ranking.created_at >= self.ranking_refresh_seconds):
+            frozen = freeze_users(shard.users)
+            ranking = await asyncio.get_running_loop().run_in_executor(None, EconomySnapshot, guild_id, shard.version, frozen)
+            self.rankings[guild_id] = ranking
+        return ranking
+
+    @tasks.loop(minutes=5)
+    async def export_sheets(self):
+        """Envia ao Google Sheets só as linhas das economias que mudaram desde a última exportação."""
+        loop = asyncio.get_running_loop()
+        for guild_id, shard in list(self.store.shards.items()):
+            version = shard.version
+            if self.sheets_versions.get(guild_id) == version:
+                continue
+            frozen = freeze_users(shard.users)
+            try:
+                # As chamadas à API (e as esperas por cota) ficam em uma thread própria
+                sent = await loop.run_in_executor(self.sheets_executor, self.sheets.export, guild_id, frozen)
+                self.sheets_versions[guild_id] = version
+                if sent:
+                    logging.info(f"Planilha do servidor {guild_id} atualizada ({sent} linhas)")
+            except Exception as e:
+                logging.error(f"Erro ao exportar a economia do servidor {guild_id} para o Google Sheets: {str(e)}")
 
-        if achievement_data["progress"] >= target and not achievement_data["completed"]:
-            achievement_data["completed"] = True
-            self.users[user_id]["coins"] += reward
-            self.save_economy()
+    @export_sheets.before_loop
+    async def before_export_sheets(self):
+        await self.bot.wait_until_ready()
 
+    @tasks.loop(seconds=30)
+    async def flush_achievements(self):
+        """Avalia em lote o progresso acumulado das conquistas."""
+        await self.process_achievements()
+
+    async def process_achievements(self):
+        unlocks, touched_guilds = self.achievements.apply_pending(lambda guild_id: self.store.get(guild_id).users)
+        for guild_id in touched_guilds:
+            self.store.save(guild_id)  # Um único salvamento por servidor em cada lote
+        for guild_id, user_id, achievement, reward in unlocks:
+            # A recompensa passa pelo Ledger para não intercalar com transferências e compras da mesma conta
+            new_balance = await self.ledger.credit(guild_id, user_id, reward, source="achievement")
+            await self.announce_achievement(guild_id, user_id, achievement, reward, new_balance)
+
+    async def announce_achievement(self, guild_id, user_id, achievement, reward, new_balance):
+        """Envia a DM e o log de uma conquista desbloqueada."""
+        guild = self.bot.get_guild(guild_id)
+        user = await get_or_fetch_member(guild, int(user_id)) if guild else None
+        if user is None:
+            return
+        try:
             await user.send(f"🎉 **Conquista Desbloqueada!** Você completou a conquista '{achievement}' e ganhou {reward} Rupias!")
-            await self.log_action(
-                guild,
-                f"🏆 **Conquista Desbloqueada**\n"
-                f"Usuário: {user} ({user.id})\n"
-                f"Conquista: {achievement}\n"
-                f"Recompensa: {reward} Rupias\n"
-                f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-                f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
-            )
+        except discord.Forbidden:
+            pass
+        await self.log_action(
+            guild,
+            f"🏆 **Conquista Desbloqueada**\n"
+            f"Usuário: {user} ({user.id})\n"
+            f"Conquista: {achievement}\n"
+            f"Recompensa: {reward} Rupias\n"
+            f"Novo Saldo: {new_balance} Rupias\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            user=user.id, action="achievement", amount=reward
+        )
 
     @commands.Cog.listener()
     async def on_message(self, message):
         """Dá Rupias aos usuários por mensagens enviadas, com cooldown e limite diário."""
-        if message.author.bot:
+        if message.author.bot or message.guild is None:
             return
 
+        # Respostas a prompts da loja (a mensagem continua contando para as Rupias)
+        self.prompts.dispatch(message)
+
         user_id = str(message.author.id)
+        user_key = (message.guild.id, user_id)  # Cooldowns e limites são separados por servidor
         current_time = datetime.utcnow().timestamp()
 
+        # Toda mensagem entra no detector de spam, mesmo em cooldown, para formar os grupos entre usuários
+        spam = self.spam_detector.check(message.guild.id, message.channel.id, user_id, message.content, current_time)
+
         # Verifica cooldown (60 segundos entre ganhos)
-        if user_id in self.cooldowns:
-            last_time = self.cooldowns[user_id]
+        if user_key in self.cooldowns:
+            last_time = self.cooldowns[user_key]
             if current_time - last_time < self.message_cooldown:
                 return
 
         # Verifica limite diário de Rupias por mensagens
-        if not self.increment_daily_limit(user_id, "message", self.daily_message_limit):
-            if self.check_daily_limit(user_id, "message") == self.daily_message_limit:
+        if not self.increment_daily_limit(user_key, "message", self.daily_message_limit):
+            if self.check_daily_limit(user_key, "message") == self.daily_message_limit:
                 await self.log_action(
                     message.guild,
                     f"⚠️ **Limite Diário Atingido (Mensagens)**\n"
@@ -160,37 +377,25 @@ class EconomyCog(commands.Cog):
                 )
             return
 
-        # Verifica mensagens repetidas (spam)
-        if user_id not in self.message_history:
-            self.message_history[user_id] = []
-        
-        recent_messages = self.message_history[user_id][-3:]  # Últimas 3 mensagens
-        if len(recent_messages) >= 3 and all(msg == message.content for msg in recent_messages):
+        # Mensagens repetidas pelo autor ou quase idênticas às de outros usuários não rendem Rupias
+        if spam is not None:
             await self.log_action(
                 message.guild,
                 f"🚨 **Possível Spam Detectado**\n"
                 f"Usuário: {message.author} ({message.author.id})\n"
                 f"Mensagem: {message.content}\n"
-                f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                f"Mensagens parecidas: {spam.repeats} do autor, {spam.users} usuários em {spam.channels} canais\n"
+                f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                user=message.author.id, action="spam"
             )
             return
 
-        self.message_history[user_id].append(message.content)
-        if len(self.message_history[user_id]) > 3:
-            self.message_history[user_id].pop(0)
-
-        # Inicializa o usuário no sistema, se não existir
-        if user_id not in self.users:
-            self.users[user_id] = {"coins": 0, "name": message.author.name}
+        # Dá 1 Rupia ao usuário (criando a conta, se não existir)
+        balance = await self.ledger.credit(message.guild.id, user_id, 1, name=message.author.name, source="message")
+        self.cooldowns[user_key] = current_time
 
-        # Dá 1 Rupia ao usuário
-        self.users[user_id]["coins"] += 1
-        self.users[user_id]["name"] = message.author.name  # Atualiza o nome
-        self.cooldowns[user_id] = current_time
-        self.save_economy()
-
-        # Verifica a conquista "Mensageiro"
-        await self.check_achievement(user_id, "mensageiro", 1, 100, 200, message.author, message.guild)
+        # Progresso das conquistas de mensagens (avaliado em lote)
+        self.achievements.record(message.guild.id, user_id, "messages")
 
         # Log da ação
         await self.log_action(
@@ -198,8 +403,9 @@ class EconomyCog(commands.Cog):
             f"💰 **Ganho de Rupias (Mensagem)**\n"
             f"Usuário: {message.author} ({message.author.id})\n"
             f"Quantidade: 1 Rupia\n"
-            f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            f"Novo Saldo: {balance} Rupias\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            user=message.author.id, action="message_reward", amount=1
         )
 
     @tasks.loop(seconds=60)  # Verifica a cada 60 segundos
@@ -212,22 +418,20 @@ class EconomyCog(commands.Cog):
                         continue
 
                     user_id = str(member.id)
+                    user_key = (guild.id, user_id)
                     current_time = datetime.utcnow().timestamp()
 
                     # Verifica cooldown para recompensa por voz (5 minutos)
-                    if user_id in self.voice_cooldowns:
-                        last_time = self.voice_cooldowns[user_id]
+                    if user_key in self.voice_cooldowns:
+                        last_time = self.voice_cooldowns[user_key]
                         if current_time - last_time < self.voice_cooldown:
-                            # Incrementa o tempo em voz para a conquista "Voz Ativa"
-                            if user_id not in self.voice_time_tracking:
-                                self.voice_time_tracking[user_id] = 0
-                            self.voice_time_tracking[user_id] += 60  # 60 segundos
-                            await self.check_achievement(user_id, "voz_ativa", 60, 36000, 300, member, guild)
+                            # Incrementa o tempo em voz para as conquistas
+                            self.achievements.record(guild.id, user_id, "voice_seconds", 60)
                             continue
 
                     # Verifica limite diário de Rupias por voz
-                    if not self.increment_daily_limit(user_id, "voice", self.daily_voice_limit):
-                        if self.check_daily_limit(user_id, "voice") == self.daily_voice_limit:
+                    if not self.increment_daily_limit(user_key, "voice", self.daily_voice_limit):
+                        if self.check_daily_limit(user_key, "voice") == self.daily_voice_limit:
                             await self.log_action(
                                 guild,
                                 f"⚠️ **Limite Diário Atingido (Voz)**\n"
@@ -237,21 +441,12 @@ class EconomyCog(commands.Cog):
                             )
                         continue
 
-                    # Inicializa o usuário no sistema, se não existir
-                    if user_id not in self.users:
-                        self.users[user_id] = {"coins": 0, "name": member.name}
+                    # Dá 1 Rupia ao usuário (criando a conta, se não existir)
+                    balance = await self.ledger.credit(guild.id, user_id, 1, name=member.name, source="voice")
+                    self.voice_cooldowns[user_key] = current_time
 
-                    # Dá 1 Rupia ao usuário
-                    self.users[user_id]["coins"] += 1
-                    self.users[user_id]["name"] = member.name
-                    self.voice_cooldowns[user_id] = current_time
-                    self.save_economy()
-
-                    # Incrementa o tempo em voz para a conquista "Voz Ativa"
-                    if user_id not in self.voice_time_tracking:
-                        self.voice_time_tracking[user_id] = 0
-                    self.voice_time_tracking[user_id] += 60  # 60 segundos
-                    await self.check_achievement(user_id, "voz_ativa", 60, 36000, 300, member, guild)
+                    # Incrementa o tempo em voz para as conquistas
+                    self.achievements.record(guild.id, user_id, "voice_seconds", 60)
 
                     # Log da ação
                     await self.log_action(
@@ -259,8 +454,9 @@ class EconomyCog(commands.Cog):
                         f"🎙️ **Ganho de Rupias (Voz)**\n"
                         f"Usuário: {member} ({member.id})\n"
                         f"Quantidade: 1 Rupia\n"
-                        f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                        f"Novo Saldo: {balance} Rupias\n"
+                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                        user=member.id, action="voice_reward", amount=1
                     )
 
     @check_voice_time.before_loop
@@ -275,7 +471,7 @@ class EconomyCog(commands.Cog):
             return True
         return commands.check(predicate)
 
-    @commands.command(name="dar_rupias")
+    @commands.hybrid_command(name="dar_rupias")
     @is_owner()
     async def dar_rupias(self, ctx, member: discord.Member, amount: int):
         """Dá Rupias a um usuário específico (apenas o dono do servidor)."""
@@ -283,28 +479,23 @@ class EconomyCog(commands.Cog):
             await ctx.send("A quantidade de Rupias deve ser maior que 0.")
             return
 
-        user_id = str(member.id)
-        if user_id not in self.users:
-            self.users[user_id] = {"coins": 0, "name": member.name}
-
-        self.users[user_id]["coins"] += amount
-        self.users[user_id]["name"] = member.name
-        self.save_economy()
+        balance = await self.ledger.credit(ctx.guild.id, str(member.id), amount, name=member.name, key=f"dar_rupias:{ctx.message.id}", source="manual")
 
-        await ctx.send(f"✅ **Rupias Adicionadas!** {amount} Rupias foram adicionadas ao saldo de {member.mention}. Novo saldo: {self.users[user_id]['coins']} Rupias.")
+        await ctx.send(f"✅ **Rupias Adicionadas!** {amount} Rupias foram adicionadas ao saldo de {member.mention}. Novo saldo: {balance} Rupias.")
         await self.log_action(
             ctx.guild,
             f"💸 **Rupias Adicionadas (Manual)**\n"
             f"Moderador: {ctx.author} ({ctx.author.id})\n"
             f"Usuário: {member} ({member.id})\n"
             f"Quantidade: {amount} Rupias\n"
-            f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            f"Novo Saldo: {balance} Rupias\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            user=member.id, action="manual_add", amount=amount
         )
 
         # Notifica o usuário por DM
         try:
-            await member.send(f"💸 Você recebeu {amount} Rupias do dono do servidor! Seu novo saldo é {self.users[user_id]['coins']} Rupias.")
+            await member.send(f"💸 Você recebeu {amount} Rupias do dono do servidor! Seu novo saldo é {balance} Rupias.")
         except discord.Forbidden:
             await self.log_action(
                 ctx.guild,
@@ -314,7 +505,7 @@ class EconomyCog(commands.Cog):
                 f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
             )
 
-    @commands.command(name="remover_rupias")
+    @commands.hybrid_command(name="remover_rupias")
     @is_owner()
     async def remover_rupias(self, ctx, member: discord.Member, amount: int):
         """Remove Rupias de um usuário específico (apenas o dono do servidor)."""
@@ -322,33 +513,28 @@ class EconomyCog(commands.Cog):
             await ctx.send("A quantidade de Rupias deve ser maior que 0.")
             return
 
-        user_id = str(member.id)
-        if user_id not in self.users:
-            self.users[user_id] = {"coins": 0, "name": member.name}
-
-        # Verifica se o usuário tem Rupias suficientes para remover
-        if self.users[user_id]["coins"] < amount:
-            await ctx.send(f"{member.mention} não tem Rupias suficientes para remover. Saldo atual: {self.users[user_id]['coins']} Rupias.")
+        # Só remove se o usuário tiver Rupias suficientes
+        try:
+            balance = await self.ledger.debit(ctx.guild.id, str(member.id), amount, name=member.name, key=f"remover_rupias:{ctx.message.id}", source="manual")
+        except InsufficientFunds as e:
+            await ctx.send(f"{member.mention} não tem Rupias suficientes para remover. Saldo atual: {e.balance} Rupias.")
             return
 
-        self.users[user_id]["coins"] -= amount
-        self.users[user_id]["name"] = member.name
-        self.save_economy()
-
-        await ctx.send(f"✅ **Rupias Removidas!** {amount} Rupias foram removidas do saldo de {member.mention}. Novo saldo: {self.users[user_id]['coins']} Rupias.")
+        await ctx.send(f"✅ **Rupias Removidas!** {amount} Rupias foram removidas do saldo de {member.mention}. Novo saldo: {balance} Rupias.")
         await self.log_action(
             ctx.guild,
             f"💸 **Rupias Removidas (Manual)**\n"
             f"Moderador: {ctx.author} ({ctx.author.id})\n"
             f"Usuário: {member} ({member.id})\n"
             f"Quantidade: {amount} Rupias\n"
-            f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            f"Novo Saldo: {balance} Rupias\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            user=member.id, action="manual_remove", amount=-amount
         )
 
         # Notifica o usuário por DM
         try:
-            await member.send(f"💸 Foram removidas {amount} Rupias do seu saldo pelo dono do servidor. Seu novo saldo é {self.users[user_id]['coins']} Rupias.")
+            await member.send(f"💸 Foram removidas {amount} Rupias do seu saldo pelo dono do servidor. Seu novo saldo é {balance} Rupias.")
         except discord.Forbidden:
             await self.log_action(
                 ctx.guild,
@@ -358,7 +544,7 @@ class EconomyCog(commands.Cog):
                 f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
             )
 
-    @commands.command(name="bonus")
+    @commands.hybrid_command(name="bonus")
     @is_owner()
     async def bonus(self, ctx, amount: int):
         """Dá Rupias a todos os usuários em canais de voz (apenas o dono do servidor)."""
@@ -377,14 +563,12 @@ class EconomyCog(commands.Cog):
             await ctx.send("Nenhum usuário em canais de voz no momento.")
             return
 
-        # Distribui as Rupias e notifica os usuários
+        # Distribui as Rupias de uma vez e depois notifica os usuários
+        await self.ledger.credit_many(
+            ctx.guild.id, {str(member.id): member.name for member in voice_members}, amount,
+            key=f"bonus:{ctx.message.id}", source="bonus"
+        )
         for member in voice_members:
-            user_id = str(member.id)
-            if user_id not in self.users:
-                self.users[user_id] = {"coins": 0, "name": member.name}
-            self.users[user_id]["coins"] += amount
-            self.users[user_id]["name"] = member.name
-
             # Envia uma DM para o usuário
             try:
                 await member.send(f"🎉 Você recebeu {amount} Rupias de bônus por participar de um evento no servidor!")
@@ -397,7 +581,6 @@ class EconomyCog(commands.Cog):
                     f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
                 )
 
-        self.save_economy()
         await ctx.send(f"🎉 **Bônus Distribuído!** {amount} Rupias foram dadas a {len(voice_members)} usuários em canais de voz.")
         await self.log_action(
             ctx.guild,
@@ -408,26 +591,89 @@ class EconomyCog(commands.Cog):
             f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
         )
 
-    @commands.command(name="saldo")
+    @commands.hybrid_command(name="economia")
+    @is_owner()
+    async def economia(self, ctx):
+        """Mostra as estatísticas da economia do servidor (apenas o dono do servidor)."""
+        self.stats.ensure_supply(ctx.guild.id, self.get_users(ctx.guild))
+        summary = self.stats.summary(ctx.guild.id)
+        embed = discord.Embed(title="📊 Economia do Servidor", color=discord.Color.gold())
+        embed.add_field(name="Rupias em circulação", value=str(summary["supply"]), inline=False)
+        for label, period in (("Última hora", "last_hour"), ("Últimas 24 horas", "last_24h"), ("Últimos 7 dias", "last_7d")):
+            totals = summary[period]
+            sources = sorted(
+                ((name.split(":", 1)[1], amount) for name, amount in totals.items() if name.startswith("earned:") and amount),
+                key=lambda x: x[1], reverse=True
+            )
+            spending = sorted(
+                ((name.split(":", 1)[1], amount) for name, amount in totals.items() if name.startswith("spent:") and amount),
+                key=lambda x: x[1], reverse=True
+            )
+            value = (
+                f"Ganhas: {totals.get('earned', 0)} | Gastas: {totals.get('spent', 0)} | Doadas: {totals.get('transferred', 0)}\n"
+                f"Fontes: {', '.join(f'{name} {amount}' for name, amount in sources) or '-'}\n"
+                f"Gastos: {', '.join(f'{name} {amount}' for name, amount in spending) or '-'}"
+            )
+            embed.add_field(name=label, value=value, inline=False)
+        embed.add_field(
+            name="Usuários que ganharam Rupias",
+            value=f"Hoje: {summary['today'].get('active_earners', 0)}",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name="saldo")
     async def saldo(self, ctx):
         """Mostra o saldo de Rupias do usuário."""
-        user_id = str(ctx.author.id)
-        if user_id not in self.users:
-            self.users[user_id] = {"coins": 0, "name": ctx.author.name}
-            self.save_economy()
+        account = await self.ledger.open_account(ctx.guild.id, str(ctx.author.id), ctx.author.name)
 
-        rupias = self.users[user_id]["coins"]
+        rupias = account["coins"]
         await ctx.send(f"{ctx.author.mention}, você tem **{rupias} Rupias**! 💰")
 
-    @commands.command(name="top_rupias")
+    @commands.hybrid_command(name="perfil")
+    async def perfil(self, ctx, member: discord.Member = None):
+        """Mostra o cartão de perfil com saldo, posição no ranking e conquistas."""
+        await ctx.defer()  # A renderização pode passar do prazo de resposta de um comando de barra
+        member = member or ctx.author
+        user_id = str(member.id)
+        await self.ledger.open_account(ctx.guild.id, user_id, member.name)
+        users = self.get_users(ctx.guild)
+
+        coins = users[user_id]["coins"]
+        # A posição vem do ranking recalculado periodicamente, sem percorrer todos os usuários a cada comando
+        ranking = await self.get_ranking(ctx.guild.id)
+        entry = ranking.balances.get(user_id)
+        total_users = len(ranking.ranking) if entry else len(ranking.ranking) + 1
+        rank = entry[2] if entry else total_users
+        achievements = tuple(
+            (definition["name"], progress, definition["target"], completed)
+            for definition, progress, completed in self.achievements.progress(ctx.guild.id, user_id, users[user_id])
+        )
+
+        # A versão reúne tudo o que aparece no cartão; se nada mudou, o PNG em cache é reutilizado.
+        # Ganhos de outros usuários só mudam a posição quando o ranking é recalculado
+        version = (member.display_name, member.display_avatar.key, coins, achievements, rank, total_users)
+        cache_key = (ctx.guild.id, member.id)
+        image = self.rank_cards.get(cache_key, version)
+        if image is None:
+            avatar = await get_avatar_cache().get_for(member)
+            image = await get_render_pool().run(
+                render_rank_card, member.display_name, avatar, coins, rank, total_users, list(achievements)
+            )
+            self.rank_cards.put(cache_key, version, image)
+
+        await ctx.send(file=discord.File(io.BytesIO(image), filename="perfil.png"))
+
+    @commands.hybrid_command(name="top_rupias")
     async def top_rupias(self, ctx):
         """Mostra os 10 usuários com mais Rupias."""
-        if not self.users:
+        users = self.get_users(ctx.guild)
+        if not users:
             await ctx.send("Nenhum usuário tem Rupias ainda. Comece a interagir no servidor! 💬")
             return
 
         sorted_users = sorted(
-            self.users.items(),
+            users.items(),
             key=lambda x: x[1]["coins"],
             reverse=True
         )[:10]
@@ -441,64 +687,44 @@ class EconomyCog(commands.Cog):
 
         await ctx.send(ranking)
 
-    @commands.command(name="loja")
+    @commands.hybrid_command(name="loja")
     async def loja(self, ctx):
         """Mostra os itens disponíveis na loja."""
-        if not self.items:
+        items = self.get_items(ctx.guild)
+        if not items:
             await ctx.send("A loja está vazia no momento. Volte mais tarde! 🏪")
             return
 
         loja = "🏪 **Loja de Rupias** 🏪\n\n"
-        for item_id, item_data in self.items.items():
+        for item_id, item_data in items.items():
             loja += f"**{item_id}**\n"
             loja += f"Descrição: {item_data['description']}\n"
             loja += f"Preço: {item_data['price']} Rupias\n\n"
 
         await ctx.send(loja)
 
-    @commands.command(name="conquistas")
+    @commands.hybrid_command(name="conquistas")
     async def conquistas(self, ctx):
         """Mostra as conquistas do usuário e seu progresso."""
         user_id = str(ctx.author.id)
-        if user_id not in self.users:
-            self.users[user_id] = {"coins": 0, "name": ctx.author.name}
-            self.save_economy()
-
-        self.initialize_user_achievements(user_id)
-        achievements = self.users[user_id]["achievements"]
+        await self.ledger.open_account(ctx.guild.id, user_id, ctx.author.name)
+        users = self.get_users(ctx.guild)
 
         embed = discord.Embed(title=f"🏆 Conquistas de {ctx.author.name}", color=discord.Color.gold())
         embed.set_thumbnail(url=ctx.author.avatar.url if ctx.author.avatar else ctx.author.default_avatar.url)
 
-        # Mensageiro: Envie 100 mensagens
-        mensageiro = achievements["mensageiro"]
-        embed.add_field(
-            name="📩 Mensageiro",
-            value=f"Envie 100 mensagens\n**Progresso**: {mensageiro['progress']}/100\n**Status**: {'✅ Concluído' if mensageiro['completed'] else '⏳ Em andamento'}\n**Recompensa**: 200 Rupias",
-            inline=False
-        )
-
-        # Voz Ativa: Passe 10 horas em voz
-        voz_ativa = achievements["voz_ativa"]
-        hours_progress = voz_ativa['progress'] // 3600
-        hours_target = 36000 // 3600  # 10 horas
-        embed.add_field(
-            name="🎙️ Voz Ativa",
-            value=f"Passe 10 horas em canais de voz\n**Progresso**: {hours_progress}/{hours_target} horas\n**Status**: {'✅ Concluído' if voz_ativa['completed'] else '⏳ Em andamento'}\n**Recompensa**: 300 Rupias",
-            inline=False
-        )
-
-        # Comprador: Compre 5 itens
-        comprador = achievements["comprador"]
-        embed.add_field(
-            name="🛒 Comprador",
-            value=f"Compre 5 itens na loja\n**Progresso**: {comprador['progress']}/5\n**Status**: {'✅ Concluído' if comprador['completed'] else '⏳ Em andamento'}\n**Recompensa**: 500 Rupias",
-            inline=False
-        )
+        for definition, progress, completed in self.achievements.progress(ctx.guild.id, user_id, users[user_id]):
+            unit = definition.get("unit", 1)
+            unit_label = f" {definition['unit_label']}" if "unit_label" in definition else ""
+            embed.add_field(
+                name=definition["name"],
+                value=f"{definition['description']}\n**Progresso**: {progress // unit}/{definition['target'] // unit}{unit_label}\n**Status**: {'✅ Concluído' if completed else '⏳ Em andamento'}\n**Recompensa**: {definition['reward']} Rupias",
+                inline=False
+            )
 
         await ctx.send(embed=embed)
 
-    @commands.command(name="doar")
+    @commands.hybrid_command(name="doar")
     async def doar(self, ctx, member: discord.Member, amount: int):
         """Permite ao usuário doar Rupias para outro usuário."""
         if member == ctx.author:
@@ -509,30 +735,19 @@ class EconomyCog(commands.Cog):
             await ctx.send("A quantidade de Rupias deve ser maior que 0.")
             return
 
-        donor_id = str(ctx.author.id)
-        receiver_id = str(member.id)
-
-        # Inicializa os usuários, se necessário
-        if donor_id not in self.users:
-            self.users[donor_id] = {"coins": 0, "name": ctx.author.name}
-        if receiver_id not in self.users:
-            self.users[receiver_id] = {"coins": 0, "name": member.name}
-
-        # Verifica se o doador tem Rupias suficientes
-        if self.users[donor_id]["coins"] < amount:
-            await ctx.send(f"{ctx.author.mention}, você não tem Rupias suficientes! Você precisa de {amount} Rupias, mas tem apenas {self.users[donor_id]['coins']} Rupias.")
+        # Transfere as Rupias, se o doador tiver o suficiente
+        try:
+            donor_balance, receiver_balance = await self.ledger.transfer(
+                ctx.guild.id, str(ctx.author.id), str(member.id), amount,
+                from_name=ctx.author.name, to_name=member.name, key=f"doar:{ctx.message.id}"
+            )
+        except InsufficientFunds as e:
+            await ctx.send(f"{ctx.author.mention}, você não tem Rupias suficientes! Você precisa de {amount} Rupias, mas tem apenas {e.balance} Rupias.")
             return
 
-        # Transfere as Rupias
-        self.users[donor_id]["coins"] -= amount
-        self.users[receiver_id]["coins"] += amount
-        self.users[donor_id]["name"] = ctx.author.name
-        self.users[receiver_id]["name"] = member.name
-        self.save_economy()
-
         await ctx.send(f"{ctx.author.mention}, você doou {amount} Rupias para {member.mention}!")
         try:
-            await member.send(f"💸 Você recebeu {amount} Rupias de {ctx.author.mention}! Seu novo saldo é {self.users[receiver_id]['coins']} Rupias.")
+            await member.send(f"💸 Você recebeu {amount} Rupias de {ctx.author.mention}! Seu novo saldo é {receiver_balance} Rupias.")
         except discord.Forbidden:
             await self.log_action(
                 ctx.guild,
@@ -548,26 +763,24 @@ class EconomyCog(commands.Cog):
             f"Doador: {ctx.author} ({ctx.author.id})\n"
             f"Recebedor: {member} ({member.id})\n"
             f"Quantidade: {amount} Rupias\n"
-            f"Novo Saldo do Doador: {self.users[donor_id]['coins']} Rupias\n"
-            f"Novo Saldo do Recebedor: {self.users[receiver_id]['coins']} Rupias\n"
-            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            f"Novo Saldo do Doador: {donor_balance} Rupias\n"
+            f"Novo Saldo do Recebedor: {receiver_balance} Rupias\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            user=ctx.author.id, action="donation", amount=amount
         )
 
-    @commands.command(name="comprar")
+    @commands.hybrid_command(name="comprar")
     async def comprar(self, ctx, item_id: str):
         """Permite ao usuário comprar um item da loja."""
-        if item_id not in self.items:
+        items = self.get_items(ctx.guild)
+        if item_id not in items:
             await ctx.send(f"O item '{item_id}' não existe na loja. Use `!loja` para ver os itens disponíveis.")
             return
 
         user_id = str(ctx.author.id)
-        if user_id not in self.users:
-            self.users[user_id] = {"coins": 0, "name": ctx.author.name}
-            self.save_economy()
-
-        item = self.items[item_id]
+        item = items[item_id]
         price = item["price"]
-        rupias = self.users[user_id]["coins"]
+        rupias = self.ledger.balance(ctx.guild.id, user_id)
 
         if rupias < price:
             await ctx.send(f"{ctx.author.mention}, você não tem Rupias suficientes! Você precisa de {price} Rupias, mas tem apenas {rupias} Rupias.")
@@ -600,20 +813,39 @@ class EconomyCog(commands.Cog):
             await ctx.send(f"O bot não tem as permissões necessárias para executar esta ação. Permissões faltando: {', '.join(missing_perms)}. Por favor, peça a um administrador para conceder essas permissões.")
             return
 
-        self.users[user_id]["coins"] -= price
-        self.save_economy()
+        # Debita o preço; as falhas na entrega reembolsam a reserva
+        try:
+            purchase = await self.ledger.reserve(ctx.guild.id, user_id, price, name=ctx.author.name, key=f"comprar:{ctx.message.id}", source=f"shop:{item_id}")
+        except InsufficientFunds as e:
+            await ctx.send(f"{ctx.author.mention}, você não tem Rupias suficientes! Você precisa de {price} Rupias, mas tem apenas {e.balance} Rupias.")
+            return
 
-        # Incrementa a conquista "Comprador"
-        await self.check_achievement(user_id, "comprador", 1, 5, 500, ctx.author, ctx.guild)
+        reservations = [purchase]  # A taxa de anonimato, se paga, entra aqui
+        try:
+            await self.deliver_item(ctx, item_id, price, reservations)
+        except BaseException:
+            # Erro inesperado ou comando cancelado no meio da entrega: o item não foi entregue
+            await self.ledger.refund(*reservations)
+            raise
+        # O que não foi reembolsado está pago
+        await self.ledger.commit(*reservations)
+
+    async def deliver_item(self, ctx, item_id, price, reservations):
+        """Entrega um item já pago; em caso de falha, reembolsa as `reservations` da compra."""
+        users = self.get_users(ctx.guild)
+        user_id = str(ctx.author.id)
+
+        # Progresso das conquistas de compras (avaliado em lote)
+        self.achievements.record(ctx.guild.id, user_id, "purchases")
 
         # Encontra o canal #geral para anúncios públicos
-        geral_channel = discord.utils.get(ctx.guild.channels, name="geral")
+        geral_channel = self.bot.resource_index.get_channel(ctx.guild, "geral")
         if not geral_channel:
             await ctx.send("Canal #geral não encontrado. As ações serão realizadas, mas o anúncio público não será enviado.")
             # Prossegue com a ação mesmo que o canal #geral não exista
 
         if item_id == "cargo_vip":
-            role = discord.utils.get(ctx.guild.roles, name="VIP")
+            role = self.bot.resource_index.get_role(ctx.guild, "VIP")
             if not role:
                 role = await ctx.guild.create_role(name="VIP", reason="Cargo para compradores da loja")
             try:
@@ -625,35 +857,27 @@ class EconomyCog(commands.Cog):
                     f"Usuário: {ctx.author} ({ctx.author.id})\n"
                     f"Item: {item_id}\n"
                     f"Preço: {price} Rupias\n"
-                    f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    f"Novo Saldo: {users[user_id]['coins']} Rupias\n"
+                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                    user=ctx.author.id, action=f"purchase:{item_id}", amount=price
                 )
-                await asyncio.sleep(30 * 24 * 60 * 60)  # 30 dias em segundos
-                await ctx.author.remove_roles(role)
-                await self.log_action(
-                    ctx.guild,
-                    f"⏰ **Fim do Cargo VIP**\n"
-                    f"Usuário: {ctx.author} ({ctx.author.id})\n"
-                    f"Item: {item_id}\n"
-                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                self.expiries.schedule(
+                    "cargo_vip", 30 * 24 * 60 * 60,  # 30 dias em segundos
+                    guild_id=ctx.guild.id, user_id=ctx.author.id, user_name=str(ctx.author), role_id=role.id
                 )
             except Exception as e:
                 await ctx.send(f"Erro ao adicionar o cargo VIP: {str(e)}")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
         elif item_id == "mensagem_personalizada":
             if not geral_channel:
                 await ctx.send("Canal #geral não encontrado. Peça a um administrador para criá-lo.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
             try:
                 await ctx.send(f"{ctx.author.mention}, você comprou uma **mensagem personalizada**! Envie a mensagem que deseja no canal #geral (você tem 60 segundos).")
-                def check(m):
-                    return m.author == ctx.author and m.channel == ctx.channel
-                message = await self.bot.wait_for("message", check=check, timeout=60)
+                message = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=60)
                 await geral_channel.send(f"📢 Mensagem personalizada de {ctx.author.mention}: {message.content}")
                 await self.log_action(
                     ctx.guild,
@@ -661,13 +885,13 @@ class EconomyCog(commands.Cog):
                     f"Usuário: {ctx.author} ({ctx.author.id})\n"
                     f"Item: {item_id}\n"
                     f"Preço: {price} Rupias\n"
-                    f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    f"Novo Saldo: {users[user_id]['coins']} Rupias\n"
+                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                    user=ctx.author.id, action=f"purchase:{item_id}", amount=price
                 )
             except asyncio.TimeoutError:
                 await ctx.send(f"{ctx.author.mention}, o tempo para enviar a mensagem expirou. Suas Rupias foram reembolsadas.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
         elif item_id == "kick_voz":
@@ -680,8 +904,7 @@ class EconomyCog(commands.Cog):
 
             if not voice_members:
                 await ctx.send("Nenhum outro usuário em canais de voz no momento.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
             # Mostra a lista de usuários disponíveis para kick
@@ -689,15 +912,14 @@ class EconomyCog(commands.Cog):
             await ctx.send(f"Escolha um usuário para expulsar do canal de voz (digite o número correspondente, você tem 30 segundos):\n{member_list}")
 
             def check(m):
-                return m.author == ctx.author and m.channel == ctx.channel and m.content.isdigit()
+                return m.content.isdigit()
 
             try:
-                response = await self.bot.wait_for("message", check=check, timeout=30)
+                response = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=30, check=check)
                 choice = int(response.content) - 1
                 if choice < 0 or choice >= len(voice_members):
                     await ctx.send("Número inválido. A compra foi cancelada.")
-                    self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                    self.save_economy()
+                    await self.ledger.refund(*reservations)  # Reembolsa o usuário
                     return
 
                 target = voice_members[choice]
@@ -706,17 +928,16 @@ class EconomyCog(commands.Cog):
                 anonymous = False
                 await ctx.send("Deseja pagar 50 Rupias extras para que esta ação seja anônima? (Responda 'sim' ou 'não' em 15 segundos)")
                 def check_anonymous(m):
-                    return m.author == ctx.author and m.channel == ctx.channel and m.content.lower() in ["sim", "não"]
+                    return m.content.lower() in ["sim", "não"]
 
                 try:
-                    anon_response = await self.bot.wait_for("message", check=check_anonymous, timeout=15)
+                    anon_response = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=15, check=check_anonymous)
                     if anon_response.content.lower() == "sim":
-                        if self.users[user_id]["coins"] >= 50:
-                            self.users[user_id]["coins"] -= 50
-                            self.save_economy()
+                        try:
+                            reservations.append(await self.ledger.reserve(ctx.guild.id, user_id, 50, key=f"anonimo:{ctx.message.id}", source="shop:anonimato"))
                             anonymous = True
                             await ctx.send("Ação será realizada anonimamente.")
-                        else:
+                        except InsufficientFunds:
                             await ctx.send("Você não tem Rupias suficientes para ser anônimo (50 Rupias necessárias). A ação será realizada normalmente.")
                 except asyncio.TimeoutError:
                     await ctx.send("Tempo esgotado. A ação será realizada normalmente.")
@@ -743,19 +964,18 @@ class EconomyCog(commands.Cog):
                         f"Autor: {'Anônimo' if anonymous else f'{ctx.author} ({ctx.author.id})'}\n"
                         f"Alvo: {target} ({target.id})\n"
                         f"Preço: {price + (50 if anonymous else 0)} Rupias\n"
-                        f"Novo Saldo do Autor: {self.users[user_id]['coins']} Rupias\n"
-                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                        f"Novo Saldo do Autor: {users[user_id]['coins']} Rupias\n"
+                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                        user=None if anonymous else ctx.author.id, action=f"purchase:{item_id}", amount=price + (50 if anonymous else 0)
                     )
                 except Exception as e:
                     await ctx.send(f"Erro ao expulsar o usuário do canal de voz: {str(e)}")
-                    self.users[user_id]["coins"] += price + (50 if anonymous else 0)  # Reembolsa o usuário
-                    self.save_economy()
+                    await self.ledger.refund(*reservations)  # Reembolsa o usuário
                     return
 
             except asyncio.TimeoutError:
                 await ctx.send(f"{ctx.author.mention}, o tempo para escolher um usuário expirou. Suas Rupias foram reembolsadas.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
         elif item_id == "mute_voz":
@@ -768,8 +988,7 @@ class EconomyCog(commands.Cog):
 
             if not voice_members:
                 await ctx.send("Nenhum outro usuário em canais de voz no momento.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
             # Mostra a lista de usuários disponíveis para mute
@@ -777,15 +996,14 @@ class EconomyCog(commands.Cog):
             await ctx.send(f"Escolha um usuário para mutar no canal de voz por 5 minutos (digite o número correspondente, você tem 30 segundos):\n{member_list}")
 
             def check(m):
-                return m.author == ctx.author and m.channel == ctx.channel and m.content.isdigit()
+                return m.content.isdigit()
 
             try:
-                response = await self.bot.wait_for("message", check=check, timeout=30)
+                response = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=30, check=check)
                 choice = int(response.content) - 1
                 if choice < 0 or choice >= len(voice_members):
                     await ctx.send("Número inválido. A compra foi cancelada.")
-                    self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                    self.save_economy()
+                    await self.ledger.refund(*reservations)  # Reembolsa o usuário
                     return
 
                 target = voice_members[choice]
@@ -794,17 +1012,16 @@ class EconomyCog(commands.Cog):
                 anonymous = False
                 await ctx.send("Deseja pagar 50 Rupias extras para que esta ação seja anônima? (Responda 'sim' ou 'não' em 15 segundos)")
                 def check_anonymous(m):
-                    return m.author == ctx.author and m.channel == ctx.channel and m.content.lower() in ["sim", "não"]
+                    return m.content.lower() in ["sim", "não"]
 
                 try:
-                    anon_response = await self.bot.wait_for("message", check=check_anonymous, timeout=15)
+                    anon_response = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=15, check=check_anonymous)
                     if anon_response.content.lower() == "sim":
-                        if self.users[user_id]["coins"] >= 50:
-                            self.users[user_id]["coins"] -= 50
-                            self.save_economy()
+                        try:
+                            reservations.append(await self.ledger.reserve(ctx.guild.id, user_id, 50, key=f"anonimo:{ctx.message.id}", source="shop:anonimato"))
                             anonymous = True
                             await ctx.send("Ação será realizada anonimamente.")
-                        else:
+                        except InsufficientFunds:
                             await ctx.send("Você não tem Rupias suficientes para ser anônimo (50 Rupias necessárias). A ação será realizada normalmente.")
                 except asyncio.TimeoutError:
                     await ctx.send("Tempo esgotado. A ação será realizada normalmente.")
@@ -831,36 +1048,30 @@ class EconomyCog(commands.Cog):
                         f"Autor: {'Anônimo' if anonymous else f'{ctx.author} ({ctx.author.id})'}\n"
                         f"Alvo: {target} ({target.id})\n"
                         f"Preço: {price + (50 if anonymous else 0)} Rupias\n"
-                        f"Novo Saldo do Autor: {self.users[user_id]['coins']} Rupias\n"
-                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                        f"Novo Saldo do Autor: {users[user_id]['coins']} Rupias\n"
+                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                        user=None if anonymous else ctx.author.id, action=f"purchase:{item_id}", amount=price + (50 if anonymous else 0)
                     )
-                    await asyncio.sleep(5 * 60)  # 5 minutos
-                    await target.edit(mute=False)
-                    await self.log_action(
-                        ctx.guild,
-                        f"🔊 **Fim do Mute em Canal de Voz**\n"
-                        f"Usuário: {target} ({target.id})\n"
-                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    self.expiries.schedule(
+                        "mute_voz", 5 * 60,  # 5 minutos
+                        guild_id=ctx.guild.id, user_id=target.id, user_name=str(target)
                     )
                 except Exception as e:
                     await ctx.send(f"Erro ao mutar o usuário no canal de voz: {str(e)}")
-                    self.users[user_id]["coins"] += price + (50 if anonymous else 0)  # Reembolsa o usuário
-                    self.save_economy()
+                    await self.ledger.refund(*reservations)  # Reembolsa o usuário
                     return
 
             except asyncio.TimeoutError:
                 await ctx.send(f"{ctx.author.mention}, o tempo para escolher um usuário expirou. Suas Rupias foram reembolsadas.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
         elif item_id == "mute_texto":
             # Coleta usuários no servidor (excluindo o comprador)
-            members = [member for member in ctx.guild.members if member != ctx.author and not member.bot]
+            members = [member for member in await all_members(ctx.guild) if member != ctx.author and not member.bot]
             if not members:
                 await ctx.send("Nenhum outro usuário disponível no servidor.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
             # Mostra a lista de usuários disponíveis para mute
@@ -868,15 +1079,14 @@ class EconomyCog(commands.Cog):
             await ctx.send(f"Escolha um usuário para mutar nos canais de texto por 5 minutos (digite o número correspondente, você tem 30 segundos):\n{member_list}")
 
             def check(m):
-                return m.author == ctx.author and m.channel == ctx.channel and m.content.isdigit()
+                return m.content.isdigit()
 
             try:
-                response = await self.bot.wait_for("message", check=check, timeout=30)
+                response = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=30, check=check)
                 choice = int(response.content) - 1
                 if choice < 0 or choice >= len(members):
                     await ctx.send("Número inválido. A compra foi cancelada.")
-                    self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                    self.save_economy()
+                    await self.ledger.refund(*reservations)  # Reembolsa o usuário
                     return
 
                 target = members[choice]
@@ -885,17 +1095,16 @@ class EconomyCog(commands.Cog):
                 anonymous = False
                 await ctx.send("Deseja pagar 50 Rupias extras para que esta ação seja anônima? (Responda 'sim' ou 'não' em 15 segundos)")
                 def check_anonymous(m):
-                    return m.author == ctx.author and m.channel == ctx.channel and m.content.lower() in ["sim", "não"]
+                    return m.content.lower() in ["sim", "não"]
 
                 try:
-                    anon_response = await self.bot.wait_for("message", check=check_anonymous, timeout=15)
+                    anon_response = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=15, check=check_anonymous)
                     if anon_response.content.lower() == "sim":
-                        if self.users[user_id]["coins"] >= 50:
-                            self.users[user_id]["coins"] -= 50
-                            self.save_economy()
+                        try:
+                            reservations.append(await self.ledger.reserve(ctx.guild.id, user_id, 50, key=f"anonimo:{ctx.message.id}", source="shop:anonimato"))
                             anonymous = True
                             await ctx.send("Ação será realizada anonimamente.")
-                        else:
+                        except InsufficientFunds:
                             await ctx.send("Você não tem Rupias suficientes para ser anônimo (50 Rupias necessárias). A ação será realizada normalmente.")
                 except asyncio.TimeoutError:
                     await ctx.send("Tempo esgotado. A ação será realizada normalmente.")
@@ -924,36 +1133,28 @@ class EconomyCog(commands.Cog):
                         f"Autor: {'Anônimo' if anonymous else f'{ctx.author} ({ctx.author.id})'}\n"
                         f"Alvo: {target} ({target.id})\n"
                         f"Preço: {price + (50 if anonymous else 0)} Rupias\n"
-                        f"Novo Saldo do Autor: {self.users[user_id]['coins']} Rupias\n"
-                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                        f"Novo Saldo do Autor: {users[user_id]['coins']} Rupias\n"
+                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                        user=None if anonymous else ctx.author.id, action=f"purchase:{item_id}", amount=price + (50 if anonymous else 0)
                     )
-                    await asyncio.sleep(5 * 60)  # 5 minutos
-                    for channel in ctx.guild.text_channels:
-                        await channel.set_permissions(target, send_messages=None)  # Remove a restrição
-                    await self.log_action(
-                        ctx.guild,
-                        f"🔊 **Fim do Mute em Canais de Texto**\n"
-                        f"Usuário: {target} ({target.id})\n"
-                        f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    self.expiries.schedule(
+                        "mute_texto", 5 * 60,  # 5 minutos
+                        guild_id=ctx.guild.id, user_id=target.id, user_name=str(target)
                     )
                 except Exception as e:
                     await ctx.send(f"Erro ao mutar o usuário nos canais de texto: {str(e)}")
-                    self.users[user_id]["coins"] += price + (50 if anonymous else 0)  # Reembolsa o usuário
-                    self.save_economy()
+                    await self.ledger.refund(*reservations)  # Reembolsa o usuário
                     return
 
             except asyncio.TimeoutError:
                 await ctx.send(f"{ctx.author.mention}, o tempo para escolher um usuário expirou. Suas Rupias foram reembolsadas.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
         elif item_id == "cargo_personalizado":
             try:
                 await ctx.send(f"{ctx.author.mention}, você comprou um **cargo personalizado**! Digite o nome do cargo que deseja (máximo 50 caracteres, você tem 60 segundos).")
-                def check(m):
-                    return m.author == ctx.author and m.channel == ctx.channel
-                message = await self.bot.wait_for("message", check=check, timeout=60)
+                message = await self.prompts.wait_for(ctx.channel.id, ctx.author.id, timeout=60)
                 role_name = message.content[:50]  # Limita o nome a 50 caracteres
                 role = await ctx.guild.create_role(name=role_name, reason=f"Cargo personalizado para {ctx.author.name}")
                 await ctx.author.add_roles(role)
@@ -965,39 +1166,30 @@ class EconomyCog(commands.Cog):
                     f"Item: {item_id}\n"
                     f"Preço: {price} Rupias\n"
                     f"Cargo Criado: {role_name}\n"
-                    f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    f"Novo Saldo: {users[user_id]['coins']} Rupias\n"
+                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                    user=ctx.author.id, action=f"purchase:{item_id}", amount=price
                 )
-                await asyncio.sleep(7 * 24 * 60 * 60)  # 7 dias em segundos
-                await ctx.author.remove_roles(role)
-                await role.delete(reason="Fim do período do cargo personalizado")
-                await self.log_action(
-                    ctx.guild,
-                    f"⏰ **Fim do Cargo Personalizado**\n"
-                    f"Usuário: {ctx.author} ({ctx.author.id})\n"
-                    f"Cargo: {role_name}\n"
-                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                self.expiries.schedule(
+                    "cargo_personalizado", 7 * 24 * 60 * 60,  # 7 dias em segundos
+                    guild_id=ctx.guild.id, user_id=ctx.author.id, user_name=str(ctx.author), role_id=role.id, role_name=role_name
                 )
             except asyncio.TimeoutError:
                 await ctx.send(f"{ctx.author.mention}, o tempo para enviar o nome do cargo expirou. Suas Rupias foram reembolsadas.")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
             except Exception as e:
                 await ctx.send(f"Erro ao criar o cargo personalizado: {str(e)}")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
         elif item_id == "canal_voz_privado":
             try:
-                # Busca a categoria pelo ID
-                category_id = 627874145085947957
-                category = discord.utils.get(ctx.guild.categories, id=category_id)
-                if not category:
-                    await ctx.send("Erro: A categoria de canais de voz (ID: 627874145085947957) não foi encontrada. Por favor, verifique o ID ou peça a um administrador para recriar a categoria.")
-                    self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                    self.save_economy()
+                # Busca a categoria pelo ID configurado
+                category = ctx.guild.get_channel(self.private_voice_category_id)
+                if not isinstance(category, discord.CategoryChannel):
+                    await ctx.send(f"Erro: A categoria de canais de voz (ID: {self.private_voice_category_id}) não foi encontrada. Por favor, verifique o ID ou peça a um administrador para recriar a categoria.")
+                    await self.ledger.refund(*reservations)  # Reembolsa o usuário
                     return
 
                 channel_name = f"Privado-{ctx.author.name}"
@@ -1025,32 +1217,102 @@ class EconomyCog(commands.Cog):
                     f"Item: {item_id}\n"
                     f"Preço: {price} Rupias\n"
                     f"Canal Criado: {channel_name}\n"
-                    f"Novo Saldo: {self.users[user_id]['coins']} Rupias\n"
-                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    f"Novo Saldo: {users[user_id]['coins']} Rupias\n"
+                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                    user=ctx.author.id, action=f"purchase:{item_id}", amount=price
                 )
-                await asyncio.sleep(24 * 60 * 60)  # 24 horas em segundos
-                await channel.delete(reason="Fim do período do canal de voz privado")
-                del self.private_channels[channel.id]
-                await self.log_action(
-                    ctx.guild,
-                    f"⏰ **Fim do Canal de Voz Privado**\n"
-                    f"Usuário: {ctx.author} ({ctx.author.id})\n"
-                    f"Canal: {channel_name}\n"
-                    f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                self.expiries.schedule(
+                    "canal_voz_privado", 24 * 60 * 60,  # 24 horas em segundos
+                    guild_id=ctx.guild.id, user_id=ctx.author.id, user_name=str(ctx.author), channel_id=channel.id, channel_name=channel_name
                 )
             except Exception as e:
                 await ctx.send(f"Erro ao criar o canal de voz privado: {str(e)}")
-                self.users[user_id]["coins"] += price  # Reembolsa o usuário
-                self.save_economy()
+                await self.ledger.refund(*reservations)  # Reembolsa o usuário
                 return
 
-    @commands.command(name="convidar")
+    async def expire_vip_role(self, guild_id, user_id, user_name, role_id):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        member = await get_or_fetch_member(guild, user_id)
+        role = guild.get_role(role_id)
+        if member is not None and role is not None:
+            await member.remove_roles(role)
+        await self.log_action(
+            guild,
+            f"⏰ **Fim do Cargo VIP**\n"
+            f"Usuário: {user_name} ({user_id})\n"
+            f"Item: cargo_vip\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+        )
+
+    async def expire_voice_mute(self, guild_id, user_id, user_name):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        member = await get_or_fetch_member(guild, user_id)
+        if member is not None:
+            await member.edit(mute=False)
+        await self.log_action(
+            guild,
+            f"🔊 **Fim do Mute em Canal de Voz**\n"
+            f"Usuário: {user_name} ({user_id})\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+        )
+
+    async def expire_text_mute(self, guild_id, user_id, user_name):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        # Quem saiu do servidor continua com a restrição nos canais, então ela é removida mesmo assim
+        target = await get_or_fetch_member(guild, user_id) or await self.bot.fetch_user(user_id)
+        for channel in guild.text_channels:
+            await channel.set_permissions(target, send_messages=None)  # Remove a restrição
+        await self.log_action(
+            guild,
+            f"🔊 **Fim do Mute em Canais de Texto**\n"
+            f"Usuário: {user_name} ({user_id})\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+        )
+
+    async def expire_custom_role(self, guild_id, user_id, user_name, role_id, role_name):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        role = guild.get_role(role_id)
+        if role is not None:
+            member = await get_or_fetch_member(guild, user_id)
+            if member is not None:
+                await member.remove_roles(role)
+            await role.delete(reason="Fim do período do cargo personalizado")
+        await self.log_action(
+            guild,
+            f"⏰ **Fim do Cargo Personalizado**\n"
+            f"Usuário: {user_name} ({user_id})\n"
+            f"Cargo: {role_name}\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+        )
+
+    async def expire_private_channel(self, guild_id, user_id, user_name, channel_id, channel_name):
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(channel_id) if guild else None
+        if channel is not None:
+            await channel.delete(reason="Fim do período do canal de voz privado")
+        self.private_channels.pop(channel_id, None)
+        if guild is None:
+            return
+        await self.log_action(
+            guild,
+            f"⏰ **Fim do Canal de Voz Privado**\n"
+            f"Usuário: {user_name} ({user_id})\n"
+            f"Canal: {channel_name}\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+        )
+
+    @commands.hybrid_command(name="convidar")
     async def convidar(self, ctx, member: discord.Member):
         """Permite ao dono de um canal de voz privado convidar outros usuários."""
-        user_id = str(ctx.author.id)
-        if user_id not in self.users:
-            self.users[user_id] = {"coins": 0, "name": ctx.author.name}
-            self.save_economy()
+        await self.ledger.open_account(ctx.guild.id, str(ctx.author.id), ctx.author.name)
 
         # Verifica se o autor é o dono de algum canal privado
         channel_id = None
@@ -1089,17 +1351,20 @@ class EconomyCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"Erro ao convidar o usuário: {str(e)}")
 
-    async def log_action(self, guild, message):
-        """Registra uma ação da economia no canal de logs e no arquivo."""
+    async def log_action(self, guild, message, level=logging.INFO, **fields):
+        """Registra uma ação da economia no canal de logs e no arquivo.
+
+        O canal recebe todas as ações; só o arquivo e o console passam pela amostragem por `action`
+        configurada em "logging.sampling".
+        """
         try:
             log_channel = guild.get_channel(int(self.log_channel_id))
             if log_channel:
                 await log_channel.send(message)
-            logging.info(message.replace('\n', ' | '))
-            print(f"[INFO] {message.replace('\n', ' | ')}")
+            # Campos estruturados (user, action, amount) aparecem no log em JSON
+            logging.log(level, message.replace('\n', ' | '), extra={"guild": guild.id, **fields})
         except Exception as e:
             logging.error(f"Erro ao registrar log: {str(e)}")
-            print(f"[ERROR] Erro ao registrar log: {str(e)}")
 
 # Função setup para registrar o cog
 async def setup(bot):
@@ -1,14 +1,33 @@
 import discord
 from discord.ext import commands, tasks
+import aiohttp
+import asyncio
 import logging
 import requests
 import json
+import os
+import time
+from utils.economy_store import write_json_atomic
+from utils.eventsub import (
+    TWITCH_API_BASE, TWITCH_EVENTSUB_WS_URL, EventSubDropped, EventSubWebSocket, EventSubWebhook, create_subscription
+)
+
+EVENTSUB_TYPES = ("stream.online", "stream.offline")
 
 class LiveNotificationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.is_live = False  # Variável para rastrear se já notificamos a live atual
         self.access_token = None  # Token de acesso para a Twitch API
+        self.token_expires_at = 0  # Horário (epoch) em que o token expira
+        self.announced_streams = {}  # Canal da Twitch -> ID da última live anunciada
+        self.broadcaster_id = None  # ID do canal na Twitch, necessário para as inscrições do EventSub
+        self.http = None  # Sessão aiohttp usada pelo EventSub
+        self.eventsub_task = None
+        self.eventsub_active = False  # Enquanto o EventSub está ativo, a verificação periódica é pulada
+        self.eventsub_retry_delay = 30
+        self.webhook = None
+        self.webhook_revoked = asyncio.Event()
 
         # Carrega as configurações do config.json
         try:
@@ -17,18 +36,67 @@ class LiveNotificationCog(commands.Cog):
             self.twitch_client_id = config['twitch_client_id']
             self.twitch_client_secret = config['twitch_client_secret']
             self.twitch_channel_name = config['twitch_channel_name']
-            self.live_channel_id = config['live_notification_channel_id']
+            # EventSub: "off" (só verificação periódica), "websocket" ou "webhook"
+            self.eventsub_mode = config.get('twitch_eventsub_mode', 'off')
+            self.twitch_user_token = config.get('twitch_user_access_token')  # O WebSocket exige token de usuário
+            self.eventsub_secret = config.get('twitch_eventsub_secret')
+            self.eventsub_callback_url = config.get('twitch_eventsub_callback_url')
+            self.eventsub_port = config.get('twitch_eventsub_port', 8081)
+            # Endereços configuráveis para testar contra um servidor local (ex.: twitch-cli mock-api)
+            self.twitch_api_base = config.get('twitch_api_base', TWITCH_API_BASE)
+            self.eventsub_ws_url = config.get('twitch_eventsub_ws_url', TWITCH_EVENTSUB_WS_URL)
+            self.state_path = config.get('live_state_path', 'live_state.json')
         except Exception as e:
             logging.error(f"Erro ao carregar config.json: {str(e)}")
-            print(f"[ERROR] Erro ao carregar config.json: {str(e)}")
             raise
 
+        if self.eventsub_mode == "websocket" and not self.twitch_user_token:
+            logging.warning("EventSub via WebSocket requer twitch_user_access_token; usando só a verificação periódica")
+            self.eventsub_mode = "off"
+        elif self.eventsub_mode == "webhook" and not (self.eventsub_secret and self.eventsub_callback_url):
+            logging.warning("EventSub via webhook requer twitch_eventsub_secret e twitch_eventsub_callback_url; usando só a verificação periódica")
+            self.eventsub_mode = "off"
+
+        self.load_state()
+
         # Inicia a tarefa de verificação de live
         self.check_live_status.start()
 
-    def cog_unload(self):
+    async def cog_unload(self):
         # Para a tarefa ao descarregar o cog
         self.check_live_status.stop()
+        self.stop_eventsub()
+        if self.webhook is not None:
+            await self.webhook.stop()
+        if self.http is not None:
+            await self.http.close()
+        self.bot.shared_state.release_lease("twitch_live_poller", self.bot.process_id)
+
+    def load_state(self):
+        """Carrega as lives já anunciadas e o token salvo, para que um reinício não repita a notificação nem a autenticação."""
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            self.announced_streams = state.get('announced_streams', {})
+            token = state.get('token') or {}
+            # Margem de 5 minutos para não usar um token prestes a expirar
+            if token.get('expires_at', 0) - 300 > time.time():
+                self.access_token = token['access_token']
+                self.token_expires_at = token['expires_at']
+        except Exception as e:
+            logging.error(f"Erro ao carregar {self.state_path}: {str(e)}")
+
+    def save_state(self):
+        try:
+            token = {"access_token": self.access_token, "expires_at": self.token_expires_at} if self.access_token else None
+            write_json_atomic(self.state_path, {"announced_streams": self.announced_streams, "token": token})
+        except Exception as e:
+            logging.error(f"Erro ao salvar {self.state_path}: {str(e)}")
+
+    def has_valid_token(self):
+        return bool(self.access_token) and time.time() < self.token_expires_at - 300
 
     # Função para obter o token de acesso da Twitch API
     async def get_twitch_access_token(self):
@@ -43,25 +111,40 @@ class LiveNotificationCog(commands.Cog):
             response.raise_for_status()
             data = response.json()
             self.access_token = data['access_token']
+            self.token_expires_at = time.time() + data.get('expires_in', 3600)
+            self.save_state()
             logging.info("Token de acesso da Twitch obtido com sucesso")
-            print("[INFO] Token de acesso da Twitch obtido com sucesso")
         except Exception as e:
             logging.error(f"Erro ao obter token de acesso da Twitch: {str(e)}")
-            print(f"[ERROR] Erro ao obter token de acesso da Twitch: {str(e)}")
             self.access_token = None
 
     # Tarefa que verifica o status da live a cada 5 minutos
     @tasks.loop(minutes=5)
     async def check_live_status(self):
-        # Etapa 1: Obter token de acesso, se ainda não temos
-        if not self.access_token:
+        # Com vários processos de shards, apenas um verifica a live para não repetir notificações
+        if not self.bot.shared_state.acquire_lease("twitch_live_poller", self.bot.process_id, ttl=15 * 60):
+            self.stop_eventsub()
+            return
+
+        # O EventSub roda só no processo que detém a concessão
+        if self.eventsub_mode != "off" and (self.eventsub_task is None or self.eventsub_task.done()):
+            self.eventsub_task = asyncio.create_task(self.run_eventsub())
+        if self.eventsub_active:
+            return  # As notificações chegam pelo EventSub
+
+        await self.refresh_live_status()
+
+    async def refresh_live_status(self):
+        """Consulta a Twitch API e notifica ou reseta o estado da live."""
+        # Etapa 1: Obter token de acesso, se ainda não temos um válido
+        if not self.has_valid_token():
             await self.get_twitch_access_token()
             if not self.access_token:
                 return  # Se não conseguimos o token, para a verificação
 
         # Etapa 2: Verificar se o canal está ao vivo
         try:
-            url = "https://api.twitch.tv/helix/streams"
+            url = f"{self.twitch_api_base}/streams"
             headers = {
                 "Client-ID": self.twitch_client_id,
                 "Authorization": f"Bearer {self.access_token}"
@@ -78,42 +161,149 @@ class LiveNotificationCog(commands.Cog):
             # Etapa 3: Enviar notificação, se necessário
             if is_currently_live and not self.is_live:
                 # Canal está ao vivo e ainda não notificamos
-                channel = self.bot.get_channel(self.live_channel_id)
-                if not channel:
-                    logging.error(f"Canal com ID {self.live_channel_id} não encontrado")
-                    print(f"[ERROR] Canal com ID {self.live_channel_id} não encontrado")
-                    return
-
-                # Obtém detalhes da live
-                stream = live_data[0]
-                stream_title = stream.get('title', 'Sem título')
-                twitch_url = f"https://twitch.tv/{self.twitch_channel_name}"
-
-                # Envia a mensagem de notificação
-                message = (
-                    "@everyone\n"
-                    f"🎥 **{self.twitch_channel_name} está AO VIVO na Twitch!**\n"
-                    f"**Título:** {stream_title}\n"
-                    f"**Assista agora:** {twitch_url}"
-                )
-                await channel.send(message)
-                logging.info(f"Notificação de live enviada para o canal {channel.name}")
-                print(f"[INFO] Notificação de live enviada para o canal {channel.name}")
-                self.is_live = True  # Marca que já notificamos
-
+                await self.announce_live(live_data[0]['id'], live_data[0].get('title', 'Sem título'))
             elif not is_currently_live and self.is_live:
-                # Canal não está mais ao vivo, reseta o estado
-                self.is_live = False
-                logging.info(f"Canal {self.twitch_channel_name} não está mais ao vivo")
-                print(f"[INFO] Canal {self.twitch_channel_name} não está mais ao vivo")
+                self.mark_offline()
 
         except Exception as e:
             logging.error(f"Erro ao verificar status da live: {str(e)}")
-            print(f"[ERROR] Erro ao verificar status da live: {str(e)}")
             # Se houver erro de autenticação (ex.: token expirado), tenta obter um novo token
             if "401" in str(e) or "403" in str(e):
                 self.access_token = None
 
+    async def announce_live(self, stream_id, stream_title):
+        if self.announced_streams.get(self.twitch_channel_name) == stream_id:
+            # Live já anunciada antes de um reinício: só restaura o estado
+            self.is_live = True
+            logging.info(f"Live {stream_id} de {self.twitch_channel_name} já foi anunciada")
+            return
+
+        # Canais configurados em todos os servidores (!config live), inclusive os de outros processos
+        channel_ids = self.bot.guild_settings.all_values("live_channel_id")
+        if not channel_ids:
+            logging.error("Nenhum servidor tem canal de notificações de live configurado")
+            return
+
+        twitch_url = f"https://twitch.tv/{self.twitch_channel_name}"
+
+        # Envia a mensagem de notificação
+        message = (
+            "@everyone\n"
+            f"🎥 **{self.twitch_channel_name} está AO VIVO na Twitch!**\n"
+            f"**Título:** {stream_title}\n"
+            f"**Assista agora:** {twitch_url}"
+        )
+        for guild_id, channel_id in channel_ids.items():
+            try:
+                # O canal pode estar em um servidor de outro processo; nesse caso é buscado pela API
+                channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+                await channel.send(message)
+                logging.info(f"Notificação de live enviada para o canal {channel.name} do servidor {guild_id}")
+            except discord.HTTPException as e:
+                logging.error(f"Erro ao enviar a notificação de live para o canal {channel_id} do servidor {guild_id}: {str(e)}")
+        self.is_live = True  # Marca que já notificamos
+        self.announced_streams[self.twitch_channel_name] = stream_id
+        self.save_state()
+
+    def mark_offline(self):
+        # Canal não está mais ao vivo, reseta o estado
+        self.is_live = False
+        logging.info(f"Canal {self.twitch_channel_name} não está mais ao vivo")
+
+    # ----- EventSub -----
+
+    def stop_eventsub(self):
+        if self.eventsub_task is not None:
+            self.eventsub_task.cancel()
+            self.eventsub_task = None
+        self.eventsub_active = False
+
+    async def helix_get(self, path, params):
+        """GET na Twitch API pela sessão aiohttp, com o token de aplicativo."""
+        if not self.has_valid_token():
+            await self.get_twitch_access_token()
+            if not self.access_token:
+                raise EventSubDropped("Sem token de acesso da Twitch")
+        headers = {"Client-ID": self.twitch_client_id, "Authorization": f"Bearer {self.access_token}"}
+        async with self.http.get(f"{self.twitch_api_base}/{path}", headers=headers, params=params) as response:
+            if response.status == 401:
+                self.access_token = None
+            response.raise_for_status()
+            return (await response.json()).get('data', [])
+
+    async def run_eventsub(self):
+        """Mantém o EventSub ativo; se cair, volta à verificação periódica e tenta de novo com espera crescente."""
+        if self.http is None:
+            self.http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        while True:
+            try:
+                if self.broadcaster_id is None:
+                    users = await self.helix_get("users", {"login": self.twitch_channel_name})
+                    if not users:
+                        raise EventSubDropped(f"Canal {self.twitch_channel_name} não encontrado na Twitch")
+                    self.broadcaster_id = users[0]['id']
+
+                if self.eventsub_mode == "websocket":
+                    await EventSubWebSocket(self.http, self.subscribe_websocket, self.handle_eventsub_event, self.eventsub_ws_url).run()
+                else:
+                    await self.run_webhook()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.eventsub_active = False
+                logging.warning(f"EventSub indisponível, voltando à verificação periódica: {str(e)}")
+                # Uma live pode ter começado ou terminado durante a queda
+                await self.refresh_live_status()
+
+            await asyncio.sleep(self.eventsub_retry_delay)
+            self.eventsub_retry_delay = min(self.eventsub_retry_delay * 2, 15 * 60)
+
+    async def subscribe_websocket(self, session_id):
+        for event_type in EVENTSUB_TYPES:
+            await create_subscription(
+                self.http, self.twitch_api_base, self.twitch_client_id, self.twitch_user_token,
+                event_type, self.broadcaster_id, {"method": "websocket", "session_id": session_id}
+            )
+        self.eventsub_started()
+
+    async def run_webhook(self):
+        if self.webhook is None:
+            self.webhook = EventSubWebhook(self.eventsub_secret, self.handle_eventsub_event, self.on_webhook_revoked, port=self.eventsub_port)
+            await self.webhook.start()
+
+        if not self.has_valid_token():
+            await self.get_twitch_access_token()
+        transport = {"method": "webhook", "callback": self.eventsub_callback_url, "secret": self.eventsub_secret}
+        for event_type in EVENTSUB_TYPES:
+            await create_subscription(
+                self.http, self.twitch_api_base, self.twitch_client_id, self.access_token,
+                event_type, self.broadcaster_id, transport
+            )
+        self.webhook_revoked.clear()
+        self.eventsub_started()
+        await self.webhook_revoked.wait()
+        raise EventSubDropped("Inscrição do webhook revogada")
+
+    def eventsub_started(self):
+        self.eventsub_active = True
+        self.eventsub_retry_delay = 30
+        logging.info(f"EventSub ({self.eventsub_mode}) ativo para {self.twitch_channel_name}")
+
+    async def on_webhook_revoked(self, status):
+        logging.warning(f"Inscrição do EventSub revogada pela Twitch: {status}")
+        self.webhook_revoked.set()
+
+    async def handle_eventsub_event(self, event_type, event):
+        try:
+            if event_type == "stream.online" and not self.is_live:
+                # O evento não traz o título; ele é buscado na API
+                streams = await self.helix_get("streams", {"user_id": event['broadcaster_user_id']})
+                await self.announce_live(event['id'], streams[0].get('title', 'Sem título') if streams else 'Sem título')
+            elif event_type == "stream.offline" and self.is_live:
+                self.mark_offline()
+        except Exception as e:
+            logging.error(f"Erro ao processar evento {event_type} do EventSub: {str(e)}")
+
     # Aguarda o bot estar pronto antes de iniciar a tarefa
     @check_live_status.before_loop
     async def before_check_live_status(self):
@@ -121,4 +311,4 @@ class LiveNotificationCog(commands.Cog):
 
 # Função setup para registrar o cog
 async def setup(bot):
-    await bot.add_cog(LiveNotificationCog(bot))
\ No newline at end of file
+    await bot.add_cog(LiveNotificationCog(bot))
@@ -3,29 +3,96 @@ from discord.ext import commands
 import logging
 import json
 import asyncio
-from datetime import datetime
+import io
+import re
+from datetime import datetime, timezone
+from typing import Optional
+from utils.duration import parse_duration, parse_timedelta
+from utils.expiry import ExpiryScheduler
+from utils.purge import PurgeFilter, purge_messages
+from utils.case_store import CaseStore
+from utils.members import all_members, get_or_fetch_member, resolve_members
+from utils.message_cache import CachedMessage, MessageRingCache, format_transcript
+
+class PurgeFlags(commands.FlagConverter):
+    """Filtros aceitos pelo comando !clear."""
+    usuario: Optional[discord.User] = None
+    bots: bool = False
+    regex: Optional[str] = None
+    anexos: bool = False
+    links: bool = False
+    desde: Optional[str] = None  # Apenas mensagens enviadas nos últimos X (ex.: 2h)
+    ate: Optional[str] = None  # Apenas mensagens enviadas há mais de X (ex.: 30m)
+    busca: Optional[int] = None  # Máximo de mensagens analisadas quando há filtros
+
+class MassActionFlags(commands.FlagConverter):
+    """Seleção de alvos aceita pelos comandos !massban e !masskick."""
+    ids: Optional[str] = None  # IDs separados por espaço ou vírgula
+    entrou: Optional[str] = None  # Entrou no servidor nos últimos X (ex.: 30m)
+    conta: Optional[str] = None  # Conta criada há menos de X (ex.: 7d)
+    nome: Optional[str] = None  # Regex aplicada ao nome e ao apelido
+    motivo: Optional[str] = None
+    confirmar: bool = False  # Sem confirmação, apenas mostra quem seria afetado
 
 class ModerationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.max_purge_amount = 10000  # Máximo de mensagens apagadas por comando
+        self.max_purge_scan = 50000  # Máximo de mensagens analisadas quando há filtros
+        self.max_mass_targets = 5000  # Máximo de alvos por !massban/!masskick
+        self.bulk_ban_chunk = 200  # Limite do Discord por chamada de banimento em massa
+        self.mass_kick_concurrency = 5  # Expulsões simultâneas no !masskick
 
         # Carrega as configurações do config.json
         try:
             with open('config.json', 'r') as config_file:
                 config = json.load(config_file)
-            self.moderator_role_id = config['moderator_role_id']
-            self.mod_log_channel_id = config['mod_log_channel_id']
+            self.cases_db_path = config.get('moderation_db_path', 'moderation.db')
+            # Cache das últimas mensagens de cada canal para os logs de exclusão e edição
+            message_cache_config = config.get('message_cache', {})
+            self.message_cache_per_channel = message_cache_config.get('per_channel', 200)
+            self.message_cache_max_mb = message_cache_config.get('max_mb', 16)
         except Exception as e:
             logging.error(f"Erro ao carregar config.json: {str(e)}")
-            print(f"[ERROR] Erro ao carregar config.json: {str(e)}")
             raise
 
-    # Decorador para verificar se o usuário tem o cargo de moderador
+        # Estado em memória entregue pela instância anterior no !recarregar (os mesmos objetos)
+        handoff = bot.state_handoff.get(self.qualified_name)
+
+        # Banco de casos de moderação; no !recarregar, a conexão da instância anterior continua em uso,
+        # pois um !clear ou !massban dela ainda pode estar registrando casos
+        self.cases = handoff["cases"] if handoff else CaseStore(self.cases_db_path)
+        self.message_cache = MessageRingCache(self.message_cache_per_channel, int(self.message_cache_max_mb * 1024 * 1024))
+        self.purged_ids = set()  # Mensagens apagadas pelo !clear, que já registra o que removeu
+        self.expiries = ExpiryScheduler({"mute": self.expire_mute})  # Fim dos silenciamentos do !mute
+
+        if handoff:
+            self.message_cache = handoff["message_cache"]
+            self.purged_ids = handoff["purged_ids"]
+
+    async def cog_load(self):
+        handoff = self.bot.state_handoff.pop(self.qualified_name, None)
+        if handoff:
+            self.expiries.restore(handoff["expiries"])
+
+    def cog_unload(self):
+        # Entrega o estado em memória para a próxima instância (!recarregar)
+        # O banco de casos só é fechado no encerramento do bot, pelos `closers`, se nenhuma instância o receber
+        self.bot.state_handoff[self.qualified_name] = {
+            "cases": self.cases,
+            "message_cache": self.message_cache,
+            "purged_ids": self.purged_ids,
+            "expiries": self.expiries.export(),
+            "closers": [self.cases.close]
+        }
+
+    # Decorador para verificar se o usuário tem o cargo de moderador do servidor
     def is_moderator():
         async def predicate(ctx):
-            moderator_role = ctx.guild.get_role(int(ctx.bot.moderation_cog.moderator_role_id))
+            role_id = ctx.bot.guild_settings.get(ctx.guild.id, "moderator_role_id")
+            moderator_role = ctx.guild.get_role(role_id) if role_id else None
             if not moderator_role:
-                await ctx.send("Cargo de moderador não encontrado. Verifique o ID no config.json.")
+                await ctx.send("Cargo de moderador não encontrado. Um administrador pode defini-lo com `!config moderador @cargo`.")
                 return False
             if moderator_role not in ctx.author.roles:
                 await ctx.send("Você não tem permissão para usar este comando. Apenas moderadores podem usá-lo.")
@@ -33,17 +100,18 @@ class ModerationCog(commands.Cog):
             return True
         return commands.check(predicate)
 
-    @commands.command(name="ban")
+    @commands.hybrid_command(name="ban")
     @is_moderator()
     @commands.bot_has_permissions(ban_members=True)
     async def ban(self, ctx, member: discord.Member, *, reason=None):
         """Bane um usuário do servidor."""
         try:
             await member.ban(reason=reason)
-            await ctx.send(f"{member.mention} foi banido por {ctx.author.mention}.")
+            case_id = self.cases.add_case(ctx.guild.id, "ban", ctx.author, member, reason)
+            await ctx.send(f"{member.mention} foi banido por {ctx.author.mention}. (Caso #{case_id})")
             await self.log_action(
                 ctx.guild,
-                f"🚫 **Banimento**\n"
+                f"🚫 **Banimento** (Caso #{case_id})\n"
                 f"Usuário: {member} ({member.id})\n"
                 f"Moderador: {ctx.author} ({ctx.author.id})\n"
                 f"Motivo: {reason or 'Não especificado'}\n"
@@ -52,19 +120,19 @@ class ModerationCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"Erro ao banir {member.mention}: {str(e)}")
             logging.error(f"Erro ao banir {member}: {str(e)}")
-            print(f"[ERROR] Erro ao banir {member}: {str(e)}")
 
-    @commands.command(name="kick")
+    @commands.hybrid_command(name="kick")
     @is_moderator()
     @commands.bot_has_permissions(kick_members=True)
     async def kick(self, ctx, member: discord.Member, *, reason=None):
         """Expulsa um usuário do servidor."""
         try:
             await member.kick(reason=reason)
-            await ctx.send(f"{member.mention} foi expulso por {ctx.author.mention}.")
+            case_id = self.cases.add_case(ctx.guild.id, "kick", ctx.author, member, reason)
+            await ctx.send(f"{member.mention} foi expulso por {ctx.author.mention}. (Caso #{case_id})")
             await self.log_action(
                 ctx.guild,
-                f"👢 **Expulsão**\n"
+                f"👢 **Expulsão** (Caso #{case_id})\n"
                 f"Usuário: {member} ({member.id})\n"
                 f"Moderador: {ctx.author} ({ctx.author.id})\n"
                 f"Motivo: {reason or 'Não especificado'}\n"
@@ -73,59 +141,300 @@ class ModerationCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"Erro ao expulsar {member.mention}: {str(e)}")
             logging.error(f"Erro ao expulsar {member}: {str(e)}")
-            print(f"[ERROR] Erro ao expulsar {member}: {str(e)}")
 
-    @commands.command(name="clear")
+    @commands.hybrid_command(name="massban")
+    @is_moderator()
+    @commands.bot_has_permissions(ban_members=True, manage_guild=True)  # bulk_ban exige também Gerenciar Servidor
+    async def massban(self, ctx, *, filtros: MassActionFlags):
+        """Bane vários usuários de uma vez por IDs ou filtros.
+
+        Exemplo: !massban entrou: 30m conta: 1d confirmar: true motivo: raid
+        """
+        await ctx.defer()  # Como comando de barra, a seleção pode passar do prazo de resposta
+        targets = await self.select_mass_targets(ctx, filtros, allow_non_members=True)
+        if targets is None:
+            return
+        if not filtros.confirmar:
+            await self.send_mass_preview(ctx, "banidos", targets)
+            return
+
+        reason = f"Massban por {ctx.author}: {filtros.motivo or 'Não especificado'}"
+        status = await ctx.send(f"🚫 Banindo usuários... 0/{len(targets)}")
+        banned_ids = set()
+        failed = 0
+        for start in range(0, len(targets), self.bulk_ban_chunk):
+            chunk = targets[start:start + self.bulk_ban_chunk]
+            try:
+                result = await ctx.guild.bulk_ban(chunk, reason=reason, delete_message_seconds=0)
+                banned_ids.update(user.id for user in result.banned)
+                failed += len(result.failed)
+            except discord.HTTPException as e:
+                failed += len(chunk)
+                logging.error(f"Erro no banimento em massa: {str(e)}")
+            try:
+                await status.edit(content=f"🚫 Banindo usuários... {len(banned_ids) + failed}/{len(targets)}")
+            except discord.HTTPException:
+                pass
+
+        banned = [user for user in targets if user.id in banned_ids]
+        await self.finish_mass_action(ctx, status, "massban", "🚫 **Banimento em Massa**", banned, failed, filtros)
+
+    @commands.hybrid_command(name="masskick")
+    @is_moderator()
+    @commands.bot_has_permissions(kick_members=True)
+    async def masskick(self, ctx, *, filtros: MassActionFlags):
+        """Expulsa vários membros de uma vez por IDs ou filtros.
+
+        Exemplo: !masskick nome: ^spam\\d+ confirmar: true
+        """
+        await ctx.defer()
+        targets = await self.select_mass_targets(ctx, filtros, allow_non_members=False)
+        if targets is None:
+            return
+        if not filtros.confirmar:
+            await self.send_mass_preview(ctx, "expulsos", targets)
+            return
+
+        reason = f"Masskick por {ctx.author}: {filtros.motivo or 'Não especificado'}"
+        status = await ctx.send(f"👢 Expulsando membros... 0/{len(targets)}")
+        semaphore = asyncio.Semaphore(self.mass_kick_concurrency)
+
+        async def kick_one(member):
+            async with semaphore:
+                try:
+                    await member.kick(reason=reason)
+                    return True
+                except discord.HTTPException as e:
+                    logging.error(f"Erro ao expulsar {member}: {str(e)}")
+                    return False
+
+        results = await asyncio.gather(*(kick_one(member) for member in targets))
+        kicked = [member for member, ok in zip(targets, results) if ok]
+        await self.finish_mass_action(ctx, status, "masskick", "👢 **Expulsão em Massa**", kicked, len(targets) - len(kicked), filtros)
+
+    async def select_mass_targets(self, ctx, filtros, allow_non_members):
+        """Resolve os alvos de uma ação em massa. Retorna None (após avisar) se a seleção for inválida."""
+        if not (filtros.ids or filtros.entrou or filtros.conta or filtros.nome):
+            await ctx.send("Informe IDs ou pelo menos um filtro: ids, entrou, conta ou nome.")
+            return None
+
+        now = datetime.now(timezone.utc)
+        try:
+            joined_after = now - parse_timedelta(filtros.entrou) if filtros.entrou else None
+            created_after = now - parse_timedelta(filtros.conta) if filtros.conta else None
+            name_pattern = re.compile(filtros.nome, re.IGNORECASE) if filtros.nome else None
+        except re.error as e:
+            await ctx.send(f"Regex inválida: {str(e)}")
+            return None
+        except ValueError as e:
+            await ctx.send(str(e))
+            return None
+
+        if filtros.ids:
+            raw_ids = filtros.ids.replace(",", " ").split()
+            if not all(raw_id.isdigit() for raw_id in raw_ids):
+                await ctx.send("Os IDs devem ser números separados por espaço ou vírgula.")
+                return None
+            user_ids = list(dict.fromkeys(int(raw_id) for raw_id in raw_ids))
+            members = await resolve_members(ctx.guild, user_ids)  # Funciona com o cache parcial
+            candidates = []
+            for user_id in user_ids:
+                member = members.get(user_id)
+                if member:
+                    candidates.append(member)
+                elif allow_non_members and not (joined_after or created_after or name_pattern):
+                    # Usuários fora do servidor só podem ser banidos por ID, sem filtros
+                    candidates.append(self.bot.get_user(user_id) or discord.Object(id=user_id))
+        else:
+            candidates = await all_members(ctx.guild)
+
+        protected_ids = {ctx.author.id, ctx.guild.owner_id, ctx.guild.me.id}
+        targets = []
+        for user in candidates:
+            if user.id in protected_ids:
+                continue
+            if isinstance(user, discord.Member):
+                # Nunca atinge membros com cargo igual ou superior ao do moderador ou do bot
+                if user.top_role >= ctx.author.top_role or user.top_role >= ctx.guild.me.top_role:
+                    continue
+                if joined_after and (not user.joined_at or user.joined_at < joined_after):
+                    continue
+                if created_after and user.created_at < created_after:
+                    continue
+                if name_pattern and not (name_pattern.search(user.name) or name_pattern.search(user.display_name)):
+                    continue
+            targets.append(user)
+
+        if not targets:
+            await ctx.send("Nenhum usuário corresponde aos critérios informados.")
+            return None
+        if len(targets) > self.max_mass_targets:
+            await ctx.send(f"A seleção tem {len(targets)} usuários, acima do limite de {self.max_mass_targets}. Refine os filtros.")
+            return None
+        return targets
+
+    async def send_mass_preview(self, ctx, verb, targets):
+        """Mostra quem seria afetado por uma ação em massa sem executá-la."""
+        preview = "\n".join(f"- {user} ({user.id})" for user in targets[:20])
+        if len(targets) > 20:
+            preview += f"\n... e mais {len(targets) - 20}"
+        await ctx.send(
+            f"**{len(targets)} usuários** seriam {verb}:\n{preview}\n"
+            f"Repita o comando com `confirmar: true` para executar."
+        )
+
+    async def finish_mass_action(self, ctx, status, action, title, affected, failed, filtros):
+        """Registra os casos e publica um único log agregado para uma ação em massa."""
+        case_ids = self.cases.add_cases(ctx.guild.id, action, ctx.author, affected, filtros.motivo) if affected else []
+        cases_text = f"#{case_ids[0]} a #{case_ids[-1]}" if case_ids else "nenhum"
+        await status.edit(content=f"{title}: {len(affected)} usuários afetados, {failed} falhas. (Casos {cases_text})")
+
+        criteria = []
+        if filtros.ids:
+            criteria.append(f"ids ({len(filtros.ids.replace(',', ' ').split())})")
+        if filtros.entrou:
+            criteria.append(f"entrou nos últimos {filtros.entrou}")
+        if filtros.conta:
+            criteria.append(f"conta com menos de {filtros.conta}")
+        if filtros.nome:
+            criteria.append(f"nome={filtros.nome}")
+        await self.log_action(
+            ctx.guild,
+            f"{title} (Casos {cases_text})\n"
+            f"Moderador: {ctx.author} ({ctx.author.id})\n"
+            f"Critérios: {', '.join(criteria)}\n"
+            f"Afetados: {len(affected)}\n"
+            f"Falhas: {failed}\n"
+            f"Motivo: {filtros.motivo or 'Não especificado'}\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+        )
+
+    @commands.hybrid_command(name="clear")
     @is_moderator()
-    @commands.bot_has_permissions(manage_messages=True)
-    async def clear(self, ctx, amount: int):
-        """Deleta um número específico de mensagens no canal."""
+    @commands.bot_has_permissions(manage_messages=True, read_message_history=True)
+    async def clear(self, ctx, amount: int, *, filtros: PurgeFlags):
+        """Deleta mensagens no canal, com filtros opcionais.
+
+        Exemplo: !clear 500 usuario: @fulano regex: spam desde: 2h
+        Filtros: usuario, bots, regex, anexos, links, desde (ex.: 2h), ate (ex.: 30m), busca.
+        """
         if amount < 1:
             await ctx.send("Por favor, especifique um número maior que 0.")
             return
-        if amount > 100:
-            await ctx.send("Não posso deletar mais de 100 mensagens de uma vez.")
+        if amount > self.max_purge_amount:
+            await ctx.send(f"Não posso deletar mais de {self.max_purge_amount} mensagens de uma vez.")
+            return
+
+        now = datetime.now(timezone.utc)
+        try:
+            purge_filter = PurgeFilter(
+                author=filtros.usuario,
+                bots_only=filtros.bots,
+                pattern=filtros.regex,
+                attachments=filtros.anexos,
+                links=filtros.links,
+                after=now - parse_timedelta(filtros.desde) if filtros.desde else None,
+                before=now - parse_timedelta(filtros.ate) if filtros.ate else None
+            )
+        except re.error as e:
+            await ctx.send(f"Regex inválida: {str(e)}")
             return
+        except ValueError as e:
+            await ctx.send(str(e))
+            return
+
+        # Sem filtros, basta ler a quantidade pedida; com filtros, o histórico é varrido até o limite de busca
+        if purge_filter.is_empty:
+            scan_limit = amount
+        else:
+            scan_limit = min(filtros.busca or amount * 10, self.max_purge_scan)
+
+        status = await ctx.send(f"🧹 Limpando mensagens... 0/{amount}")
+        removed = []  # Conteúdo das mensagens apagadas, anexado ao log
+        marked = set()  # IDs registrados em purged_ids por este comando
+
+        def mark_deleting(messages):
+            # Registrados antes da chamada: o evento de exclusão do gateway costuma chegar antes da resposta HTTP
+            ids = {message.id for message in messages}
+            marked.update(ids)
+            self.purged_ids.update(ids)
+
+        def unmark_failed(messages):
+            ids = {message.id for message in messages}
+            marked.difference_update(ids)
+            self.purged_ids.difference_update(ids)
+
+        def record_deleted(messages):
+            for message in messages:
+                removed.append(self.message_cache.remove(ctx.channel.id, message.id) or CachedMessage(message))
+
+        async def report_progress(result):
+            try:
+                await status.edit(content=f"🧹 Limpando mensagens... {result.deleted}/{amount} (analisadas: {result.scanned})")
+            except discord.HTTPException:
+                pass
 
         try:
-            await ctx.channel.purge(limit=amount)
-            await ctx.send(f"{amount} mensagens deletadas por {ctx.author.mention}.", delete_after=5)
+            result = await purge_messages(
+                ctx.channel,
+                amount,
+                purge_filter,
+                scan_limit=scan_limit,
+                before=ctx.message,  # Ignora a própria mensagem do comando e a de status
+                progress=report_progress,
+                on_deleting=mark_deleting,
+                on_deleted=record_deleted,
+                on_failed=unmark_failed
+            )
+            if ctx.interaction is None:
+                await ctx.message.delete()  # Comandos de barra não têm mensagem para apagar
+            case_id = self.cases.add_case(
+                ctx.guild.id,
+                "clear",
+                ctx.author,
+                filtros.usuario,
+                details={
+                    "channel_id": ctx.channel.id,
+                    "channel_name": ctx.channel.name,
+                    "deleted": result.deleted,
+                    "scanned": result.scanned,
+                    "filters": purge_filter.describe()
+                }
+            )
+            await status.edit(content=f"{result.deleted} mensagens deletadas por {ctx.author.mention}. (Caso #{case_id})", delete_after=5)
             await self.log_action(
                 ctx.guild,
-                f"🧹 **Limpeza de Mensagens**\n"
+                f"🧹 **Limpeza de Mensagens** (Caso #{case_id})\n"
                 f"Canal: {ctx.channel.name} ({ctx.channel.id})\n"
                 f"Moderador: {ctx.author} ({ctx.author.id})\n"
-                f"Quantidade: {amount}\n"
-                f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                f"Quantidade: {result.deleted} (em massa: {result.bulk_deleted}, individuais: {result.single_deleted}, falhas: {result.failed})\n"
+                f"Mensagens Analisadas: {result.scanned}\n"
+                f"Filtros: {purge_filter.describe()}\n"
+                f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                file=self.transcript_file(removed, f"limpeza-caso-{case_id}.txt")
             )
         except Exception as e:
             await ctx.send(f"Erro ao deletar mensagens: {str(e)}")
             logging.error(f"Erro ao deletar mensagens: {str(e)}")
-            print(f"[ERROR] Erro ao deletar mensagens: {str(e)}")
+        finally:
+            # Os eventos de exclusão chegam pelo gateway logo depois; passado esse tempo, os IDs não são mais necessários
+            asyncio.get_running_loop().call_later(60, self.purged_ids.difference_update, marked)
 
-    @commands.command(name="mute")
+    @commands.hybrid_command(name="mute")
     @is_moderator()
     @commands.bot_has_permissions(manage_roles=True)
     async def mute(self, ctx, member: discord.Member, duration: str):
         """Silencia um usuário por um período de tempo (ex.: 10m para 10 minutos)."""
         # Converte o tempo para segundos
-        time_units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
         try:
-            unit = duration[-1].lower()
-            if unit not in time_units:
-                await ctx.send("Unidade de tempo inválida. Use s (segundos), m (minutos), h (horas) ou d (dias).")
-                return
-            time_value = int(duration[:-1])
-            if time_value <= 0:
-                await ctx.send("O tempo deve ser maior que 0.")
-                return
-            seconds = time_value * time_units[unit]
-        except ValueError:
-            await ctx.send("Formato de tempo inválido. Use algo como '10m' para 10 minutos.")
+            seconds = parse_duration(duration)
+        except ValueError as e:
+            await ctx.send(str(e))
             return
+        duration = duration.strip().lower()
 
         # Verifica ou cria o cargo "Muted"
-        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+        muted_role = self.bot.resource_index.get_role(ctx.guild, "Muted")
         if not muted_role:
             try:
                 muted_role = await ctx.guild.create_role(
@@ -142,46 +451,218 @@ class ModerationCog(commands.Cog):
         # Aplica o cargo ao usuário
         try:
             await member.add_roles(muted_role, reason=f"Silenciado por {ctx.author}")
-            await ctx.send(f"{member.mention} foi silenciado por {time_value}{unit} por {ctx.author.mention}.")
+            case_id = self.cases.add_case(
+                ctx.guild.id, "mute", ctx.author, member, details={"duration": duration}
+            )
+            await ctx.send(f"{member.mention} foi silenciado por {duration} por {ctx.author.mention}. (Caso #{case_id})")
             await self.log_action(
                 ctx.guild,
-                f"🔇 **Silenciamento**\n"
+                f"🔇 **Silenciamento** (Caso #{case_id})\n"
                 f"Usuário: {member} ({member.id})\n"
                 f"Moderador: {ctx.author} ({ctx.author.id})\n"
-                f"Duração: {time_value}{unit}\n"
+                f"Duração: {duration}\n"
                 f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
             )
 
-            # Aguarda o tempo especificado e remove o cargo
-            await asyncio.sleep(seconds)
-            await member.remove_roles(muted_role, reason="Fim do silenciamento")
-            await self.log_action(
-                ctx.guild,
-                f"🔊 **Fim de Silenciamento**\n"
-                f"Usuário: {member} ({member.id})\n"
-                f"Moderador: {ctx.author} ({ctx.author.id})\n"
-                f"Duração: {time_value}{unit}\n"
-                f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            # Remove o cargo depois do tempo especificado
+            self.expiries.schedule(
+                "mute", seconds,
+                guild_id=ctx.guild.id, user_id=member.id, user_name=str(member), role_id=muted_role.id,
+                case_id=case_id, moderator=f"{ctx.author} ({ctx.author.id})", duration=duration
             )
         except Exception as e:
             await ctx.send(f"Erro ao silenciar {member.mention}: {str(e)}")
             logging.error(f"Erro ao silenciar {member}: {str(e)}")
-            print(f"[ERROR] Erro ao silenciar {member}: {str(e)}")
 
-    async def log_action(self, guild, message):
+    async def expire_mute(self, guild_id, user_id, user_name, role_id, case_id, moderator, duration):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        member = await get_or_fetch_member(guild, user_id)
+        role = guild.get_role(role_id)
+        if member is not None and role is not None:
+            await member.remove_roles(role, reason="Fim do silenciamento")
+        await self.log_action(
+            guild,
+            f"🔊 **Fim de Silenciamento** (Caso #{case_id})\n"
+            f"Usuário: {user_name} ({user_id})\n"
+            f"Moderador: {moderator}\n"
+            f"Duração: {duration}\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}"
+        )
+
+    @commands.hybrid_command(name="historico")
+    @is_moderator()
+    async def historico(self, ctx, user: discord.User):
+        """Mostra os casos de moderação mais recentes de um usuário."""
+        cases, total = self.cases.user_history(ctx.guild.id, user.id)
+        if not cases:
+            await ctx.send(f"{user} não possui casos de moderação registrados.")
+            return
+
+        embed = discord.Embed(title=f"📋 Histórico de {user}", color=discord.Color.orange())
+        embed.set_footer(text=f"Mostrando {len(cases)} de {total} casos")
+        for case in cases:
+            embed.add_field(name=self.format_case_title(case), value=self.format_case_summary(case), inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name="caso")
+    @is_moderator()
+    async def caso(self, ctx, case_id: int):
+        """Mostra os detalhes de um caso de moderação."""
+        case = self.cases.get_case(ctx.guild.id, case_id)
+        if not case:
+            await ctx.send(f"Caso #{case_id} não encontrado.")
+            return
+
+        embed = discord.Embed(title=self.format_case_title(case), color=discord.Color.orange())
+        if case["user_id"]:
+            embed.add_field(name="Usuário", value=f"{case['user_name']} ({case['user_id']})", inline=False)
+        embed.add_field(name="Moderador", value=f"{case['moderator_name']} ({case['moderator_id']})", inline=False)
+        embed.add_field(name="Motivo", value=case["reason"] or "Não especificado", inline=False)
+        for key, value in case["details"].items():
+            embed.add_field(name=key, value=str(value), inline=True)
+        embed.set_footer(text=f"{case['created_at']} UTC")
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name="buscar_casos")
+    @is_moderator()
+    async def buscar_casos(self, ctx, *, texto: str):
+        """Busca casos de moderação pelo texto do motivo."""
+        cases = self.cases.search(ctx.guild.id, texto)
+        if not cases:
+            await ctx.send(f"Nenhum caso encontrado com o motivo '{texto}'.")
+            return
+
+        embed = discord.Embed(title=f"🔎 Casos com '{texto}'", color=discord.Color.orange())
+        for case in cases:
+            embed.add_field(name=self.format_case_title(case), value=self.format_case_summary(case), inline=False)
+        await ctx.send(embed=embed)
+
+    @staticmethod
+    def format_case_title(case):
+        labels = {
+            "ban": "🚫 Banimento",
+            "kick": "👢 Expulsão",
+            "mute": "🔇 Silenciamento",
+            "clear": "🧹 Limpeza",
+            "massban": "🚫 Banimento em Massa",
+            "masskick": "👢 Expulsão em Massa"
+        }
+        return f"Caso #{case['case_number']} - {labels.get(case['action'], case['action'])}"
+
+    @staticmethod
+    def format_case_summary(case):
+        summary = f"Moderador: {case['moderator_name']}\nData: {case['created_at']} UTC"
+        if case["user_id"]:
+            summary = f"Usuário: {case['user_name']} ({case['user_id']})\n" + summary
+        if case["reason"]:
+            summary += f"\nMotivo: {case['reason'][:200]}"
+        return summary
+
+    @staticmethod
+    def transcript_file(entries, filename):
+        """Arquivo .txt com as mensagens apagadas, ou None se não houver nenhuma."""
+        if not entries:
+            return None
+        return discord.File(io.BytesIO(format_transcript(entries).encode()), filename=filename)
+
+    # ----- Logs de mensagens apagadas e editadas (lidas do MessageRingCache) -----
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild is None or message.author.bot:
+            return
+        self.message_cache.add(message)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        entry = self.message_cache.remove(payload.channel_id, payload.message_id)
+        if payload.message_id in self.purged_ids:
+            self.purged_ids.discard(payload.message_id)
+            return
+        if entry is None or payload.guild_id is None:
+            return  # Mensagem fora do cache (antiga, de bot ou anterior ao início do bot)
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
+        await self.log_action(
+            guild,
+            f"🗑️ **Mensagem Apagada**\n"
+            f"Autor: {entry.author_name} ({entry.author_id})\n"
+            f"Canal: <#{payload.channel_id}>\n"
+            f"Conteúdo: {entry.content[:1500] or '(sem texto)'}\n"
+            + (f"Anexos: {', '.join(entry.attachments)}\n" if entry.attachments else "")
+            + f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            user=entry.author_id, action="message_delete"
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        entries = []
+        for message_id in payload.message_ids:
+            entry = self.message_cache.remove(payload.channel_id, message_id)
+            if message_id in self.purged_ids:
+                self.purged_ids.discard(message_id)
+            elif entry is not None:
+                entries.append(entry)
+        if not entries or payload.guild_id is None:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
+        await self.log_action(
+            guild,
+            f"🗑️ **Mensagens Apagadas em Massa**\n"
+            f"Canal: <#{payload.channel_id}>\n"
+            f"Quantidade: {len(payload.message_ids)} (conteúdo disponível: {len(entries)})\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            file=self.transcript_file(entries, f"mensagens-apagadas-{payload.channel_id}.txt"),
+            action="bulk_delete", amount=len(payload.message_ids)
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        content = payload.data.get("content")
+        if content is None:
+            return  # Edição sem texto novo (ex.: embeds carregados)
+        entry = self.message_cache.get(payload.channel_id, payload.message_id)
+        previous = self.message_cache.update_content(payload.channel_id, payload.message_id, content)
+        if previous is None or previous == content or payload.guild_id is None:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
+        await self.log_action(
+            guild,
+            f"✏️ **Mensagem Editada**\n"
+            f"Autor: {entry.author_name} ({entry.author_id})\n"
+            f"Canal: <#{payload.channel_id}>\n"
+            f"Antes: {previous[:900] or '(sem texto)'}\n"
+            f"Depois: {content[:900] or '(sem texto)'}\n"
+            f"Data: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+            user=entry.author_id, action="message_edit"
+        )
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.message_cache.forget_channel(channel.id)
+
+    async def log_action(self, guild, message, level=logging.INFO, file=None, **fields):
         """Registra uma ação de moderação no canal de logs e no arquivo."""
         try:
-            log_channel = guild.get_channel(int(self.mod_log_channel_id))
+            log_channel_id = self.bot.guild_settings.get(guild.id, "mod_log_channel_id")
+            log_channel = guild.get_channel(log_channel_id) if log_channel_id else None
             if log_channel:
-                await log_channel.send(message)
-            logging.info(message.replace('\n', ' | '))
-            print(f"[INFO] {message.replace('\n', ' | ')}")
+                # O conteúdo dos usuários não pode mencionar ninguém pelo canal de logs
+                await log_channel.send(message, file=file, allowed_mentions=discord.AllowedMentions.none())
+            # Campos estruturados (user, action, amount) aparecem no log em JSON
+            logging.log(level, message.replace('\n', ' | '), extra={"guild": guild.id, **fields})
         except Exception as e:
             logging.error(f"Erro ao registrar log: {str(e)}")
-            print(f"[ERROR] Erro ao registrar log: {str(e)}")
 
 # Função setup para registrar o cog
 async def setup(bot):
     cog = ModerationCog(bot)
-    bot.moderation_cog = cog  # Armazena a instância do cog no bot para acesso ao moderator_role_id
+    bot.moderation_cog = cog
     await bot.add_cog(cog)
\ No newline at end of file
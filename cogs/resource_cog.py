@@ -0,0 +1,93 @@
+from discord.ext import commands
+import logging
+import json
+from utils.resource_index import ResourceIndex
+
+class ResourceCog(commands.Cog):
+    """Mantém o índice de cargos e canais por nome usado pelos outros cogs."""
+
+    # Recursos usados pelos cogs de moderação e economia
+    required_roles = ("Muted", "VIP")  # Criados automaticamente no primeiro uso, se faltarem
+    required_channels = ("geral",)
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.index = ResourceIndex()
+
+        # Carrega as configurações do config.json
+        try:
+            with open('config.json', 'r') as config_file:
+                config = json.load(config_file)
+            self.private_voice_category_id = int(config.get('private_voice_category_id', 627874145085947957))
+        except Exception as e:
+            logging.error(f"Erro ao carregar config.json: {str(e)}")
+            raise
+
+    async def cog_load(self):
+        # Os cogs são carregados no on_ready, então os servidores já estão disponíveis
+        if self.bot.is_ready():
+            for guild in self.bot.guilds:
+                self.index_and_report(guild)
+
+    def index_and_report(self, guild):
+        """Indexa o servidor e avisa no log sobre recursos que estão faltando."""
+        self.index.index_guild(guild)
+        missing = self.index.missing_resources(
+            guild,
+            role_names=self.required_roles,
+            channel_names=self.required_channels,
+            category_ids=(self.private_voice_category_id,)
+        )
+        if missing:
+            logging.warning(f"Recursos ausentes no servidor {guild.name} ({guild.id}): {', '.join(missing)}")
+        else:
+            logging.info(f"Recursos do servidor {guild.name} indexados")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Reconexões podem trazer alterações feitas enquanto o bot estava offline
+        for guild in self.bot.guilds:
+            self.index.index_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.index_and_report(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.index.remove_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.index.add_role(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.index.remove_role(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            self.index.remove_role(after, name=before.name)
+            self.index.add_role(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.index.add_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.index.remove_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.name != after.name:
+            self.index.remove_channel(after, name=before.name)
+            self.index.add_channel(after)
+
+# Função setup para registrar o cog
+async def setup(bot):
+    cog = ResourceCog(bot)
+    bot.resource_index = cog.index  # Usado pelos outros cogs para buscar cargos e canais pelo nome
+    bot.resource_cog = cog
+    await bot.add_cog(cog)
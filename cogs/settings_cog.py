@@ -0,0 +1,139 @@
+import discord
+from discord.ext import commands
+import logging
+import json
+from utils.guild_settings import SETTINGS, GuildSettingsStore
+
+# Nomes das configurações mostrados no !config
+SETTING_LABELS = {
+    "welcome_channel_id": "Canal de boas-vindas",
+    "live_channel_id": "Canal de notificações de live",
+    "moderator_role_id": "Cargo de moderador",
+    "mod_log_channel_id": "Canal de logs de moderação",
+}
+
+# Chaves antigas do config.json, usadas uma única vez para migrar para o servidor a que pertencem
+LEGACY_KEYS = {
+    "welcome_channel_id": "welcome_channel_id",
+    "live_channel_id": "live_notification_channel_id",
+    "moderator_role_id": "moderator_role_id",
+    "mod_log_channel_id": "mod_log_channel_id",
+}
+
+class SettingsCog(commands.Cog):
+    """Configurações por servidor (canais e cargos usados pelos outros cogs)."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+        # Carrega as configurações do config.json
+        try:
+            with open('config.json', 'r') as config_file:
+                config = json.load(config_file)
+            self.settings_db_path = config.get('guild_settings_db_path', 'guild_settings.db')
+            self.legacy_values = {key: config.get(legacy_key) for key, legacy_key in LEGACY_KEYS.items()}
+        except Exception as e:
+            logging.error(f"Erro ao carregar config.json: {str(e)}")
+            raise
+
+        self.settings = GuildSettingsStore(self.settings_db_path)
+
+    async def cog_load(self):
+        # Os cogs são carregados no on_ready, então os servidores já estão disponíveis
+        if self.bot.is_ready():
+            self.settings.load_guilds(guild.id for guild in self.bot.guilds)
+            for guild in self.bot.guilds:
+                self.migrate_legacy(guild)
+
+    def cog_unload(self):
+        self.settings.close()
+
+    async def cog_check(self, ctx):
+        # As configurações são por servidor, então os comandos não funcionam em DM
+        return ctx.guild is not None
+
+    def migrate_legacy(self, guild):
+        """Copia os IDs globais do config.json para o servidor a que eles pertencem, se ele ainda não os tiver."""
+        for key, kind in SETTINGS.items():
+            value = self.legacy_values.get(key)
+            if not isinstance(value, int) or self.settings.get(guild.id, key) is not None:
+                continue
+            resource = guild.get_role(value) if kind == "role" else guild.get_channel(value)
+            if resource is not None:
+                self.settings.set(guild.id, key, value)
+                logging.info(f"{key} do config.json migrado para o servidor {guild.name} ({guild.id})")
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.settings.load_guilds((guild.id,))
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.settings.forget(guild.id)
+
+    def is_admin():
+        async def predicate(ctx):
+            if not ctx.author.guild_permissions.manage_guild:
+                await ctx.send("Você não tem permissão para usar este comando. Apenas administradores do servidor podem usá-lo.")
+                return False
+            return True
+        return commands.check(predicate)
+
+    @commands.hybrid_group(name="config", invoke_without_command=True, fallback="mostrar")
+    @is_admin()
+    async def config(self, ctx):
+        """Mostra as configurações do servidor."""
+        embed = discord.Embed(title=f"⚙️ Configurações de {ctx.guild.name}", color=discord.Color.blue())
+        for key, value in self.settings.get_all(ctx.guild.id).items():
+            if value is None:
+                text = "Não configurado"
+            elif SETTINGS[key] == "role":
+                text = f"<@&{value}>"
+            else:
+                text = f"<#{value}>"
+            embed.add_field(name=SETTING_LABELS[key], value=text, inline=False)
+        embed.set_footer(text="Use !config boas_vindas|live|logs_moderacao #canal ou !config moderador @cargo (sem argumento remove)")
+        await ctx.send(embed=embed)
+
+    async def update_setting(self, ctx, key, resource):
+        self.settings.set(ctx.guild.id, key, resource.id if resource else None)
+        label = SETTING_LABELS[key]
+        if resource:
+            await ctx.send(f"✅ {label} definido como {resource.mention}.")
+        else:
+            await ctx.send(f"✅ {label} removido.")
+        logging.info(
+            f"Configuração {key} do servidor {ctx.guild.id} alterada para {resource.id if resource else None} por {ctx.author} ({ctx.author.id})",
+            extra={"guild": ctx.guild.id, "user": ctx.author.id, "action": f"settings:{key}"}
+        )
+
+    @config.command(name="boas_vindas")
+    @is_admin()
+    async def config_boas_vindas(self, ctx, canal: discord.TextChannel = None):
+        """Define o canal das mensagens de boas-vindas."""
+        await self.update_setting(ctx, "welcome_channel_id", canal)
+
+    @config.command(name="live")
+    @is_admin()
+    async def config_live(self, ctx, canal: discord.TextChannel = None):
+        """Define o canal das notificações de live da Twitch."""
+        await self.update_setting(ctx, "live_channel_id", canal)
+
+    @config.command(name="moderador")
+    @is_admin()
+    async def config_moderador(self, ctx, cargo: discord.Role = None):
+        """Define o cargo que pode usar os comandos de moderação."""
+        await self.update_setting(ctx, "moderator_role_id", cargo)
+
+    @config.command(name="logs_moderacao")
+    @is_admin()
+    async def config_logs_moderacao(self, ctx, canal: discord.TextChannel = None):
+        """Define o canal dos logs de moderação."""
+        await self.update_setting(ctx, "mod_log_channel_id", canal)
+
+# Função setup para registrar o cog
+async def setup(bot):
+    cog = SettingsCog(bot)
+    bot.guild_settings = cog.settings  # Usado pelos outros cogs para ler as configurações do servidor
+    bot.settings_cog = cog
+    await bot.add_cog(cog)
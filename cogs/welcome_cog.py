@@ -1,58 +1,61 @@
 import discord
 from discord.ext import commands
 import logging
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+import asyncio
 import io
-import json
+from utils.avatar_cache import acquire_avatar_cache, get_avatar_cache, release_avatar_cache
+from utils.image_assets import FONT_PATH, TEMPLATE_PATH, acquire_render_pool, fit_font, get_render_pool, load_template, release_render_pool
 
 class WelcomeCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Carrega o ID do canal do config.json
-        try:
-            with open('config.json', 'r') as config_file:
-                config = json.load(config_file)
-            self.channel_id = config['welcome_channel_id']
-        except Exception as e:
-            logging.error(f"Erro ao carregar config.json: {str(e)}")
-            print(f"[ERROR] Erro ao carregar config.json: {str(e)}")
-            raise
-
-        self.template_path = "template.png"  # Caminho do template do banner
-        self.font_path = "ArchivoBlack-Regular.ttf"  # Nova fonte personalizada
+        # O canal de boas-vindas é configurado por servidor (!config boas_vindas)
+        self.template_path = TEMPLATE_PATH  # Caminho do template do banner
+        self.font_path = FONT_PATH  # Nova fonte personalizada
         self.font_size = 40  # Tamanho inicial da fonte
         self.min_font_size = 20  # Tamanho mínimo da fonte
         self.text_position = (50, 50)  # Posição do texto no banner (x, y)
         self.text_color = "white"  # Cor do texto
+        self.avatar_size = 150  # Diâmetro do avatar no banner
+        self.avatar_timeout = 2.0  # Segundos máximos esperando o avatar antes de usar o banner só com nome
+
+    async def cog_load(self):
+        # O cache de avatares e o pool de renderização são compartilhados com o EconomyCog
+        acquire_avatar_cache()
+        acquire_render_pool()
+
+    async def cog_unload(self):
+        await release_avatar_cache()
+        release_render_pool()
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
         # Log temporário para confirmar que o evento foi disparado
         logging.info(f"Evento on_member_join disparado para {member.name}#{member.discriminator}")
-        print(f"[DEBUG] Evento on_member_join disparado para {member.name}#{member.discriminator}")
 
         # Etapa 1: Detectar novo membro
         logging.info(f"Novo membro detectado: {member.name}#{member.discriminator}")
-        print(f"[INFO] Etapa 1: Novo membro detectado: {member.name}#{member.discriminator}")
 
-        # Etapa 2: Verificar se o canal existe
-        channel = self.bot.get_channel(self.channel_id)
+        # Etapa 2: Verificar se o servidor tem um canal de boas-vindas configurado e se ele existe
+        channel_id = self.bot.guild_settings.get(member.guild.id, "welcome_channel_id")
+        if channel_id is None:
+            logging.info(f"Servidor {member.guild.name} ({member.guild.id}) sem canal de boas-vindas configurado")
+            return
+        channel = member.guild.get_channel(channel_id)
         if not channel:
-            logging.error(f"Canal com ID {self.channel_id} não encontrado")
-            print(f"[ERROR] Etapa 2: Canal com ID {self.channel_id} não encontrado")
+            logging.error(f"Canal com ID {channel_id} não encontrado")
             return
 
         logging.info(f"Canal encontrado: {channel.name}")
-        print(f"[INFO] Etapa 2: Canal encontrado: {channel.name}")
 
-        # Etapa 3: Gerar o banner
+        # Etapa 3: Gerar o banner (com o avatar, se ele chegar a tempo) fora do event loop
+        avatar = await self.fetch_avatar(member)
         try:
-            banner_file = self.generate_banner(member.name)
+            banner_file = await get_render_pool().run(self.generate_banner, member.name, avatar)
             logging.info(f"Banner gerado para {member.name}")
-            print(f"[INFO] Etapa 3: Banner gerado para {member.name}")
         except Exception as e:
             logging.error(f"Erro ao gerar banner: {str(e)}")
-            print(f"[ERROR] Etapa 3: Erro ao gerar banner: {str(e)}")
             return
 
         # Etapa 4: Enviar a mensagem de boas-vindas com o banner
@@ -64,36 +67,28 @@ class WelcomeCog(commands.Cog):
                 file=file
             )
             logging.info(f"Mensagem de boas-vindas enviada para {member.name}")
-            print(f"[INFO] Etapa 4: Mensagem de boas-vindas enviada para {member.name}")
         except Exception as e:
             logging.error(f"Erro ao enviar mensagem: {str(e)}")
-            print(f"[ERROR] Etapa 4: Erro ao enviar mensagem: {str(e)}")
             return
         finally:
             banner_file.close()  # Fecha o buffer
 
-    def generate_banner(self, member_name):
-        # Carrega o template do banner
-        banner = Image.open(self.template_path).convert("RGBA")
-        draw = ImageDraw.Draw(banner)
-
-        # Carrega a fonte (use uma fonte padrão ou especifique o caminho de uma fonte baixada)
-        font_size = self.font_size
+    async def fetch_avatar(self, member):
+        """Obtém o avatar do membro pelo cache. Retorna None se demorar mais que avatar_timeout."""
         try:
-            font = ImageFont.truetype(self.font_path, font_size)
-        except Exception:
-            font = ImageFont.load_default()
-            logging.warning("Fonte padrão usada, pois a fonte especificada não foi encontrada")
-            print("[WARNING] Fonte padrão usada")
+            return await asyncio.wait_for(get_avatar_cache().get_for(member), timeout=self.avatar_timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Avatar de {member.name} demorou demais; usando banner sem avatar")
+            return None
+
+    def generate_banner(self, member_name, avatar=None):
+        # Carrega o template do banner (decodificado uma única vez)
+        banner = load_template(self.template_path).copy()
+        draw = ImageDraw.Draw(banner)
 
         # Ajusta o tamanho da fonte para nomes longos
         text = f"Bem-vindo, {member_name}!"
-        while font_size > self.min_font_size:
-            font = ImageFont.truetype(self.font_path, font_size)
-            text_width = draw.textlength(text, font=font)
-            if text_width <= banner.width - 100:  # Ajusta para caber no banner
-                break
-            font_size -= 2
+        font = fit_font(draw, text, banner.width - 100, self.font_size, self.min_font_size)
 
         # Corta o nome se ainda for muito longo
         if draw.textlength(text, font=font) > banner.width - 100:
@@ -102,6 +97,16 @@ class WelcomeCog(commands.Cog):
         # Desenha o texto no banner
         draw.text(self.text_position, text, fill=self.text_color, font=font)
 
+        # Avatar circular com borda, centralizado abaixo do texto
+        if avatar is not None:
+            size = self.avatar_size
+            x = (banner.width - size) // 2
+            y = self.text_position[1] + font.size + 25
+            mask = Image.new("L", (size, size), 0)
+            ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+            draw.ellipse((x - 4, y - 4, x + size + 4, y + size + 4), fill=self.text_color)
+            banner.paste(avatar.resize((size, size), Image.LANCZOS), (x, y), mask)
+
         # Salva o banner em memória (em vez de um arquivo temporário)
         buffer = io.BytesIO()
         banner.save(buffer, format="PNG")
@@ -0,0 +1,306 @@
+"""Ferramenta de linha de comando para a economia, usada com o bot desligado.
+
+Exemplos:
+    python economy_cli.py export --guild 123 --format csv --out saldo.csv
+    python economy_cli.py import --guild 123 --format jsonl --input backup.jsonl
+    python economy_cli.py adjust --guild 123 --input pagamento.csv --mode add --dry-run
+    python economy_cli.py adjust --guild 123 --set-all 0
+
+Os arquivos são lidos e escritos em fluxo, um usuário por vez, então o consumo de memória não
+depende da quantidade de usuários.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+CSV_FIELDS = ["user_id", "name", "coins", "achievements"]
+
+
+def iter_economy(path):
+    """Percorre um arquivo de economia ({user_id: dados, ...}) sem carregá-lo inteiro."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r') as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        def expect(char):
+            nonlocal pos
+            skip_whitespace()
+            if pos >= len(buffer) or buffer[pos] != char:
+                raise ValueError(f"Esperado '{char}' em {path}")
+            pos += 1
+
+        def decode():
+            nonlocal pos
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # Um número no fim do buffer pode estar incompleto
+                    if end == len(buffer) and not eof:
+                        raise ValueError
+                    pos = end
+                    return value
+                except ValueError:
+                    if eof:
+                        raise ValueError(f"JSON inválido em {path}")
+                    fill()
+
+        fill()
+        skip_whitespace()
+        if pos >= len(buffer):
+            return  # Arquivo vazio
+        expect("{")
+        skip_whitespace()
+        if buffer[pos:pos + 1] == "}":
+            return
+        while True:
+            user_id = decode()
+            expect(":")
+            yield user_id, decode()
+            skip_whitespace()
+            if buffer[pos:pos + 1] == ",":
+                pos += 1
+                continue
+            expect("}")
+            return
+
+
+class EconomyWriter:
+    """Escreve um arquivo de economia em fluxo e o troca pelo original só no final (atomicamente)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.file = open(self.tmp_path, 'w')
+        self.file.write("{")
+        self.count = 0
+
+    def write(self, user_id, data):
+        self.file.write(",\n" if self.count else "\n")
+        self.file.write(f"    {json.dumps(user_id)}: {json.dumps(data)}")
+        self.count += 1
+
+    def commit(self):
+        self.file.write("\n}\n")
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+
+def row_to_entry(row):
+    """Converte uma linha de CSV/JSONL em (user_id, dados)."""
+    data = {"coins": int(row["coins"]), "name": row.get("name") or ""}
+    achievements = row.get("achievements")
+    if isinstance(achievements, str):
+        achievements = json.loads(achievements) if achievements else None
+    if achievements:
+        data["achievements"] = achievements
+    return str(row["user_id"]), data
+
+
+def iter_rows(handle, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(handle)
+    else:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def open_output(path):
+    return sys.stdout if path == "-" else open(path, 'w', newline='')
+
+
+def open_input(path):
+    return sys.stdin if path == "-" else open(path, 'r', newline='')
+
+
+def cmd_export(args):
+    out = open_output(args.out)
+    try:
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS) if args.format == "csv" else None
+        if writer:
+            writer.writeheader()
+        count = 0
+        for user_id, data in iter_economy(args.path):
+            row = {"user_id": user_id, "name": data.get("name", ""), "coins": data.get("coins", 0), "achievements": data.get("achievements", {})}
+            if writer:
+                row["achievements"] = json.dumps(row["achievements"])
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row) + "\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"[INFO] {count} usuários exportados", file=sys.stderr)
+
+
+def cmd_import(args):
+    writer = EconomyWriter(args.path)
+    source = open_input(args.input)
+    try:
+        for row in iter_rows(source, args.format):
+            writer.write(*row_to_entry(row))
+    except Exception:
+        writer.abort()
+        raise
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    writer.commit()
+    print(f"[INFO] {writer.count} usuários importados para {args.path}", file=sys.stderr)
+
+
+def load_adjustments(path, fmt):
+    """Guarda os ajustes em um SQLite temporário em disco para consultá-los sem ocupar memória."""
+    tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    tmp.close()
+    db = sqlite3.connect(tmp.name)
+    db.execute("CREATE TABLE adjustments (user_id TEXT PRIMARY KEY, amount INTEGER NOT NULL)")
+    source = open_input(path)
+    try:
+        batch = []
+        for row in iter_rows(source, fmt):
+            batch.append((str(row["user_id"]), int(row["amount"])))
+            if len(batch) >= 10000:
+                db.executemany("INSERT OR REPLACE INTO adjustments VALUES (?, ?)", batch)
+                batch.clear()
+        db.executemany("INSERT OR REPLACE INTO adjustments VALUES (?, ?)", batch)
+        db.commit()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return db, tmp.name
+
+
+def cmd_adjust(args):
+    if args.input is None and args.set_all is None:
+        raise SystemExit("Informe --input com os ajustes e/ou --set-all.")
+
+    db, db_path = load_adjustments(args.input, args.format) if args.input else (None, None)
+    writer = None if args.dry_run else EconomyWriter(args.path)
+    summary = {"users": 0, "changed": 0, "matched": 0, "clamped": 0, "total_before": 0, "total_after": 0}
+    samples = []
+    try:
+        for user_id, data in iter_economy(args.path):
+            before = data.get("coins", 0)
+            after = before if args.set_all is None else args.set_all  # Reset de temporada
+            if db is not None:
+                row = db.execute("SELECT amount FROM adjustments WHERE user_id = ?", (user_id,)).fetchone()
+                if row is not None:
+                    summary["matched"] += 1
+                    after = after + row[0] if args.mode == "add" else row[0]
+            if after < 0:
+                after = 0
+                summary["clamped"] += 1
+
+            summary["users"] += 1
+            summary["total_before"] += before
+            summary["total_after"] += after
+            if after != before:
+                summary["changed"] += 1
+                if len(samples) < args.samples:
+                    samples.append(f"  {user_id} ({data.get('name', '')}): {before} -> {after}")
+            data["coins"] = after
+            if writer:
+                writer.write(user_id, data)
+    except Exception:
+        if writer:
+            writer.abort()
+        raise
+    finally:
+        if db is not None:
+            unmatched = db.execute("SELECT COUNT(*) FROM adjustments").fetchone()[0] - summary["matched"]
+            db.close()
+            os.remove(db_path)
+
+    if writer:
+        writer.commit()
+
+    print("Modo de simulação: nada foi gravado." if args.dry_run else f"Ajustes gravados em {args.path}.")
+    print(f"Usuários: {summary['users']}, alterados: {summary['changed']}, saldo limitado a 0: {summary['clamped']}")
+    if db is not None:
+        print(f"Ajustes aplicados: {summary['matched']}, ajustes sem usuário correspondente: {unmatched}")
+    print(f"Total de Rupias: {summary['total_before']} -> {summary['total_after']} ({summary['total_after'] - summary['total_before']:+d})")
+    if samples:
+        print("Exemplos:")
+        print("\n".join(samples))
+
+
+def resolve_path(args):
+    """Resolve o arquivo de economia a partir de --guild (pasta economy_dir do config.json) ou --file."""
+    if args.file:
+        return args.file
+    economy_dir = "economy"
+    try:
+        with open('config.json', 'r') as config_file:
+            economy_dir = json.load(config_file).get('economy_dir', economy_dir)
+    except Exception:
+        pass  # O config.json de exemplo não é JSON válido; usa a pasta padrão
+    return os.path.join(economy_dir, f"{args.guild}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta, importa e ajusta a economia com o bot desligado.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_target(sub):
+        target = sub.add_mutually_exclusive_group(required=True)
+        target.add_argument("--guild", help="ID do servidor (usa economy/<id>.json)")
+        target.add_argument("--file", help="Caminho de um arquivo de economia")
+        sub.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+
+    export = subparsers.add_parser("export", help="Exporta a economia para JSONL ou CSV")
+    add_target(export)
+    export.add_argument("--out", default="-", help="Arquivo de saída ('-' para a saída padrão)")
+    export.set_defaults(func=cmd_export)
+
+    importer = subparsers.add_parser("import", help="Substitui a economia pelo conteúdo de um JSONL ou CSV")
+    add_target(importer)
+    importer.add_argument("--input", default="-", help="Arquivo de entrada ('-' para a entrada padrão)")
+    importer.set_defaults(func=cmd_import)
+
+    adjust = subparsers.add_parser("adjust", help="Aplica ajustes de saldo em massa a partir de um arquivo")
+    add_target(adjust)
+    adjust.add_argument("--input", help="Arquivo com colunas user_id e amount")
+    adjust.add_argument("--mode", choices=["add", "set"], default="add", help="Soma amount ao saldo ou define o saldo")
+    adjust.add_argument("--set-all", type=int, help="Define o saldo de todos antes dos ajustes (ex.: reset de temporada)")
+    adjust.add_argument("--dry-run", action="store_true", help="Mostra o resumo sem gravar nada")
+    adjust.add_argument("--samples", type=int, default=10, help="Quantidade de exemplos no resumo")
+    adjust.set_defaults(func=cmd_adjust)
+
+    args = parser.parse_args()
+    args.path = resolve_path(args)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,17 @@ from discord.ext import commands
 import logging
 import json
 import asyncio
-
-# Configuração do logging para console e arquivo
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('welcome_bot.log'),  # Logs em arquivo
-        logging.StreamHandler()  # Logs no console
-    ]
-)
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import requests
+from utils.avatar_cache import configure_avatar_cache
+from utils.log_setup import setup_logging
+from utils.memory_report import format_memory_report, memory_report
+from utils.shared_state import SharedState
 
 # Carrega as configurações do config.json
 try:
@@ -20,49 +21,213 @@ try:
         config = json.load(config_file)
     TOKEN = config['token']
 except Exception as e:
+    setup_logging({})
     logging.error(f"Erro ao carregar config.json: {str(e)}")
-    print(f"[ERROR] Erro ao carregar config.json: {str(e)}")
     exit(1)
 
-# Configuração do bot com intents
-intents = discord.Intents.default()
-intents.members = True  # Para detectar novos membros
-intents.message_content = True  # Para comandos baseados em prefixo
-bot = commands.Bot(
-    command_prefix='!',
-    intents=intents,
-    max_messages=None  # Evita problemas com cache de mensagens
-)
-
-# Evento para indicar que o bot está online e carregar os cogs
-@bot.event
-async def on_ready():
-    logging.info(f"Bot conectado como {bot.user.name} (ID: {bot.user.id})")
-    print(f"[INFO] Bot conectado como {bot.user.name} (ID: {bot.user.id})")
-    
-    # Lista de cogs para carregar
-    cogs = ["cogs.welcome_cog", "cogs.live_notification_cog", "cogs.moderation_cog", "cogs.economy_cog"]
-    
-    # Carrega os cogs de forma assíncrona
-    for cog in cogs:
-        try:
-            await bot.load_extension(cog)
-            logging.info(f"Cog {cog} carregado com sucesso")
-            print(f"[INFO] Cog {cog} carregado com sucesso")
-        except Exception as e:
-            logging.error(f"Erro ao carregar o cog {cog}: {str(e)}")
-            print(f"[ERROR] Erro ao carregar o cog {cog}: {str(e)}")
-            return
+# Modo de execução: "single" (uma conexão), "auto" (AutoShardedBot em um processo)
+# ou "multiprocess" (supervisor que divide os shards entre vários processos)
+SHARD_MODE = config.get('shard_mode', 'single')
+SHARD_COUNT = config.get('shard_count')  # None usa a quantidade recomendada pelo Discord
+SHARD_PROCESSES = config.get('shard_processes', 2)
+SHARD_STABLE_SECONDS = config.get('shard_stable_seconds', 600)  # Tempo no ar que zera a espera de reinício
+SHARED_STATE_PATH = config.get('shared_state_path', 'shared_state.db')
+COMMAND_TREE_HASH_PATH = config.get('command_tree_hash_path', 'command_tree.hash')
+# "low" guarda em cache só membros em canais de voz ou que entraram com o bot online (hosts de 512 MB)
+MEMORY_PROFILE = config.get('memory_profile', 'default')
+# Avatares decodificados mantidos em memória (~256 KB cada, 256x256 RGBA); o perfil "low" guarda menos
+AVATAR_MEMORY_SIZE = config.get('avatar_cache', {}).get('memory_size', 32 if MEMORY_PROFILE == 'low' else 256)
+configure_avatar_cache(memory_size=AVATAR_MEMORY_SIZE)
+
+# Lista de cogs para carregar
+COGS = ["cogs.resource_cog", "cogs.settings_cog", "cogs.admin_cog", "cogs.welcome_cog", "cogs.live_notification_cog", "cogs.moderation_cog", "cogs.economy_cog"]
+
+def create_bot(shard_ids=None, shard_count=None):
+    """Cria o bot com intents. Usa AutoShardedBot quando há shards configurados."""
+    intents = discord.Intents.default()
+    intents.members = True  # Para detectar novos membros
+    intents.message_content = True  # Para comandos baseados em prefixo
+    options = dict(
+        command_prefix='!',
+        intents=intents,
+        max_messages=None  # Cache do discord.py desativado; os logs de mensagens usam o MessageRingCache do ModerationCog
+    )
+    if MEMORY_PROFILE == 'low':
+        member_cache_flags = discord.MemberCacheFlags.none()
+        member_cache_flags.voice = True  # Usados pelas recompensas e itens de voz
+        member_cache_flags.joined = True  # Novos membros (boas-vindas, !massban entrou:)
+        options.update(member_cache_flags=member_cache_flags, chunk_guilds_at_startup=False)
+    if SHARD_MODE == 'single' and shard_ids is None:
+        bot = commands.Bot(**options)
+    else:
+        bot = commands.AutoShardedBot(shard_ids=shard_ids, shard_count=shard_count, **options)
+
+    # Estado compartilhado entre os processos; process_id identifica este processo nele
+    bot.shared_state = SharedState(SHARED_STATE_PATH)
+    bot.process_id = f"{os.getpid()}:{','.join(map(str, shard_ids)) if shard_ids else 'all'}"
+    # Estado em memória que um cog entrega à sua nova instância no !recarregar (nome do cog -> estado);
+    # a lista "closers" de cada estado fecha seus recursos se nenhuma instância o receber
+    bot.state_handoff = {}
+
+    # Evento para indicar que o bot está online e carregar os cogs
+    @bot.event
+    async def on_ready():
+        logging.info(f"Bot conectado como {bot.user.name} (ID: {bot.user.id}, shards: {bot.shard_ids or 'único'})")
+
+        # Carrega os cogs de forma assíncrona
+        for cog in COGS:
+            if cog in bot.extensions:
+                continue  # Reconexões disparam on_ready de novo
+            try:
+                await bot.load_extension(cog)
+                logging.info(f"Cog {cog} carregado com sucesso")
+            except Exception as e:
+                logging.error(f"Erro ao carregar o cog {cog}: {str(e)}")
+                return
+
+        logging.info(f"Memória após iniciar ({MEMORY_PROFILE}): {format_memory_report(memory_report(bot))}")
+
+        # Os comandos de barra são globais: só o processo com o shard 0 sincroniza
+        if bot.shard_ids is None or 0 in bot.shard_ids:
+            await sync_command_tree(bot)
+
+    return bot
+
+async def sync_command_tree(bot):
+    """Sincroniza os comandos de barra apenas quando suas definições mudaram desde a última sincronização."""
+    definitions = sorted((command.to_dict(bot.tree) for command in bot.tree.get_commands()), key=lambda c: c['name'])
+    digest = hashlib.sha256(json.dumps(definitions, sort_keys=True).encode()).hexdigest()
+    try:
+        with open(COMMAND_TREE_HASH_PATH, 'r') as f:
+            if f.read().strip() == digest:
+                return  # Nada mudou; evita a chamada à API a cada início
+    except FileNotFoundError:
+        pass
+
+    try:
+        synced = await bot.tree.sync()
+        with open(COMMAND_TREE_HASH_PATH, 'w') as f:
+            f.write(digest)
+        logging.info(f"{len(synced)} comandos de barra sincronizados")
+    except Exception as e:
+        logging.error(f"Erro ao sincronizar os comandos de barra: {str(e)}")
 
 # Adiciona um pequeno atraso para evitar atingir limites de taxa ao iniciar
-async def start_bot():
+async def start_bot(shard_ids=None, shard_count=None):
+    if SHARD_MODE == 'auto' and shard_count is None:
+        shard_count = SHARD_COUNT
+    bot = create_bot(shard_ids, shard_count)
     try:
         await asyncio.sleep(2)  # Atraso de 2 segundos para evitar limites de taxa
         await bot.start(TOKEN, reconnect=True)
     except Exception as e:
         logging.error(f"Erro ao iniciar o bot: {str(e)}")
-        print(f"[ERROR] Erro ao iniciar o bot: {str(e)}")
+    finally:
+        # Descarrega os cogs (salvando o que estiver pendente e fechando sessões HTTP e threads)
+        if not bot.is_closed():
+            await bot.close()
+        close_handoff(bot)
+
+def close_handoff(bot):
+    """Fecha os recursos entregues pelos cogs ao descarregar que nenhuma nova instância recebeu (encerramento)."""
+    for name, state in bot.state_handoff.items():
+        for close in state.get("closers", ()):
+            try:
+                close()
+            except Exception as e:
+                logging.error(f"Erro ao fechar o estado do cog {name}: {str(e)}")
+    bot.state_handoff.clear()
+
+def recommended_shard_count():
+    """Consulta no Discord a quantidade recomendada de shards para o bot."""
+    response = requests.get(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {TOKEN}"},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()['shards']
+
+def split_shards(shard_count, processes):
+    """Divide os shards 0..shard_count-1 em faixas contíguas, uma por processo."""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges = []
+    start = 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+def run_supervisor():
+    """Inicia um processo por faixa de shards e reinicia os que terminarem inesperadamente."""
+    shard_count = SHARD_COUNT or recommended_shard_count()
+    ranges = split_shards(shard_count, SHARD_PROCESSES)
+    logging.info(f"Supervisor iniciando {len(ranges)} processos para {shard_count} shards")
+
+    def spawn(shard_ids):
+        return subprocess.Popen([
+            sys.executable, os.path.abspath(__file__),
+            "--shards", f"{shard_ids[0]}-{shard_ids[-1]}",
+            "--shard-count", str(shard_count)
+        ])
+
+    workers = {}
+    restarts = {}
+    started_at = {}  # Quando cada processo foi iniciado
+    restart_at = {}  # Processos aguardando o momento de reiniciar
+    try:
+        for i, shard_ids in enumerate(ranges):
+            # Cada IDENTIFY respeita o limite de 1 a cada 5 segundos, então os processos entram escalonados
+            if i:
+                time.sleep(5 * len(ranges[i - 1]))
+            workers[i] = spawn(shard_ids)
+            started_at[i] = time.monotonic()
+
+        while True:
+            time.sleep(5)
+            now = time.monotonic()
+            for i, process in list(workers.items()):
+                if i in restart_at:
+                    if now >= restart_at[i]:
+                        del restart_at[i]
+                        workers[i] = spawn(ranges[i])
+                        started_at[i] = now
+                    continue
+                code = process.poll()
+                if code is None:
+                    continue
+                # Uma queda depois de um período estável recomeça a contagem da espera
+                if now - started_at[i] >= SHARD_STABLE_SECONDS:
+                    restarts[i] = 0
+                restarts[i] = restarts.get(i, 0) + 1
+                delay = min(300, 5 * 2 ** min(restarts[i], 6))  # Espera cresce a cada reinício
+                restart_at[i] = now + delay
+                logging.error(f"Processo dos shards {ranges[i]} terminou (código {code}). Reiniciando em {delay}s")
+    except KeyboardInterrupt:
+        logging.info("Supervisor encerrando os processos dos shards")
+    finally:
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.wait()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Inicia o bot do Discord")
+    parser.add_argument("--shards", help="Faixa de shards deste processo, ex.: 0-3 (usado pelo supervisor)")
+    parser.add_argument("--shard-count", type=int, help="Quantidade total de shards")
+    return parser.parse_args()
 
 # Inicia o bot
 if __name__ == "__main__":
-    asyncio.run(start_bot())
\ No newline at end of file
+    args = parse_args()
+    # Configuração do logging para console e arquivo (um arquivo por processo de shards)
+    setup_logging(config.get('logging', {}), suffix=f"shards-{args.shards}" if args.shards else None)
+    if args.shards:
+        first, _, last = args.shards.partition("-")
+        asyncio.run(start_bot(list(range(int(first), int(last or first) + 1)), args.shard_count))
+    elif SHARD_MODE == 'multiprocess':
+        run_supervisor()
+    else:
+        asyncio.run(start_bot())
@@ -0,0 +1,175 @@
+import asyncio
+import random
+
+import pytest
+
+from utils.ledger import InsufficientFunds, Ledger
+
+GUILD_ID = 1
+START_BALANCE = 100
+
+
+class FakeShard:
+    def __init__(self, users):
+        self.users = users
+
+
+class FakeStore:
+    """Só o que o Ledger usa do EconomyStore: get(guild_id).users e save(guild_id)."""
+
+    def __init__(self, users):
+        self.shards = {GUILD_ID: FakeShard(users)}
+        self.saves = 0
+
+    def get(self, guild_id):
+        return self.shards[guild_id]
+
+    def save(self, guild_id):
+        self.saves += 1
+
+
+def make_ledger(user_count):
+    users = {str(i): {"coins": START_BALANCE, "name": f"user{i}"} for i in range(user_count)}
+    return Ledger(FakeStore(users)), users
+
+
+def total_coins(users):
+    return sum(account["coins"] for account in users.values())
+
+
+def test_overlapping_operations_conserve_coins():
+    ledger, users = make_ledger(40)
+    rng = random.Random(1234)
+    hot = [str(i) for i in range(4)]  # Contas disputadas por quase todas as operações
+    committed = 0
+
+    def pick():
+        return rng.choice(hot) if rng.random() < 0.7 else str(rng.randrange(4, 40))
+
+    async def transfer():
+        from_id, to_id = pick(), pick()
+        if from_id == to_id:
+            return
+        try:
+            await ledger.transfer(GUILD_ID, from_id, to_id, rng.randint(1, 30))
+        except InsufficientFunds:
+            pass
+
+    async def purchase():
+        nonlocal committed
+        try:
+            reservation = await ledger.reserve(GUILD_ID, pick(), rng.randint(1, 30))
+        except InsufficientFunds:
+            return
+        await asyncio.sleep(0)  # Entrega do item: outras operações intercalam aqui
+        if rng.random() < 0.5:
+            await asyncio.gather(ledger.refund(reservation), ledger.refund(reservation))
+        else:
+            await ledger.commit(reservation)
+            await ledger.refund(reservation)  # Reembolso tardio de reserva confirmada não faz nada
+            committed += reservation.amount
+
+    async def read_modify_write():
+        # Operação assíncrona: lê o saldo, espera e grava; só é correta com as travas
+        user_id = pick()
+
+        async def operation():
+            balance = users[user_id]["coins"]
+            await asyncio.sleep(0)
+            users[user_id]["coins"] = balance + 1
+            users["0"]["coins"] -= 1
+        if user_id != "0":
+            await ledger.run(GUILD_ID, (user_id, "0"), None, operation)
+
+    async def main():
+        operations = [rng.choice((transfer, purchase, read_modify_write)) for _ in range(5000)]
+        await asyncio.gather(*(operation() for operation in operations))
+
+    asyncio.run(main())
+
+    assert total_coins(users) + committed == 40 * START_BALANCE
+    # read_modify_write pode deixar a conta "0" negativa; as demais regras valem para todas
+    assert all(account["coins"] >= 0 for user_id, account in users.items() if user_id != "0")
+
+
+def test_same_user_async_operations_are_serialized():
+    ledger, users = make_ledger(1)
+
+    async def increment():
+        balance = users["0"]["coins"]
+        await asyncio.sleep(0)
+        users["0"]["coins"] = balance + 1
+
+    async def main():
+        await asyncio.gather(*(ledger.run(GUILD_ID, ("0",), None, increment) for _ in range(2000)))
+
+    asyncio.run(main())
+    assert users["0"]["coins"] == START_BALANCE + 2000
+
+
+def test_debits_never_go_negative():
+    ledger, users = make_ledger(1)
+
+    async def main():
+        return await asyncio.gather(
+            *(ledger.debit(GUILD_ID, "0", 7) for _ in range(1000)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    succeeded = [result for result in results if not isinstance(result, InsufficientFunds)]
+    assert len(succeeded) == START_BALANCE // 7
+    assert users["0"]["coins"] == START_BALANCE % 7
+
+
+def test_refund_is_idempotent():
+    ledger, users = make_ledger(1)
+
+    async def main():
+        reservation = await ledger.reserve(GUILD_ID, "0", 60)
+        await asyncio.gather(*(ledger.refund(reservation) for _ in range(50)))
+        await ledger.commit(reservation)  # Reserva reembolsada continua reembolsada
+        await ledger.refund(reservation, None)
+        return reservation
+
+    reservation = asyncio.run(main())
+    assert reservation.state == "refunded"
+    assert users["0"]["coins"] == START_BALANCE
+
+
+def test_repeated_key_returns_first_result():
+    ledger, users = make_ledger(2)
+
+    async def main():
+        first = await ledger.transfer(GUILD_ID, "0", "1", 30, key="doar:1")
+        repeated = await asyncio.gather(*(ledger.transfer(GUILD_ID, "0", "1", 30, key="doar:1") for _ in range(100)))
+        reservation = await ledger.reserve(GUILD_ID, "1", 10, key="comprar:2")
+        again = await ledger.reserve(GUILD_ID, "1", 10, key="comprar:2")
+        return first, repeated, reservation, again
+
+    first, repeated, reservation, again = asyncio.run(main())
+    assert first == (START_BALANCE - 30, START_BALANCE + 30)
+    assert all(result == first for result in repeated)
+    assert again is reservation
+    assert users["0"]["coins"] == START_BALANCE - 30
+    assert users["1"]["coins"] == START_BALANCE + 30 - 10
+
+
+def test_insufficient_funds_leaves_balance_untouched():
+    ledger, users = make_ledger(2)
+    with pytest.raises(InsufficientFunds):
+        asyncio.run(ledger.transfer(GUILD_ID, "0", "1", START_BALANCE + 1))
+    assert users["0"]["coins"] == START_BALANCE
+    assert users["1"]["coins"] == START_BALANCE
+
+
+def test_open_account_creates_once():
+    ledger, users = make_ledger(0)
+
+    async def main():
+        return await asyncio.gather(*(ledger.open_account(GUILD_ID, "7", "novo") for _ in range(20)))
+
+    accounts = asyncio.run(main())
+    assert all(account is users["7"] for account in accounts)
+    assert users["7"] == {"coins": 0, "name": "novo"}
+    assert ledger.store.saves == 1
@@ -0,0 +1 @@
+# Módulos auxiliares compartilhados pelos cogs do bot
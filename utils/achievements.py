@@ -0,0 +1,101 @@
+# Conquistas padrão, usadas quando o config.json não define "achievements"
+DEFAULT_ACHIEVEMENTS = {
+    "mensageiro": {
+        "name": "📩 Mensageiro",
+        "description": "Envie 100 mensagens",
+        "metric": "messages",
+        "target": 100,
+        "reward": 200
+    },
+    "voz_ativa": {
+        "name": "🎙️ Voz Ativa",
+        "description": "Passe 10 horas em canais de voz",
+        "metric": "voice_seconds",
+        "target": 36000,
+        "reward": 300,
+        "unit": 3600,  # O progresso é mostrado em horas
+        "unit_label": "horas"
+    },
+    "comprador": {
+        "name": "🛒 Comprador",
+        "description": "Compre 5 itens na loja",
+        "metric": "purchases",
+        "target": 5,
+        "reward": 500
+    }
+}
+
+
+class AchievementEngine:
+    """Avalia conquistas definidas como dados, agrupadas pela métrica que observam.
+
+    Os eventos de progresso só somam um valor em memória (record). A avaliação acontece em lotes
+    (apply_pending), e cada métrica consulta apenas as conquistas que a observam.
+    """
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        # Tabela por métrica: metric -> [(target, achievement_id), ...] em ordem crescente de meta
+        self.by_metric = {}
+        for achievement_id, definition in definitions.items():
+            self.by_metric.setdefault(definition["metric"], []).append((definition["target"], achievement_id))
+        for watchers in self.by_metric.values():
+            watchers.sort()
+        self.pending = {}  # (guild_id, user_id) -> {metric: quantidade acumulada}
+
+    def record(self, guild_id, user_id, metric, amount=1):
+        """Acumula progresso de uma métrica para ser avaliado no próximo lote."""
+        if metric not in self.by_metric:
+            return  # Nenhuma conquista observa essa métrica
+        metrics = self.pending.setdefault((guild_id, str(user_id)), {})
+        metrics[metric] = metrics.get(metric, 0) + amount
+
+    def initialize(self, user_data):
+        """Garante que o usuário tenha uma entrada para cada conquista definida."""
+        achievements = user_data.setdefault("achievements", {})
+        for achievement_id in self.definitions:
+            achievements.setdefault(achievement_id, {"completed": False, "progress": 0})
+        return achievements
+
+    def progress(self, guild_id, user_id, user_data):
+        """Progresso de cada conquista do usuário, incluindo o que ainda não foi avaliado pelo lote.
+
+        Retorna (definição, progresso limitado à meta, concluída) na ordem das definições.
+        """
+        achievements = self.initialize(user_data)
+        pending = self.pending.get((guild_id, str(user_id)), {})
+        result = []
+        for achievement_id, definition in self.definitions.items():
+            data = achievements[achievement_id]
+            progress = data["progress"]
+            if not data["completed"]:
+                progress += pending.get(definition["metric"], 0)
+            result.append((definition, min(progress, definition["target"]), data["completed"]))
+        return result
+
+    def apply_pending(self, get_users):
+        """Aplica todo o progresso acumulado e marca as conquistas concluídas.
+
+        `get_users(guild_id)` retorna o dicionário de usuários do servidor. Retorna a lista de
+        desbloqueios (guild_id, user_id, achievement_id, reward) e os servidores alterados; as
+        recompensas não são pagas aqui, e sim pelo Ledger de quem chama.
+        """
+        pending, self.pending = self.pending, {}
+        unlocks = []
+        touched_guilds = set()
+        for (guild_id, user_id), metrics in pending.items():
+            users = get_users(guild_id)
+            if user_id not in users:
+                continue
+            achievements = self.initialize(users[user_id])
+            touched_guilds.add(guild_id)
+            for metric, amount in metrics.items():
+                for target, achievement_id in self.by_metric[metric]:
+                    data = achievements[achievement_id]
+                    if data["completed"]:
+                        continue
+                    data["progress"] += amount
+                    if data["progress"] >= target:
+                        data["completed"] = True
+                        unlocks.append((guild_id, user_id, achievement_id, self.definitions[achievement_id]["reward"]))
+        return unlocks, touched_guilds
@@ -0,0 +1,142 @@
+import aiohttp
+import asyncio
+import io
+import logging
+import os
+from collections import OrderedDict
+from PIL import Image
+
+class AvatarCache:
+    """Cache de avatares decodificados, em memória e em disco, indexado pelo hash do avatar.
+
+    Os downloads usam uma única sessão aiohttp, com limite de downloads simultâneos e timeout.
+    Pedidos simultâneos do mesmo avatar compartilham o mesmo download.
+    """
+
+    def __init__(self, cache_dir="avatar_cache", memory_size=256, disk_size=5000, concurrency=4, timeout=3.0):
+        self.cache_dir = cache_dir
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.timeout = timeout
+        self.memory = OrderedDict()  # hash -> PIL.Image já decodificada
+        self.in_flight = {}  # hash -> tarefa de um download em andamento
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.session = None
+        self.disk_writes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    async def get(self, key, url):
+        """Retorna o avatar como imagem RGBA, ou None se não foi possível obtê-lo."""
+        image = self.memory.get(key)
+        if image is not None:
+            self.memory.move_to_end(key)
+            return image
+
+        # O download roda em uma tarefa própria: se quem pediu desistir (timeout), ele continua e
+        # deixa o avatar no cache para a próxima vez
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.fetch(key, url))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def get_for(self, user):
+        """Atalho para o avatar exibido de um usuário ou membro do Discord."""
+        asset = user.display_avatar.with_size(256).with_static_format("png")
+        return await self.get(asset.key, asset.url)
+
+    async def fetch(self, key, url):
+        try:
+            return await self.load(key, url)
+        except Exception as e:
+            logging.warning(f"Erro ao obter avatar {key}: {str(e) or type(e).__name__}")
+            return None
+
+    async def load(self, key, url):
+        loop = asyncio.get_running_loop()
+        path = os.path.join(self.cache_dir, f"{key}.png")
+        if os.path.exists(path):
+            image = await loop.run_in_executor(None, self.decode_file, path)
+        else:
+            data = await self.download(url)
+            image = await loop.run_in_executor(None, self.decode_and_store, data, path)
+        self.remember(key, image)
+        return image
+
+    async def download(self, url):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        async with self.semaphore:
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                return await response.read()
+
+    def remember(self, key, image):
+        self.memory[key] = image
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    @staticmethod
+    def decode_file(path):
+        os.utime(path)  # Marca o uso recente para a limpeza do disco
+        with Image.open(path) as image:
+            return image.convert("RGBA")
+
+    def decode_and_store(self, data, path):
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+        tmp_path = f"{path}.tmp"
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+        self.disk_writes += 1
+        if self.disk_writes % 100 == 0:
+            self.prune_disk()
+        return image
+
+    def prune_disk(self):
+        """Remove do disco os avatares usados há mais tempo, mantendo no máximo disk_size arquivos."""
+        entries = sorted(os.scandir(self.cache_dir), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:max(0, len(entries) - self.disk_size)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+
+_avatar_cache = None
+_avatar_cache_options = {}
+_avatar_cache_users = 0  # Cogs carregados que usam o cache
+
+
+def configure_avatar_cache(**options):
+    """Opções do AvatarCache (ex.: memory_size) usadas quando o cache compartilhado for criado."""
+    _avatar_cache_options.update(options)
+
+
+def get_avatar_cache():
+    """Cache de avatares compartilhado pelos cogs."""
+    global _avatar_cache
+    if _avatar_cache is None:
+        _avatar_cache = AvatarCache(**_avatar_cache_options)
+    return _avatar_cache
+
+
+def acquire_avatar_cache():
+    """Registra um cog que usa o cache (no cog_load); cada chamada pede um release_avatar_cache."""
+    global _avatar_cache_users
+    _avatar_cache_users += 1
+    return get_avatar_cache()
+
+
+async def release_avatar_cache():
+    """Chamado no cog_unload: o último cog a sair fecha a sessão HTTP e libera as imagens em memória."""
+    global _avatar_cache, _avatar_cache_users
+    _avatar_cache_users = max(0, _avatar_cache_users - 1)
+    if _avatar_cache_users == 0 and _avatar_cache is not None:
+        cache, _avatar_cache = _avatar_cache, None
+        await cache.close()
@@ -0,0 +1,141 @@
+import sqlite3
+import json
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    case_number INTEGER,
+    action TEXT NOT NULL,
+    user_id INTEGER,
+    user_name TEXT,
+    moderator_id INTEGER NOT NULL,
+    moderator_name TEXT NOT NULL,
+    reason TEXT,
+    details TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cases_guild_user ON cases (guild_id, user_id, case_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(reason, content='cases', content_rowid='case_id');
+CREATE TRIGGER IF NOT EXISTS cases_ai AFTER INSERT ON cases BEGIN
+    INSERT INTO cases_fts(rowid, reason) VALUES (new.case_id, new.reason);
+END;
+CREATE TRIGGER IF NOT EXISTS cases_ad AFTER DELETE ON cases BEGIN
+    INSERT INTO cases_fts(cases_fts, rowid, reason) VALUES ('delete', old.case_id, old.reason);
+END;
+CREATE TRIGGER IF NOT EXISTS cases_au AFTER UPDATE ON cases BEGIN
+    INSERT INTO cases_fts(cases_fts, rowid, reason) VALUES ('delete', old.case_id, old.reason);
+    INSERT INTO cases_fts(rowid, reason) VALUES (new.case_id, new.reason);
+END;
+"""
+
+
+class CaseStore:
+    """Banco SQLite com os casos de moderação (banimentos, expulsões, silenciamentos e limpezas).
+
+    O histórico por usuário usa o índice (guild_id, user_id, case_id) e a busca por motivo usa
+    um índice FTS5, então as consultas não dependem do tamanho total do histórico.
+
+    `case_id` é só o identificador interno; o número mostrado nos comandos é `case_number`,
+    sequencial por servidor, para que um servidor não veja a numeração dos outros.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.migrate_case_numbers()
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_cases_guild_number ON cases (guild_id, case_number)")
+        self.conn.commit()
+
+    def migrate_case_numbers(self):
+        """Numera por servidor os casos de bancos criados com a numeração global."""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(cases)")}
+        if "case_number" in columns:
+            return
+        with self.conn:
+            self.conn.execute("BEGIN")  # A coluna e a numeração entram juntas
+            self.conn.execute("ALTER TABLE cases ADD COLUMN case_number INTEGER")
+            self.conn.execute(
+                "WITH numbered AS ("
+                "SELECT case_id, ROW_NUMBER() OVER (PARTITION BY guild_id ORDER BY case_id) AS number FROM cases"
+                ") UPDATE cases SET case_number = (SELECT number FROM numbered WHERE numbered.case_id = cases.case_id)"
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def add_case(self, guild_id, action, moderator, user=None, reason=None, details=None):
+        """Registra um caso e retorna o número dele."""
+        return self.add_cases(guild_id, action, moderator, [user], reason, details)[0]
+
+    def add_cases(self, guild_id, action, moderator, users, reason=None, details=None):
+        """Registra um caso por usuário em uma única transação e retorna os números criados."""
+        created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        details_json = json.dumps(details) if details else None
+        case_numbers = []
+        with self.conn:
+            # IMMEDIATE trava a escrita antes de ler o último número, então outro processo não repete o número
+            self.conn.execute("BEGIN IMMEDIATE")
+            last = self.conn.execute(
+                "SELECT COALESCE(MAX(case_number), 0) FROM cases WHERE guild_id = ?", (guild_id,)
+            ).fetchone()[0]
+            for number, user in enumerate(users, last + 1):
+                self.conn.execute(
+                    "INSERT INTO cases (guild_id, case_number, action, user_id, user_name, moderator_id, moderator_name, reason, details, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        guild_id,
+                        number,
+                        action,
+                        user.id if user else None,
+                        str(user) if hasattr(user, "name") else None,  # Objetos só com ID não têm nome
+                        moderator.id,
+                        str(moderator),
+                        reason,
+                        details_json,
+                        created_at
+                    )
+                )
+                case_numbers.append(number)
+        return case_numbers
+
+    def get_case(self, guild_id, case_number):
+        row = self.conn.execute(
+            "SELECT * FROM cases WHERE guild_id = ? AND case_number = ?", (guild_id, case_number)
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def user_history(self, guild_id, user_id, limit=10):
+        """Retorna os casos mais recentes de um usuário e o total de casos dele."""
+        rows = self.conn.execute(
+            "SELECT * FROM cases WHERE guild_id = ? AND user_id = ? ORDER BY case_id DESC LIMIT ?",
+            (guild_id, user_id, limit)
+        ).fetchall()
+        total = self.conn.execute(
+            "SELECT COUNT(*) FROM cases WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+        ).fetchone()[0]
+        return [self._to_dict(row) for row in rows], total
+
+    def search(self, guild_id, text, limit=10):
+        """Busca os casos mais recentes cujo motivo contém todas as palavras do texto."""
+        # Cada palavra vira um termo entre aspas para que a sintaxe do FTS não seja interpretada
+        terms = [f'"{term.replace(chr(34), chr(34) * 2)}"' for term in text.split()]
+        if not terms:
+            return []
+        rows = self.conn.execute(
+            "SELECT cases.* FROM cases_fts JOIN cases ON cases.case_id = cases_fts.rowid "
+            "WHERE cases_fts MATCH ? AND cases.guild_id = ? ORDER BY cases_fts.rowid DESC LIMIT ?",
+            (" ".join(terms), guild_id, limit)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row):
+        case = dict(row)
+        case["details"] = json.loads(case["details"]) if case["details"] else {}
+        return case
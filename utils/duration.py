@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+# Unidades aceitas nos textos de duração (ex.: 10m, 2h, 7d)
+TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text):
+    """Converte um texto como '10m' em segundos. Lança ValueError se o formato for inválido."""
+    text = text.strip().lower()
+    if len(text) < 2 or text[-1] not in TIME_UNITS:
+        raise ValueError("Unidade de tempo inválida. Use s (segundos), m (minutos), h (horas) ou d (dias).")
+    try:
+        value = int(text[:-1])
+    except ValueError:
+        raise ValueError("Formato de tempo inválido. Use algo como '10m' para 10 minutos.")
+    if value <= 0:
+        raise ValueError("O tempo deve ser maior que 0.")
+    return value * TIME_UNITS[text[-1]]
+
+
+def parse_timedelta(text):
+    """Mesmo que parse_duration, mas retorna um timedelta."""
+    return timedelta(seconds=parse_duration(text))
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import marshal
+import time
+from aiohttp import web
+
+
+def freeze_users(users):
+    """Cópia dos usuários para um snapshot, tirada no event loop enquanto os dados não mudam.
+
+    O marshal serializa o dicionário inteiro em C, bem mais rápido que copiá-lo em Python; o resto
+    do trabalho (decodificar e ordenar) fica para a thread que monta o EconomySnapshot.
+    """
+    return marshal.dumps(users)
+
+
+class EconomySnapshot:
+    """Estado imutável da economia de um servidor em um momento, usado pela API de consulta."""
+
+    __slots__ = ("guild_id", "version", "created_at", "balances", "ranking", "achievements")
+
+    def __init__(self, guild_id, version, frozen_users):
+        users = marshal.loads(frozen_users)
+        self.guild_id = guild_id
+        self.version = version
+        self.created_at = time.time()
+        # Ranking por saldo (maior primeiro); empates ficam na ordem do ID
+        self.ranking = tuple(sorted(
+            ((user_id, data.get("name", ""), data.get("coins", 0)) for user_id, data in users.items()),
+            key=lambda r: (-r[2], r[0])
+        ))
+        self.balances = {user_id: (coins, name, rank) for rank, (user_id, name, coins) in enumerate(self.ranking, start=1)}
+        self.achievements = {user_id: data["achievements"] for user_id, data in users.items() if "achievements" in data}
+
+
+class EconomyAPI:
+    """Servidor HTTP somente leitura sobre os snapshots da economia.
+
+    Os snapshots são trocados por atribuição em `publish`, então as leituras nunca disputam locks com
+    a escrita nem leem o disco. O ETag identifica o snapshot; If-None-Match devolve 304.
+    Com `stats` (EconomyStats), /stats devolve as estatísticas da economia, lidas dos contadores.
+
+    Só ficam publicados os servidores com a economia carregada (`retain` descarta os outros). Com
+    `loader`, uma coroutine function que recebe o guild_id e devolve um EconomySnapshot (ou None), o
+    snapshot de um servidor ocioso é montado no primeiro pedido, sem carregar a economia no bot.
+    """
+
+    def __init__(self, definitions, host="127.0.0.1", port=8082, max_page_size=100, stats=None, loader=None):
+        self.definitions = definitions
+        self.stats = stats
+        self.loader = loader
+        self.loading = {}  # guild_id -> tarefa montando o snapshot de um servidor ocioso
+        self.default_guild_id = None  # Servidor usado sem ?guild= quando o bot está em um só
+        self.host = host
+        self.port = port
+        self.max_page_size = max_page_size
+        self.snapshots = {}  # guild_id -> EconomySnapshot
+        self.epoch = int(time.time())  # Evita repetir ETags de uma execução anterior
+        self.runner = None
+
+    def publish(self, snapshot):
+        self.snapshots[snapshot.guild_id] = snapshot
+
+    def published_version(self, guild_id):
+        snapshot = self.snapshots.get(guild_id)
+        return snapshot.version if snapshot else None
+
+    def retain(self, guild_ids):
+        """Descarta os snapshots dos servidores fora de `guild_ids` (economias descarregadas do bot)."""
+        for guild_id in [guild_id for guild_id in self.snapshots if guild_id not in guild_ids]:
+            del self.snapshots[guild_id]
+
+    async def load_cold(self, guild_id):
+        """Monta o snapshot de um servidor não publicado; pedidos simultâneos esperam a mesma carga."""
+        task = self.loading.get(guild_id)
+        if task is None:
+            task = self.loading[guild_id] = asyncio.ensure_future(self.loader(guild_id))
+            task.add_done_callback(lambda _: self.loading.pop(guild_id, None))
+        snapshot = await asyncio.shield(task)
+        if snapshot is not None and guild_id not in self.snapshots:
+            self.publish(snapshot)
+        return snapshot
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/balance/{user}", self.balance)
+        app.router.add_get("/top", self.top)
+        app.router.add_get("/achievements/{user}", self.user_achievements)
+        if self.stats is not None:
+            app.router.add_get("/stats", self.economy_stats)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def snapshot_for(self, request):
+        """Snapshot do servidor pedido em ?guild=; sem ele, o único servidor publicado ou o do bot."""
+        guild = request.query.get("guild")
+        if guild is None:
+            if len(self.snapshots) == 1:
+                return next(iter(self.snapshots.values()))
+            if self.default_guild_id is None:
+                raise web.HTTPBadRequest(text="Informe o servidor com ?guild=<id>")
+            guild_id = self.default_guild_id
+        elif guild.isdigit():
+            guild_id = int(guild)
+        else:
+            raise web.HTTPNotFound(text="Servidor sem economia publicada")
+        snapshot = self.snapshots.get(guild_id)
+        if snapshot is None and self.loader is not None:
+            snapshot = await self.load_cold(guild_id)
+        if snapshot is None:
+            raise web.HTTPNotFound(text="Servidor sem economia publicada")
+        return snapshot
+
+    def respond(self, request, snapshot, body):
+        etag = f'"{snapshot.guild_id}-{self.epoch}-{snapshot.version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=json.dumps(body, ensure_ascii=False), content_type="application/json", headers=headers)
+
+    async def balance(self, request):
+        snapshot = await self.snapshot_for(request)
+        user_id = request.match_info["user"]
+        entry = snapshot.balances.get(user_id)
+        if entry is None:
+            raise web.HTTPNotFound(text="Usuário sem registro na economia")
+        coins, name, rank = entry
+        return self.respond(request, snapshot, {
+            "guild": snapshot.guild_id, "user": user_id, "name": name, "coins": coins,
+            "rank": rank, "total_users": len(snapshot.ranking)
+        })
+
+    async def top(self, request):
+        snapshot = await self.snapshot_for(request)
+        try:
+            page = max(1, int(request.query.get("page", 1)))
+            per_page = min(self.max_page_size, max(1, int(request.query.get("per_page", 10))))
+        except ValueError:
+            raise web.HTTPBadRequest(text="page e per_page devem ser números")
+        start = (page - 1) * per_page
+        entries = [
+            {"rank": start + i + 1, "user": user_id, "name": name, "coins": coins}
+            for i, (user_id, name, coins) in enumerate(snapshot.ranking[start:start + per_page])
+        ]
+        return self.respond(request, snapshot, {
+            "guild": snapshot.guild_id, "page": page, "per_page": per_page,
+            "total_users": len(snapshot.ranking), "entries": entries
+        })
+
+    async def user_achievements(self, request):
+        snapshot = await self.snapshot_for(request)
+        user_id = request.match_info["user"]
+        if user_id not in snapshot.balances:
+            raise web.HTTPNotFound(text="Usuário sem registro na economia")
+        achievements = []
+        for achievement_id, data in snapshot.achievements.get(user_id, {}).items():
+            definition = self.definitions.get(achievement_id)
+            if definition is None:
+                continue  # Conquista removida do config.json
+            achievements.append({
+                "id": achievement_id, "name": definition["name"], "progress": min(data["progress"], definition["target"]),
+                "target": definition["target"], "completed": data["completed"], "reward": definition["reward"]
+            })
+        return self.respond(request, snapshot, {"guild": snapshot.guild_id, "user": user_id, "achievements": achievements})
+
+    async def economy_stats(self, request):
+        snapshot = await self.snapshot_for(request)
+        summary = self.stats.summary(snapshot.guild_id)
+        if summary["supply"] is None:
+            # Circulação ainda não calculada: usa a do snapshot
+            summary["supply"] = sum(coins for _, _, coins in snapshot.ranking)
+        summary["guild"] = snapshot.guild_id
+        return web.Response(text=json.dumps(summary, ensure_ascii=False), content_type="application/json",
+                            headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import time
+from utils.economy_store import write_json_atomic
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class Rollup:
+    """Séries de contadores em baldes de tamanho fixo (`width` segundos), guardando os últimos `size` baldes.
+
+    Cada série é uma lista circular; ao entrar em um novo período, a posição reaproveitada é zerada.
+    """
+
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.periods = [None] * size  # Período ocupando cada posição
+        self.series = {}  # nome -> [valor por posição]
+
+    def slot(self, now):
+        period = int(now // self.width)
+        index = period % self.size
+        if self.periods[index] != period:
+            self.periods[index] = period
+            for values in self.series.values():
+                values[index] = 0
+        return index
+
+    def add(self, name, amount, now):
+        index = self.slot(now)
+        values = self.series.get(name)
+        if values is None:
+            values = self.series[name] = [0] * self.size
+        values[index] += amount
+
+    def total(self, name, count, now):
+        """Soma dos últimos `count` baldes (incluindo o atual) da série."""
+        values = self.series.get(name)
+        if values is None:
+            return 0
+        current = int(now // self.width)
+        total = 0
+        for period in range(current - min(count, self.size) + 1, current + 1):
+            index = period % self.size
+            if self.periods[index] == period:
+                total += values[index]
+        return total
+
+    def to_dict(self):
+        return {"periods": self.periods, "series": self.series}
+
+    def load(self, data):
+        if len(data.get("periods", ())) != self.size:
+            return  # Retenção mudou no config.json: começa do zero
+        self.periods = data["periods"]
+        self.series = data["series"]
+
+
+class GuildStats:
+    """Contadores da economia de um servidor."""
+
+    def __init__(self, hourly_size, daily_size):
+        self.supply = None  # Total de Rupias em circulação; calculado uma vez e mantido pelas variações
+        self.hourly = Rollup(HOUR, hourly_size)
+        self.daily = Rollup(DAY, daily_size)
+        self.active_day = None
+        self.active_today = set()  # Quem ganhou Rupias hoje
+        self.dirty = False  # Contadores mudaram desde o último salvamento
+
+
+class EconomyStats:
+    """Estatísticas da economia mantidas a cada mudança de saldo.
+
+    As fontes de ganho (message, voice, bonus, achievement, manual) e de gasto (shop:<item>, manual)
+    são somadas em baldes por hora e por dia com retenção limitada, então os painéis são respondidos
+    sem percorrer os usuários nem os logs. Só os servidores alterados são gravados, e `retain`
+    descarrega da memória os servidores cuja economia foi descarregada, como no EconomyStore.
+    """
+
+    def __init__(self, directory, hourly_retention=48, daily_retention=30):
+        self.directory = directory
+        self.hourly_retention = hourly_retention
+        self.daily_retention = daily_retention
+        self.guilds = {}  # guild_id -> GuildStats
+
+    def path(self, guild_id):
+        return os.path.join(self.directory, f"{guild_id}_stats.json")
+
+    def get(self, guild_id):
+        stats = self.guilds.get(guild_id)
+        if stats is None:
+            stats = self.guilds[guild_id] = GuildStats(self.hourly_retention, self.daily_retention)
+            self.load(guild_id, stats)
+        return stats
+
+    def ensure_supply(self, guild_id, users):
+        """Calcula o total em circulação na primeira vez que o servidor é visto."""
+        stats = self.get(guild_id)
+        if stats.supply is None:
+            stats.supply = sum(data.get("coins", 0) for data in users.values())
+        return stats
+
+    def adjust_supply(self, guild_id, users, delta, applied=False):
+        """Soma `delta` à circulação. `applied` indica que `users` já inclui essa variação."""
+        stats = self.get(guild_id)
+        if stats.supply is None:
+            self.ensure_supply(guild_id, users)
+            if applied:
+                return
+        stats.supply += delta
+
+    def record_earn(self, guild_id, user_id, amount, source, now=None):
+        now = time.time() if now is None else now
+        stats = self.get(guild_id)
+        stats.dirty = True
+        for rollup in (stats.hourly, stats.daily):
+            rollup.add("earned", amount, now)
+            rollup.add(f"earned:{source}", amount, now)
+        day = int(now // DAY)
+        if stats.active_day != day:
+            stats.active_day = day
+            stats.active_today = set()
+        if user_id not in stats.active_today:
+            stats.active_today.add(user_id)
+            stats.daily.add("active_earners", 1, now)
+
+    def record_spend(self, guild_id, amount, source, now=None):
+        now = time.time() if now is None else now
+        stats = self.get(guild_id)
+        stats.dirty = True
+        for rollup in (stats.hourly, stats.daily):
+            rollup.add("spent", amount, now)
+            rollup.add(f"spent:{source}", amount, now)
+
+    def record_transfer(self, guild_id, amount, now=None):
+        now = time.time() if now is None else now
+        stats = self.get(guild_id)
+        stats.dirty = True
+        for rollup in (stats.hourly, stats.daily):
+            rollup.add("transferred", amount, now)
+
+    def summary(self, guild_id, now=None):
+        """Resumo para o painel: circulação, última hora, últimas 24 horas, hoje e últimos 7 dias."""
+        now = time.time() if now is None else now
+        stats = self.get(guild_id)
+        summary = {"supply": stats.supply}
+        for label, rollup, count in (("last_hour", stats.hourly, 1), ("last_24h", stats.hourly, 24),
+                                     ("today", stats.daily, 1), ("last_7d", stats.daily, 7)):
+            summary[label] = {name: rollup.total(name, count, now) for name in rollup.series}
+        return summary
+
+    def save(self, guild_id):
+        stats = self.guilds.get(guild_id)
+        if stats is None or not stats.dirty:
+            return
+        try:
+            write_json_atomic(self.path(guild_id), {
+                "hourly": stats.hourly.to_dict(),
+                "daily": stats.daily.to_dict(),
+                "active_day": stats.active_day,
+                "active_today": sorted(stats.active_today)
+            }, indent=None)
+            stats.dirty = False
+        except Exception as e:
+            logging.error(f"Erro ao salvar as estatísticas da economia do servidor {guild_id}: {str(e)}")
+
+    def save_all(self):
+        """Grava os servidores com contadores alterados."""
+        for guild_id in list(self.guilds):
+            self.save(guild_id)
+
+    def retain(self, guild_ids):
+        """Salva e descarrega os servidores fora de `guild_ids`. A circulação é recalculada se eles voltarem."""
+        for guild_id in [guild_id for guild_id in self.guilds if guild_id not in guild_ids]:
+            self.save(guild_id)
+            del self.guilds[guild_id]
+
+    def load(self, guild_id, stats):
+        path = self.path(guild_id)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            stats.hourly.load(data.get("hourly", {}))
+            stats.daily.load(data.get("daily", {}))
+            stats.active_day = data.get("active_day")
+            stats.active_today = set(data.get("active_today", ()))
+        except Exception as e:
+            logging.error(f"Erro ao carregar {path}: {str(e)}")
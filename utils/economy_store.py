@@ -0,0 +1,134 @@
+import itertools
+import json
+import logging
+import os
+import time
+
+def write_json_atomic(path, data, indent=4):
+    """Grava o JSON em um arquivo temporário e o troca pelo original, evitando arquivos pela metade."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+class GuildShard:
+    """Dados da economia de um único servidor: usuários e catálogo de itens."""
+
+    def __init__(self, guild_id, path, users, items):
+        self.guild_id = guild_id
+        self.path = path
+        self.users = users
+        self.items = items
+        self.last_access = time.monotonic()
+        self.version = 0  # Muda a cada salvamento; usado pelos snapshots da API de consulta
+
+    def save(self):
+        write_json_atomic(self.path, self.users)
+
+
+class EconomyStore:
+    """Economia particionada por servidor, com um arquivo por servidor.
+
+    Cada partição é carregada do disco no primeiro uso e descarregada da memória depois de ficar
+    ociosa por `idle_timeout` segundos, então a memória acompanha apenas os servidores ativos.
+    """
+
+    def __init__(self, directory, default_items, idle_timeout=900, legacy_file=None, legacy_guild_id=None):
+        self.directory = directory
+        self.default_items = default_items
+        self.idle_timeout = idle_timeout
+        self.legacy_file = legacy_file  # economy.json antigo, compartilhado por todos os servidores
+        self.legacy_guild_id = legacy_guild_id  # Servidor que herda os dados do arquivo antigo
+        self.shards = {}
+        self.versions = itertools.count(1)  # Versões únicas mesmo se a partição for descarregada e recarregada
+        os.makedirs(directory, exist_ok=True)
+
+    def users_path(self, guild_id):
+        return os.path.join(self.directory, f"{guild_id}.json")
+
+    def items_path(self, guild_id):
+        return os.path.join(self.directory, f"{guild_id}_items.json")
+
+    def get(self, guild_id):
+        """Retorna a partição do servidor, carregando-a do disco se necessário."""
+        shard = self.shards.get(guild_id)
+        if shard is None:
+            shard = self.load(guild_id)
+            self.shards[guild_id] = shard
+        shard.last_access = time.monotonic()
+        return shard
+
+    def load(self, guild_id):
+        path = self.users_path(guild_id)
+        users = self.read_json(path)
+        if users is None:
+            users = self.migrate_legacy(guild_id, path)
+
+        # Catálogo próprio do servidor, se existir; caso contrário usa o do config.json
+        items = self.read_json(self.items_path(guild_id))
+        if items is None:
+            items = self.default_items
+
+        logging.info(f"Economia do servidor {guild_id} carregada ({len(users)} usuários)")
+        return GuildShard(guild_id, path, users, items)
+
+    def peek(self, guild_id):
+        """Usuários do servidor lidos do disco sem carregar a partição (None se não houver economia).
+
+        Faz só leitura, então pode rodar fora do event loop; usado pela API para servidores ociosos.
+        """
+        users = self.read_json(self.users_path(guild_id))
+        if users is None and guild_id == self.legacy_guild_id and self.legacy_file:
+            users = self.read_json(self.legacy_file)  # Ainda não migrado
+        return users
+
+    def migrate_legacy(self, guild_id, path):
+        """Move o economy.json antigo para a partição do servidor configurado, uma única vez."""
+        if guild_id != self.legacy_guild_id or not self.legacy_file:
+            return {}
+        users = self.read_json(self.legacy_file)
+        if users is None:
+            return {}
+        write_json_atomic(path, users)
+        os.replace(self.legacy_file, f"{self.legacy_file}.migrated")
+        logging.info(f"{self.legacy_file} migrado para a economia do servidor {guild_id}")
+        return users
+
+    def save(self, guild_id):
+        shard = self.shards.get(guild_id)
+        if shard is None:
+            return
+        try:
+            shard.save()
+            shard.version = next(self.versions)
+        except Exception as e:
+            logging.error(f"Erro ao salvar a economia do servidor {guild_id}: {str(e)}")
+
+    def save_all(self):
+        for guild_id in list(self.shards):
+            self.save(guild_id)
+
+    def evict_idle(self):
+        """Salva e descarrega as partições ociosas. Retorna os IDs dos servidores descarregados."""
+        now = time.monotonic()
+        evicted = [guild_id for guild_id, shard in self.shards.items() if now - shard.last_access > self.idle_timeout]
+        for guild_id in evicted:
+            self.save(guild_id)
+            del self.shards[guild_id]
+        return evicted
+
+    @staticmethod
+    def read_json(path):
+        """Lê um arquivo JSON. Retorna None se ele não existir, estiver vazio ou for inválido."""
+        try:
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            logging.error(f"Erro ao decodificar {path} (formato inválido): {str(e)}")
+            return None
+        except Exception as e:
+            logging.error(f"Erro ao carregar {path}: {str(e)}")
+            return None
@@ -0,0 +1,174 @@
+import aiohttp
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from aiohttp import web
+
+TWITCH_API_BASE = "https://api.twitch.tv/helix"
+TWITCH_EVENTSUB_WS_URL = "wss://eventsub.wss.twitch.tv/ws"
+MAX_MESSAGE_AGE = timedelta(minutes=10)  # A Twitch recomenda descartar mensagens mais antigas
+
+
+class EventSubDropped(Exception):
+    """A conexão ou a inscrição do EventSub caiu e precisa ser refeita."""
+
+
+def verify_signature(secret, message_id, timestamp, body, signature):
+    """Confere a assinatura HMAC-SHA256 enviada pela Twitch no cabeçalho Twitch-Eventsub-Message-Signature."""
+    message = message_id.encode() + timestamp.encode() + body
+    expected = "sha256=" + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+def parse_timestamp(timestamp):
+    """Converte o horário RFC3339 da Twitch, que vem com nanossegundos, para datetime em UTC."""
+    timestamp = timestamp.rstrip("Z")
+    if "." in timestamp:
+        base, fraction = timestamp.split(".", 1)
+        timestamp = f"{base}.{fraction[:6].ljust(6, '0')}"
+    return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc)
+
+
+async def create_subscription(session, api_base, client_id, token, event_type, broadcaster_id, transport):
+    """Cria uma inscrição no EventSub. Inscrições já existentes (409) são consideradas sucesso."""
+    async with session.post(
+        f"{api_base}/eventsub/subscriptions",
+        headers={"Client-ID": client_id, "Authorization": f"Bearer {token}"},
+        json={
+            "type": event_type,
+            "version": "1",
+            "condition": {"broadcaster_user_id": broadcaster_id},
+            "transport": transport
+        }
+    ) as response:
+        if response.status == 409:
+            return
+        if response.status >= 400:
+            raise EventSubDropped(f"Falha ao inscrever {event_type}: {response.status} {await response.text()}")
+
+
+class EventSubWebSocket:
+    """Cliente do transporte WebSocket do EventSub.
+
+    `on_welcome(session_id)` é chamado quando a sessão começa (para criar as inscrições) e
+    `on_event(tipo, evento)` a cada notificação. `run()` só retorna lançando EventSubDropped.
+    """
+
+    def __init__(self, session, on_welcome, on_event, url=TWITCH_EVENTSUB_WS_URL):
+        self.session = session
+        self.on_welcome = on_welcome
+        self.on_event = on_event
+        self.url = url
+
+    async def run(self):
+        url = self.url
+        subscribed = False
+        while True:
+            reconnect_url = await self.run_connection(url, subscribed)
+            # session_reconnect: a Twitch pede para migrar de conexão mantendo as inscrições
+            url = reconnect_url
+            subscribed = True
+
+    async def run_connection(self, url, subscribed):
+        try:
+            async with self.session.ws_connect(url, heartbeat=None) as ws:
+                keepalive = 10
+                while True:
+                    try:
+                        msg = await ws.receive(timeout=keepalive + 5)
+                    except asyncio.TimeoutError:
+                        raise EventSubDropped("Nenhuma mensagem dentro do keepalive")
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        raise EventSubDropped(f"Conexão encerrada ({msg.type.name})")
+
+                    data = json.loads(msg.data)
+                    message_type = data["metadata"]["message_type"]
+                    payload = data["payload"]
+                    if message_type == "session_welcome":
+                        keepalive = payload["session"].get("keepalive_timeout_seconds") or keepalive
+                        if not subscribed:
+                            await self.on_welcome(payload["session"]["id"])
+                    elif message_type == "notification":
+                        await self.on_event(payload["subscription"]["type"], payload["event"])
+                    elif message_type == "session_reconnect":
+                        return payload["session"]["reconnect_url"]
+                    elif message_type == "revocation":
+                        raise EventSubDropped(f"Inscrição revogada: {payload['subscription']['status']}")
+                    # session_keepalive só renova o prazo de recebimento
+        except aiohttp.ClientError as e:
+            raise EventSubDropped(f"Erro na conexão WebSocket: {str(e)}")
+
+
+class EventSubWebhook:
+    """Receptor local do transporte webhook do EventSub, com verificação de assinatura.
+
+    Responde ao desafio de verificação, descarta mensagens repetidas ou antigas e chama
+    `on_event(tipo, evento)`. Revogações são repassadas a `on_revoked(status)`.
+    """
+
+    def __init__(self, secret, on_event, on_revoked, host="0.0.0.0", port=8081, path="/eventsub"):
+        self.secret = secret
+        self.on_event = on_event
+        self.on_revoked = on_revoked
+        self.host = host
+        self.port = port
+        self.path = path
+        self.seen_ids = OrderedDict()  # IDs recentes, para descartar reenvios
+        self.tasks = set()  # Processamentos em segundo plano; a referência impede que sejam coletados no meio
+        self.runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+        for task in list(self.tasks):
+            task.cancel()
+
+    async def handle(self, request):
+        body = await request.read()
+        message_id = request.headers.get("Twitch-Eventsub-Message-Id", "")
+        timestamp = request.headers.get("Twitch-Eventsub-Message-Timestamp", "")
+        signature = request.headers.get("Twitch-Eventsub-Message-Signature", "")
+        if not verify_signature(self.secret, message_id, timestamp, body, signature):
+            return web.Response(status=403)
+
+        try:
+            sent_at = parse_timestamp(timestamp)
+        except ValueError:
+            return web.Response(status=400)
+        if datetime.now(timezone.utc) - sent_at > MAX_MESSAGE_AGE or message_id in self.seen_ids:
+            return web.Response(status=204)  # Reenvio ou mensagem velha: confirma sem processar
+        self.seen_ids[message_id] = True
+        while len(self.seen_ids) > 1000:
+            self.seen_ids.popitem(last=False)
+
+        data = json.loads(body)
+        message_type = request.headers.get("Twitch-Eventsub-Message-Type")
+        if message_type == "webhook_callback_verification":
+            return web.Response(text=data["challenge"], content_type="text/plain")
+        if message_type == "notification":
+            # Responde logo e processa em segundo plano, como a Twitch exige
+            self.spawn(self.on_event(data["subscription"]["type"], data["event"]))
+        elif message_type == "revocation":
+            self.spawn(self.on_revoked(data["subscription"]["status"]))
+        return web.Response(status=204)
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.task_done)
+
+    def task_done(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Erro ao processar mensagem do EventSub: {str(task.exception())}")
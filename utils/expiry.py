@@ -0,0 +1,61 @@
+import asyncio
+import itertools
+import logging
+import time
+
+
+class ExpiryScheduler:
+    """Expirações agendadas (fim de cargos, mutes e canais temporários) que sobrevivem ao !recarregar.
+
+    Cada expiração é um registro simples, com o tipo, o horário e os IDs envolvidos, e uma tarefa que
+    dorme até o horário e chama o tratador do tipo. Como o registro não guarda objetos do discord.py
+    nem funções do cog, `export` pode entregá-lo à nova instância do cog, que o reagenda com `restore`
+    e o executa com o código novo.
+    """
+
+    def __init__(self, handlers):
+        self.handlers = handlers  # tipo -> coroutine function chamada com os dados do registro
+        self.pending = {}  # id -> (registro, tarefa)
+        self.ids = itertools.count(1)
+
+    def schedule(self, kind, delay, **data):
+        """Agenda o tratador de `kind` para daqui a `delay` segundos."""
+        self.start({"kind": kind, "due": time.time() + delay, "data": data, "running": False})
+
+    def start(self, record):
+        expiry_id = next(self.ids)
+        task = asyncio.get_running_loop().create_task(self.run(expiry_id, record))
+        self.pending[expiry_id] = (record, task)
+
+    async def run(self, expiry_id, record):
+        try:
+            await asyncio.sleep(max(0.0, record["due"] - time.time()))
+            record["running"] = True
+            await self.handlers[record["kind"]](**record["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Erro ao executar a expiração {record['kind']}: {str(e)}")
+        finally:
+            self.pending.pop(expiry_id, None)
+
+    def export(self):
+        """Cancela as esperas e retorna os registros pendentes.
+
+        Expirações que já começaram a executar terminam normalmente e não são entregues,
+        para que a nova instância não as repita.
+        """
+        records = []
+        for record, task in list(self.pending.values()):
+            if not record["running"]:
+                task.cancel()
+                records.append(record)
+        return records
+
+    def restore(self, records):
+        """Reagenda registros exportados; os que venceram durante a troca executam imediatamente."""
+        for record in records:
+            self.start(record)
+
+    def __len__(self):
+        return len(self.pending)
@@ -0,0 +1,84 @@
+import sqlite3
+
+# Configurações por servidor: chave -> tipo do valor ("channel" ou "role")
+SETTINGS = {
+    "welcome_channel_id": "channel",
+    "live_channel_id": "channel",
+    "moderator_role_id": "role",
+    "mod_log_channel_id": "channel",
+}
+
+
+class GuildSettingsStore:
+    """Configurações de cada servidor em SQLite, com cache em memória.
+
+    Os eventos consultam apenas o cache (`get`), carregado na inicialização e quando o bot entra em
+    um servidor. Cada servidor pertence a um único processo de shards, que é o único que altera as
+    configurações dele, então o cache não fica desatualizado entre processos.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS guild_settings ("
+            "guild_id INTEGER NOT NULL, key TEXT NOT NULL, value INTEGER NOT NULL, "
+            "PRIMARY KEY (guild_id, key))"
+        )
+        self.conn.commit()
+        self.cache = {}  # guild_id -> {chave: valor}
+
+    def close(self):
+        self.conn.close()
+
+    def load_guilds(self, guild_ids):
+        """Carrega as configurações dos servidores para o cache (em lotes, uma consulta por lote)."""
+        guild_ids = list(guild_ids)
+        for i in range(0, len(guild_ids), 500):
+            chunk = guild_ids[i:i + 500]
+            for guild_id in chunk:
+                self.cache[guild_id] = {}
+            rows = self.conn.execute(
+                f"SELECT guild_id, key, value FROM guild_settings WHERE guild_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for guild_id, key, value in rows:
+                self.cache[guild_id][key] = value
+
+    def forget(self, guild_id):
+        self.cache.pop(guild_id, None)
+
+    def get(self, guild_id, key):
+        """Valor da configuração do servidor (None se não configurada)."""
+        settings = self.cache.get(guild_id)
+        if settings is None:
+            self.load_guilds((guild_id,))  # Servidor ainda não carregado: só acontece uma vez
+            settings = self.cache[guild_id]
+        return settings.get(key)
+
+    def get_all(self, guild_id):
+        return {key: self.get(guild_id, key) for key in SETTINGS}
+
+    def set(self, guild_id, key, value):
+        """Grava a configuração (None remove) e atualiza o cache."""
+        if key not in SETTINGS:
+            raise KeyError(key)
+        with self.conn:
+            if value is None:
+                self.conn.execute("DELETE FROM guild_settings WHERE guild_id = ? AND key = ?", (guild_id, key))
+            else:
+                self.conn.execute(
+                    "INSERT INTO guild_settings (guild_id, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(guild_id, key) DO UPDATE SET value = excluded.value",
+                    (guild_id, key, value)
+                )
+        settings = self.cache.setdefault(guild_id, {})
+        if value is None:
+            settings.pop(key, None)
+        else:
+            settings[key] = value
+
+    def all_values(self, key):
+        """{guild_id: valor} de todos os servidores, lido do banco (inclui servidores de outros processos)."""
+        return dict(self.conn.execute("SELECT guild_id, value FROM guild_settings WHERE key = ?", (key,)))
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageFont
+
+FONT_PATH = "ArchivoBlack-Regular.ttf"  # Fonte personalizada usada nos banners e cartões
+TEMPLATE_PATH = "template.png"  # Template do banner de boas-vindas
+
+# Fontes do FreeType não são seguras para uso simultâneo, então cada thread tem o seu cache
+_local = threading.local()
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def load_font(size, path=FONT_PATH):
+    """Retorna a fonte no tamanho pedido, carregada uma única vez por thread."""
+    fonts = getattr(_local, "fonts", None)
+    if fonts is None:
+        fonts = _local.fonts = {}
+    key = (path, size)
+    if key not in fonts:
+        try:
+            fonts[key] = ImageFont.truetype(path, size)
+        except OSError:
+            fonts[key] = ImageFont.load_default()
+            logging.warning("Fonte padrão usada, pois a fonte especificada não foi encontrada")
+    return fonts[key]
+
+
+def fit_font(draw, text, max_width, max_size, min_size, step=2):
+    """Retorna a maior fonte (entre max_size e min_size) em que o texto cabe em max_width."""
+    size = max_size
+    font = load_font(size)
+    while size > min_size and draw.textlength(text, font=font) > max_width:
+        size -= step
+        font = load_font(size)
+    return font
+
+
+def load_template(path=TEMPLATE_PATH, size=None):
+    """Retorna o template decodificado (e redimensionado, se pedido). Use .copy() antes de desenhar."""
+    key = (path, size)
+    with _templates_lock:
+        if key not in _templates:
+            image = Image.open(path).convert("RGBA")
+            if size:
+                image = image.resize(size, Image.LANCZOS)
+            _templates[key] = image
+        return _templates[key]
+
+
+class RenderPool:
+    """Executa renderizações do Pillow fora do event loop, com poucas threads e fila limitada."""
+
+    def __init__(self, workers=2, max_pending=8):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        self.semaphore = asyncio.Semaphore(max_pending)
+
+    async def run(self, func, *args):
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_render_pool = None
+_render_pool_users = 0  # Cogs carregados que usam o pool
+
+
+def get_render_pool():
+    """Pool compartilhado pelos cogs que geram imagens."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = RenderPool()
+    return _render_pool
+
+
+def acquire_render_pool():
+    """Registra um cog que usa o pool (no cog_load); cada chamada pede um release_render_pool."""
+    global _render_pool_users
+    _render_pool_users += 1
+    return get_render_pool()
+
+
+def release_render_pool():
+    """Chamado no cog_unload: o último cog a sair encerra as threads de renderização."""
+    global _render_pool, _render_pool_users
+    _render_pool_users = max(0, _render_pool_users - 1)
+    if _render_pool_users == 0 and _render_pool is not None:
+        pool, _render_pool = _render_pool, None
+        pool.shutdown()
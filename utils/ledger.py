@@ -0,0 +1,191 @@
+import asyncio
+import contextlib
+import inspect
+import itertools
+from collections import OrderedDict
+
+
+class InsufficientFunds(Exception):
+    """O usuário não tem Rupias suficientes para a operação."""
+
+    def __init__(self, balance, amount):
+        super().__init__(f"Saldo insuficiente: {balance} Rupias disponíveis, {amount} necessárias")
+        self.balance = balance
+        self.amount = amount
+
+
+class Reservation:
+    """Rupias já debitadas de uma compra em andamento; `Ledger.commit` confirma e `Ledger.refund` devolve."""
+
+    __slots__ = ("id", "guild_id", "user_id", "amount", "source", "state", "balance")
+
+    def __init__(self, reservation_id, guild_id, user_id, amount, source, balance):
+        self.id = reservation_id
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.amount = amount
+        self.source = source  # Fonte do gasto nas estatísticas (ex.: shop:cargo_vip)
+        self.balance = balance  # Saldo logo após a reserva
+        self.state = "held"  # held -> committed | refunded
+
+
+class Ledger:
+    """Operações atômicas sobre os saldos da economia.
+
+    Cada conta (servidor, usuário) cai em uma de `stripes` travas, então operações do mesmo usuário
+    são serializadas enquanto usuários diferentes seguem em paralelo; operações com várias contas
+    pegam as travas em ordem crescente para não haver deadlock. As operações prontas (credit, debit,
+    transfer, reserve) não têm await entre ler e gravar o saldo, então já são atômicas no event loop;
+    as travas são o que protege as operações assíncronas passadas a `run`, que continuam com as
+    contas travadas enquanto esperam (ex.: uma chamada ao Discord entre a leitura e a escrita).
+    Uma `key` de idempotência faz a
+    repetição de uma operação (ex.: o mesmo comando reenviado) devolver o resultado da primeira
+    execução sem mexer no saldo de novo.
+
+    Com `stats` (EconomyStats), cada operação também alimenta as estatísticas da economia: `source`
+    é a origem do ganho ou do gasto. O gasto de uma reserva só conta quando ela é confirmada.
+    """
+
+    def __init__(self, store, stats=None, stripes=64, idempotency_size=10000):
+        self.store = store
+        self.stats = stats
+        self.locks = [asyncio.Lock() for _ in range(stripes)]
+        self.idempotency_size = idempotency_size
+        self.results = OrderedDict()  # (guild_id, key) -> resultado da operação
+        self.reservation_ids = itertools.count(1)
+
+    def account(self, guild_id, user_id, name=None):
+        """Retorna a conta do usuário, criando-a se não existir e atualizando o nome."""
+        users = self.store.get(guild_id).users
+        account = users.get(user_id)
+        if account is None:
+            account = users[user_id] = {"coins": 0, "name": name or ""}
+        elif name:
+            account["name"] = name
+        return account
+
+    async def open_account(self, guild_id, user_id, name=None):
+        """Garante que o usuário tenha conta; a criação passa pelas travas e salva a economia uma vez."""
+        account = self.store.get(guild_id).users.get(user_id)
+        if account is not None:
+            return account
+        return await self.run(guild_id, (user_id,), None, lambda: self.account(guild_id, user_id, name))
+
+    def balance(self, guild_id, user_id):
+        account = self.store.get(guild_id).users.get(user_id)
+        return account["coins"] if account else 0
+
+    @contextlib.asynccontextmanager
+    async def locked(self, guild_id, user_ids):
+        stripes = sorted({hash((guild_id, user_id)) % len(self.locks) for user_id in user_ids})
+        acquired = []
+        try:
+            for stripe in stripes:
+                await self.locks[stripe].acquire()
+                acquired.append(self.locks[stripe])
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    async def run(self, guild_id, user_ids, key, operation):
+        """Executa `operation` com as travas das contas e salva a economia do servidor.
+
+        `operation` pode ser uma função comum ou uma coroutine function; nesse caso as travas ficam
+        presas durante os awaits dela, e nenhuma outra operação sobre essas contas intercala.
+        """
+        async with self.locked(guild_id, user_ids):
+            if key is not None and (guild_id, key) in self.results:
+                self.results.move_to_end((guild_id, key))
+                return self.results[(guild_id, key)]
+            result = operation()
+            if inspect.isawaitable(result):
+                result = await result
+            self.store.save(guild_id)
+            if key is not None:
+                self.results[(guild_id, key)] = result
+                if len(self.results) > self.idempotency_size:
+                    self.results.popitem(last=False)
+            return result
+
+    def apply_debit(self, guild_id, user_id, amount, name):
+        account = self.account(guild_id, user_id, name)
+        if account["coins"] < amount:
+            raise InsufficientFunds(account["coins"], amount)
+        if self.stats is not None:
+            self.stats.adjust_supply(guild_id, self.store.get(guild_id).users, -amount)
+        account["coins"] -= amount
+        return account["coins"]
+
+    def apply_credit(self, guild_id, user_id, amount, name):
+        account = self.account(guild_id, user_id, name)
+        if self.stats is not None:
+            self.stats.adjust_supply(guild_id, self.store.get(guild_id).users, amount)
+        account["coins"] += amount
+        return account["coins"]
+
+    async def credit(self, guild_id, user_id, amount, name=None, key=None, source=None):
+        """Adiciona Rupias à conta. Retorna o novo saldo."""
+        def operation():
+            balance = self.apply_credit(guild_id, user_id, amount, name)
+            if self.stats is not None and source:
+                self.stats.record_earn(guild_id, user_id, amount, source)
+            return balance
+        return await self.run(guild_id, (user_id,), key, operation)
+
+    async def credit_many(self, guild_id, members, amount, key=None, source=None):
+        """Adiciona a mesma quantia a várias contas ({user_id: nome}) com um único salvamento."""
+        def operation():
+            balances = {}
+            for user_id, name in members.items():
+                balances[user_id] = self.apply_credit(guild_id, user_id, amount, name)
+                if self.stats is not None and source:
+                    self.stats.record_earn(guild_id, user_id, amount, source)
+            return balances
+        return await self.run(guild_id, tuple(members), key, operation)
+
+    async def debit(self, guild_id, user_id, amount, name=None, key=None, source=None):
+        """Remove Rupias da conta. Retorna o novo saldo; InsufficientFunds se o saldo não cobrir."""
+        def operation():
+            balance = self.apply_debit(guild_id, user_id, amount, name)
+            if self.stats is not None and source:
+                self.stats.record_spend(guild_id, amount, source)
+            return balance
+        return await self.run(guild_id, (user_id,), key, operation)
+
+    async def transfer(self, guild_id, from_id, to_id, amount, from_name=None, to_name=None, key=None):
+        """Move Rupias entre duas contas. Retorna (saldo do pagador, saldo do recebedor)."""
+        def operation():
+            from_balance = self.apply_debit(guild_id, from_id, amount, from_name)
+            to_balance = self.apply_credit(guild_id, to_id, amount, to_name)
+            if self.stats is not None:
+                self.stats.record_transfer(guild_id, amount)
+            return from_balance, to_balance
+        return await self.run(guild_id, (from_id, to_id), key, operation)
+
+    async def reserve(self, guild_id, user_id, amount, name=None, key=None, source=None):
+        """Debita o valor de uma compra e devolve a Reservation para confirmá-la ou reembolsá-la depois."""
+        def operation():
+            balance = self.apply_debit(guild_id, user_id, amount, name)
+            return Reservation(next(self.reservation_ids), guild_id, user_id, amount, source, balance)
+        return await self.run(guild_id, (user_id,), key, operation)
+
+    async def commit(self, *reservations):
+        """Confirma as reservas ainda pendentes; reservas já reembolsadas continuam reembolsadas."""
+        for reservation in reservations:
+            if reservation is not None and reservation.state == "held":
+                reservation.state = "committed"
+                if self.stats is not None and reservation.source:
+                    self.stats.record_spend(reservation.guild_id, reservation.amount, reservation.source)
+
+    async def refund(self, *reservations):
+        """Devolve as Rupias das reservas pendentes. Chamar de novo para a mesma reserva não faz nada."""
+        for reservation in reservations:
+            if reservation is None:
+                continue
+            async with self.locked(reservation.guild_id, (reservation.user_id,)):
+                if reservation.state != "held":
+                    continue
+                reservation.state = "refunded"
+                self.apply_credit(reservation.guild_id, reservation.user_id, reservation.amount, None)
+                self.store.save(reservation.guild_id)
@@ -0,0 +1,90 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+STRUCTURED_FIELDS = ("guild", "user", "action", "amount")  # Campos passados em extra={...}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos estruturados quando presentes."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém só uma fração dos registros de cada ação (ex.: {"message_reward": 0.05}), para eventos de alto volume.
+
+    A amostragem é por `action` (campo passado em extra={...}), não por nível: os eventos continuam em
+    INFO e não são descartados pelo nível do logger antes de chegar aqui.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def keep(self, action):
+        rate = self.rates.get(action)
+        return rate is None or random.random() < rate
+
+    def filter(self, record):
+        return self.keep(getattr(record, "action", None))
+
+
+def setup_logging(settings, suffix=None):
+    """Configura o logging com escrita em uma thread separada.
+
+    Os cogs só colocam registros em uma fila; um QueueListener grava no console e em um arquivo
+    com rotação por tamanho, sem bloquear o event loop. `settings` é o bloco "logging" do
+    config.json e `suffix` separa o arquivo de cada processo de shards.
+    """
+    path = settings.get('file', 'welcome_bot.log')
+    if suffix:
+        base, dot, ext = path.rpartition('.')
+        path = f"{base}.{suffix}.{ext}" if dot else f"{path}.{suffix}"
+
+    formatter = JsonLinesFormatter() if settings.get('json', False) else logging.Formatter(TEXT_FORMAT)
+    file_handler = logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=settings.get('max_bytes', 10 * 1024 * 1024),
+        backupCount=settings.get('backup_count', 5),
+        encoding='utf-8'
+    )
+    console_handler = logging.StreamHandler(sys.stdout)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(settings.get('sampling', {})))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.get('level', 'INFO'))
+    # O discord.py é muito verboso em DEBUG; fica em INFO mesmo com o nível geral mais baixo
+    logging.getLogger('discord').setLevel(settings.get('discord_level', 'INFO'))
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Esvazia a fila antes de o processo terminar
+    return listener
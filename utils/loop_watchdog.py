@@ -0,0 +1,100 @@
+import asyncio
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+# Limites superiores (em ms) das faixas do histograma de atraso do event loop
+LAG_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def call_site(frames):
+    """Frame mais interno do código do bot (fora de bibliotecas); sem nenhum, o mais interno de todos."""
+    for frame in reversed(frames):
+        if frame.filename.startswith(PROJECT_DIR) and "site-packages" not in frame.filename:
+            return frame
+    return frames[-1] if frames else None
+
+
+class LoopWatchdog:
+    """Mede continuamente o atraso do event loop e descobre o que o bloqueou.
+
+    Uma tarefa no loop dorme `interval` segundos e mede quanto acordou atrasada, alimentando o
+    histograma. Uma thread auxiliar observa o último tique dessa tarefa: se o loop ficar parado
+    por mais de `threshold` segundos, ela captura a pilha da thread do loop enquanto o bloqueio
+    ainda acontece. Quando o loop volta, o bloqueio é registrado com a duração e o local.
+    """
+
+    def __init__(self, threshold=0.25, interval=0.1, max_stalls=20):
+        self.threshold = threshold
+        self.interval = interval
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)  # A última faixa é "acima do maior limite"
+        self.max_lag = 0.0
+        self.stalls = []  # Bloqueios mais recentes: (quando, duração, local)
+        self.max_stalls = max_stalls
+        self.last_tick = time.monotonic()
+        self.loop_thread_id = None
+        self.captured = None  # Pilha capturada pela thread auxiliar durante o bloqueio atual
+        self.task = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.get_running_loop().create_task(self.measure())
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+
+    async def measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.last_tick = time.monotonic()
+            self.record(lag)
+
+    def record(self, lag):
+        self.histogram[bisect.bisect_left(LAG_BUCKETS_MS, lag * 1000)] += 1
+        self.max_lag = max(self.max_lag, lag)
+        captured, self.captured = self.captured, None
+        if lag < self.threshold:
+            return
+        site = call_site(captured) if captured else None
+        where = f"{site.name} ({os.path.relpath(site.filename, PROJECT_DIR)}:{site.lineno})" if site else "local desconhecido"
+        self.stalls.append((time.time(), lag, where))
+        del self.stalls[:-self.max_stalls]
+        stack = "".join(traceback.format_list(captured[-15:])) if captured else ""
+        logging.warning(f"Event loop bloqueado por {lag * 1000:.0f} ms em {where}\n{stack}".rstrip())
+
+    def watch(self):
+        """Roda na thread auxiliar: captura a pilha do loop quando ele passa do limite sem tiquetaquear."""
+        check_every = min(self.interval, self.threshold) / 2
+        while not self.stopped.wait(check_every):
+            stalled_for = time.monotonic() - self.last_tick - self.interval
+            if stalled_for < self.threshold or self.captured is not None:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.captured = traceback.extract_stack(frame)
+                del frame
+
+    def report(self):
+        """Histograma como [(rótulo, contagem)], o maior atraso e os bloqueios recentes."""
+        labels = [f"≤{limit} ms" for limit in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]} ms"]
+        return {
+            "histogram": list(zip(labels, self.histogram)),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": list(self.stalls)
+        }
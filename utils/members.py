@@ -0,0 +1,38 @@
+import discord
+
+
+async def get_or_fetch_member(guild, user_id):
+    """Busca o membro no cache e, se não estiver lá (perfil de pouca memória), na API."""
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.NotFound:
+        return None
+
+
+async def resolve_members(guild, user_ids):
+    """Retorna {id: membro} para os IDs que são membros do servidor.
+
+    Os que faltam no cache são consultados pelo gateway em lotes de 100, sem guardá-los no cache.
+    """
+    found = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member is not None:
+            found[user_id] = member
+        else:
+            missing.append(user_id)
+    for i in range(0, len(missing), 100):
+        for member in await guild.query_members(user_ids=missing[i:i + 100], limit=100, cache=False):
+            found[member.id] = member
+    return found
+
+
+async def all_members(guild):
+    """Lista todos os membros do servidor, buscando-os na API quando o cache não está completo."""
+    if guild.chunked:
+        return guild.members
+    return [member async for member in guild.fetch_members(limit=None)]
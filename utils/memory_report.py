@@ -0,0 +1,48 @@
+import os
+import resource
+
+
+def rss_bytes():
+    """Memória residente atual do processo (no Linux, via /proc; senão, o pico informado pelo getrusage)."""
+    try:
+        with open(f"/proc/{os.getpid()}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def memory_report(bot):
+    """Tamanho dos principais caches do bot e a memória do processo."""
+    report = {
+        "rss_mb": round(rss_bytes() / (1024 * 1024), 1),
+        "guilds": len(bot.guilds),
+        "members": sum(len(guild.members) for guild in bot.guilds),
+        "member_count": sum(guild.member_count or 0 for guild in bot.guilds),
+        "users": len(bot.users),
+        "messages": len(bot.cached_messages),
+    }
+    economy_cog = bot.get_cog("EconomyCog")
+    if economy_cog is not None:
+        report["economy_shards"] = len(economy_cog.store.shards)
+        report["rank_cards"] = len(economy_cog.rank_cards.cards)
+    moderation_cog = bot.get_cog("ModerationCog")
+    if moderation_cog is not None:
+        report["message_cache"] = moderation_cog.message_cache.count
+        report["message_cache_mb"] = round(moderation_cog.message_cache.size / (1024 * 1024), 1)
+    return report
+
+
+def format_memory_report(report):
+    text = (
+        f"RSS: {report['rss_mb']} MB | Servidores: {report['guilds']} | "
+        f"Membros em cache: {report['members']} de {report['member_count']} | "
+        f"Usuários: {report['users']} | Mensagens: {report['messages']}"
+    )
+    if "economy_shards" in report:
+        text += f" | Economias carregadas: {report['economy_shards']} | Cartões de perfil: {report['rank_cards']}"
+    if "message_cache" in report:
+        text += f" | Mensagens para logs: {report['message_cache']} ({report['message_cache_mb']} MB)"
+    return text
@@ -0,0 +1,107 @@
+import sys
+from collections import OrderedDict, deque
+from datetime import datetime
+
+ENTRY_OVERHEAD = 240  # Bytes aproximados de um CachedMessage sem o texto (objeto, slots e entradas nos dicionários)
+
+
+class CachedMessage:
+    """Somente os campos de uma mensagem que aparecem nos logs de exclusão e edição."""
+
+    __slots__ = ("id", "channel_id", "author_id", "author_name", "content", "attachments", "created_at", "size", "alive")
+
+    def __init__(self, message):
+        self.id = message.id
+        self.channel_id = message.channel.id
+        self.author_id = message.author.id
+        self.author_name = str(message.author)
+        self.content = message.content
+        self.attachments = tuple(attachment.filename for attachment in message.attachments)
+        self.created_at = message.created_at.timestamp()
+        self.size = ENTRY_OVERHEAD + sys.getsizeof(self.content) + sum(sys.getsizeof(name) for name in self.attachments)
+        self.alive = True
+
+
+class MessageRingCache:
+    """Últimas `per_channel` mensagens de cada canal, limitadas a `max_bytes` no total.
+
+    Cada canal é um anel (as mensagens mais antigas saem quando ele enche); quando a soma de todos
+    passa do limite de memória, saem as mais antigas do bot inteiro. Substitui o cache de mensagens
+    do discord.py, que guarda objetos completos e fica desativado (max_messages=None).
+    """
+
+    def __init__(self, per_channel=200, max_bytes=16 * 1024 * 1024):
+        self.per_channel = per_channel
+        self.max_bytes = max_bytes
+        self.channels = {}  # channel_id -> OrderedDict(message_id -> CachedMessage)
+        self.order = deque()  # Todas as entradas em ordem de chegada (as removidas são limpas aos poucos)
+        self.size = 0
+        self.count = 0
+
+    def add(self, message):
+        entry = CachedMessage(message)
+        ring = self.channels.get(entry.channel_id)
+        if ring is None:
+            ring = self.channels[entry.channel_id] = OrderedDict()
+        ring[entry.id] = entry
+        self.order.append(entry)
+        self.size += entry.size
+        self.count += 1
+        if len(ring) > self.per_channel:
+            self.discard(ring.popitem(last=False)[1])
+        while self.size > self.max_bytes and self.order:
+            oldest = self.order.popleft()
+            if oldest.alive:
+                self.remove(oldest.channel_id, oldest.id)
+        # Entradas já removidas continuam na fila até chegarem ao começo; compacta se acumularem
+        if len(self.order) > 2 * self.count + 1000:
+            self.order = deque(entry for entry in self.order if entry.alive)
+
+    def discard(self, entry):
+        entry.alive = False
+        self.size -= entry.size
+        self.count -= 1
+
+    def get(self, channel_id, message_id):
+        ring = self.channels.get(channel_id)
+        return ring.get(message_id) if ring else None
+
+    def remove(self, channel_id, message_id):
+        """Tira a mensagem do cache e a retorna (None se ela não estava lá)."""
+        ring = self.channels.get(channel_id)
+        if not ring:
+            return None
+        entry = ring.pop(message_id, None)
+        if entry is not None:
+            self.discard(entry)
+            if not ring:
+                del self.channels[channel_id]
+        return entry
+
+    def update_content(self, channel_id, message_id, content):
+        """Troca o texto de uma mensagem editada e retorna o texto anterior (None se ela não estava no cache)."""
+        entry = self.get(channel_id, message_id)
+        if entry is None:
+            return None
+        previous = entry.content
+        entry.content = content
+        new_size = ENTRY_OVERHEAD + sys.getsizeof(content) + sum(sys.getsizeof(name) for name in entry.attachments)
+        self.size += new_size - entry.size
+        entry.size = new_size
+        return previous
+
+    def forget_channel(self, channel_id):
+        for entry in self.channels.pop(channel_id, {}).values():
+            self.discard(entry)
+
+
+def format_transcript(entries):
+    """Texto com uma linha por mensagem, anexado aos logs de exclusão em massa."""
+    lines = []
+    for entry in sorted(entries, key=lambda e: e.id):
+        created = datetime.utcfromtimestamp(entry.created_at).strftime('%Y-%m-%d %H:%M:%S')
+        line = f"[{created} UTC] {entry.author_name} ({entry.author_id}): {entry.content}"
+        if entry.attachments:
+            line += f" [anexos: {', '.join(entry.attachments)}]"
+        lines.append(line)
+    return "\n".join(lines)
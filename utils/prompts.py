@@ -0,0 +1,46 @@
+import asyncio
+
+
+class PromptRouter:
+    """Entrega respostas de prompts interativos com uma consulta de dicionário por mensagem.
+
+    Substitui `bot.wait_for("message", check=...)`, cujos predicados são avaliados contra todas as
+    mensagens do bot enquanto o prompt está aberto. Cada prompt fica registrado por
+    (channel_id, user_id); `check` só filtra o conteúdo da resposta.
+    """
+
+    def __init__(self):
+        self.pending = {}  # (channel_id, user_id) -> (future, check)
+
+    async def wait_for(self, channel_id, user_id, timeout, check=None):
+        """Espera a próxima mensagem do usuário no canal. Lança asyncio.TimeoutError ao expirar."""
+        key = (channel_id, user_id)
+        previous = self.pending.get(key)
+        if previous is not None and not previous[0].done():
+            # Um novo prompt para o mesmo usuário e canal encerra o anterior como expirado
+            previous[0].set_exception(asyncio.TimeoutError())
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = (future, check)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if self.pending.get(key, (None,))[0] is future:
+                del self.pending[key]
+
+    def dispatch(self, message):
+        """Entrega a mensagem ao prompt aberto do autor no canal, se houver. Retorna True se entregou."""
+        entry = self.pending.get((message.channel.id, message.author.id))
+        if entry is None:
+            return False
+        future, check = entry
+        if future.done() or (check is not None and not check(message)):
+            return False
+        future.set_result(message)
+        return True
+
+    def cancel_all(self):
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(asyncio.TimeoutError())
+        self.pending.clear()
@@ -0,0 +1,151 @@
+import discord
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+
+# O Discord só aceita exclusão em massa de mensagens com menos de 14 dias
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)  # Margem para o tempo da operação
+BULK_DELETE_CHUNK = 100  # Máximo de mensagens por chamada de exclusão em massa
+LINK_PATTERN = re.compile(r"https?://\S+|discord\.gg/\S+", re.IGNORECASE)
+
+
+class PurgeFilter:
+    """Critérios usados para decidir quais mensagens devem ser apagadas."""
+
+    def __init__(self, author=None, bots_only=False, pattern=None, attachments=False, links=False, after=None, before=None):
+        self.author = author  # discord.User/Member ou None
+        self.bots_only = bots_only
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None  # Lança re.error se inválido
+        self.attachments = attachments
+        self.links = links
+        self.after = after  # datetime: apenas mensagens mais novas que isso
+        self.before = before  # datetime: apenas mensagens mais antigas que isso
+
+    @property
+    def is_empty(self):
+        return not (self.author or self.bots_only or self.pattern or self.attachments or self.links)
+
+    def matches(self, message):
+        if self.author is not None and message.author.id != self.author.id:
+            return False
+        if self.bots_only and not message.author.bot:
+            return False
+        if self.attachments and not message.attachments:
+            return False
+        if self.links and not LINK_PATTERN.search(message.content):
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        return True
+
+    def describe(self):
+        """Retorna uma descrição legível dos filtros ativos, usada no log."""
+        parts = []
+        if self.author is not None:
+            parts.append(f"autor={self.author} ({self.author.id})")
+        if self.bots_only:
+            parts.append("apenas bots")
+        if self.pattern is not None:
+            parts.append(f"regex={self.pattern.pattern}")
+        if self.attachments:
+            parts.append("com anexos")
+        if self.links:
+            parts.append("com links")
+        if self.after is not None:
+            parts.append(f"depois de {self.after.strftime('%Y-%m-%d %H:%M UTC')}")
+        if self.before is not None:
+            parts.append(f"antes de {self.before.strftime('%Y-%m-%d %H:%M UTC')}")
+        return ", ".join(parts) or "nenhum"
+
+
+class PurgeResult:
+    """Contadores de uma limpeza em andamento ou concluída."""
+
+    def __init__(self):
+        self.scanned = 0
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        self.failed = 0
+
+    @property
+    def deleted(self):
+        return self.bulk_deleted + self.single_deleted
+
+
+async def purge_messages(channel, limit, purge_filter, scan_limit=None, before=None, progress=None, on_deleting=None, on_deleted=None, on_failed=None, single_delete_delay=1.0):
+    """Apaga até `limit` mensagens do canal que passam pelo filtro.
+
+    O histórico é percorrido da mais nova para a mais antiga sem ser carregado inteiro na memória.
+    Mensagens recentes são apagadas em lotes de 100; mensagens com mais de 14 dias são apagadas
+    uma a uma, com um intervalo entre as chamadas para respeitar o limite de taxa.
+    `progress` é uma corrotina opcional chamada com o PurgeResult após cada lote.
+    `on_deleting` é uma função opcional chamada com as mensagens logo antes de cada chamada de exclusão
+    (o evento do gateway pode chegar antes da resposta HTTP), `on_deleted` com as mensagens
+    efetivamente apagadas e `on_failed` com as que não foram apagadas por este comando.
+    """
+    result = PurgeResult()
+    batch = []
+    # Um limite de tempo explícito é sempre anterior à mensagem do comando
+    history_before = purge_filter.before or before
+    bulk_cutoff = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+
+    async def flush_batch():
+        if not batch:
+            return
+        if on_deleting:
+            on_deleting(batch)
+        try:
+            await channel.delete_messages(batch)
+            result.bulk_deleted += len(batch)
+            if on_deleted:
+                on_deleted(batch)
+        except discord.HTTPException as e:
+            # Se o lote falhar (ex.: mensagem envelheceu durante a operação), tenta uma a uma
+            logging.warning(f"Falha na exclusão em massa no canal {channel.id}: {str(e)}. Tentando individualmente.")
+            for message in batch:
+                await delete_single(message)
+        batch.clear()
+        if progress:
+            await progress(result)
+
+    async def delete_single(message):
+        if on_deleting:
+            on_deleting([message])
+        try:
+            await message.delete()
+            result.single_deleted += 1
+            if on_deleted:
+                on_deleted([message])
+        except discord.NotFound:
+            if on_failed:
+                on_failed([message])  # Já foi apagada por outra pessoa
+        except discord.HTTPException as e:
+            result.failed += 1
+            logging.error(f"Erro ao apagar a mensagem {message.id}: {str(e)}")
+            if on_failed:
+                on_failed([message])
+        await asyncio.sleep(single_delete_delay)
+
+    async for message in channel.history(limit=scan_limit, before=history_before, after=purge_filter.after, oldest_first=False):
+        result.scanned += 1
+        if not purge_filter.matches(message):
+            continue
+
+        if message.created_at > bulk_cutoff:
+            batch.append(message)
+            if len(batch) >= BULK_DELETE_CHUNK:
+                await flush_batch()
+        else:
+            # O histórico vem em ordem decrescente, então o lote recente é enviado antes das antigas
+            await flush_batch()
+            deleted_before = result.single_deleted
+            await delete_single(message)
+            if progress and result.single_deleted != deleted_before and result.single_deleted % 25 == 0:
+                await progress(result)
+
+        if result.deleted + len(batch) + result.failed >= limit:
+            break
+
+    await flush_batch()
+    return result
@@ -0,0 +1,85 @@
+import io
+from collections import OrderedDict
+from PIL import Image, ImageDraw
+from utils.image_assets import fit_font, load_font, load_template
+
+CARD_SIZE = (800, 250)
+AVATAR_SIZE = 180
+BAR_COLOR = (88, 101, 242, 255)  # Azul do Discord
+BAR_DONE_COLOR = (67, 181, 129, 255)  # Verde para conquistas concluídas
+BAR_BACKGROUND = (70, 70, 70, 255)
+
+
+def strip_emoji(text):
+    """A fonte do cartão não tem emojis, então eles são removidos dos nomes."""
+    return "".join(ch for ch in text if ord(ch) < 0x2000).strip()
+
+
+def render_rank_card(name, avatar, balance, rank, total_users, achievements):
+    """Desenha o cartão de perfil e retorna os bytes do PNG.
+
+    `avatar` é a imagem RGBA do AvatarCache (ou None) e `achievements` é uma lista de
+    (nome, progresso, meta, concluída). Roda em uma thread do RenderPool.
+    """
+    card = load_template(size=CARD_SIZE).copy()
+    # Escurece o fundo para o texto ficar legível
+    card = Image.alpha_composite(card, Image.new("RGBA", CARD_SIZE, (0, 0, 0, 150)))
+    draw = ImageDraw.Draw(card)
+
+    # Avatar circular
+    avatar_box = (35, 35, 35 + AVATAR_SIZE, 35 + AVATAR_SIZE)
+    mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+    if avatar is not None:
+        card.paste(avatar.resize((AVATAR_SIZE, AVATAR_SIZE), Image.LANCZOS), avatar_box[:2], mask)
+    else:
+        draw.ellipse(avatar_box, fill=(60, 60, 60, 255))
+
+    # Nome, saldo e posição no ranking
+    text_x = 250
+    draw.text((text_x, 25), name, fill="white", font=fit_font(draw, name, CARD_SIZE[0] - text_x - 30, 40, 20))
+    draw.text((text_x, 85), f"{balance} Rupias", fill=(255, 215, 0), font=load_font(30))
+    draw.text((text_x, 130), f"Rank #{rank} de {total_users}", fill="white", font=load_font(20))
+
+    # Barras de progresso das conquistas (até 3)
+    shown = achievements[:3]
+    if shown:
+        gap = 15
+        bar_width = (CARD_SIZE[0] - text_x - 30 - gap * (len(shown) - 1)) // len(shown)
+        label_font = load_font(14)
+        for i, (label, progress, target, completed) in enumerate(shown):
+            x = text_x + i * (bar_width + gap)
+            draw.text((x, 172), strip_emoji(label), fill="white", font=label_font)
+            draw.rounded_rectangle((x, 198, x + bar_width, 214), radius=8, fill=BAR_BACKGROUND)
+            fraction = 1 if completed else min(progress / target, 1) if target else 0
+            if fraction > 0:
+                draw.rounded_rectangle(
+                    (x, 198, x + max(int(bar_width * fraction), 16), 214),
+                    radius=8,
+                    fill=BAR_DONE_COLOR if completed else BAR_COLOR
+                )
+
+    buffer = io.BytesIO()
+    card.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class RankCardCache:
+    """Cache LRU de cartões renderizados, um por usuário, validado pela versão do estado dele."""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.cards = OrderedDict()  # (guild_id, user_id) -> (versão, bytes do PNG)
+
+    def get(self, key, version):
+        entry = self.cards.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self.cards.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, version, image):
+        self.cards[key] = (version, image)
+        self.cards.move_to_end(key)
+        while len(self.cards) > self.max_size:
+            self.cards.popitem(last=False)
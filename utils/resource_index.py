@@ -0,0 +1,83 @@
+class ResourceIndex:
+    """Índice por servidor de cargos e canais pelo nome.
+
+    Evita percorrer guild.roles / guild.channels a cada uso: o nome aponta para os IDs e o objeto
+    é obtido em O(1) com guild.get_role / guild.get_channel. O índice é mantido atualizado pelos
+    eventos de criação, alteração e remoção tratados no ResourceCog.
+    """
+
+    def __init__(self):
+        self.roles = {}  # guild_id -> {nome: [role_id, ...]}
+        self.channels = {}  # guild_id -> {nome: [channel_id, ...]}
+
+    def index_guild(self, guild):
+        roles = {}
+        for role in guild.roles:
+            roles.setdefault(role.name, []).append(role.id)
+        channels = {}
+        for channel in guild.channels:
+            channels.setdefault(channel.name, []).append(channel.id)
+        self.roles[guild.id] = roles
+        self.channels[guild.id] = channels
+
+    def remove_guild(self, guild_id):
+        self.roles.pop(guild_id, None)
+        self.channels.pop(guild_id, None)
+
+    def add_role(self, role, name=None):
+        self._add(self.roles, role.guild.id, name or role.name, role.id)
+
+    def remove_role(self, role, name=None):
+        self._remove(self.roles, role.guild.id, name or role.name, role.id)
+
+    def add_channel(self, channel, name=None):
+        self._add(self.channels, channel.guild.id, name or channel.name, channel.id)
+
+    def remove_channel(self, channel, name=None):
+        self._remove(self.channels, channel.guild.id, name or channel.name, channel.id)
+
+    def get_role(self, guild, name):
+        """Retorna o cargo com esse nome no servidor, ou None."""
+        if guild.id not in self.roles:
+            self.index_guild(guild)
+        for role_id in self.roles[guild.id].get(name, ()):
+            role = guild.get_role(role_id)
+            if role:
+                return role
+        return None
+
+    def get_channel(self, guild, name):
+        """Retorna o canal (de qualquer tipo) com esse nome no servidor, ou None."""
+        if guild.id not in self.channels:
+            self.index_guild(guild)
+        for channel_id in self.channels[guild.id].get(name, ()):
+            channel = guild.get_channel(channel_id)
+            if channel:
+                return channel
+        return None
+
+    def missing_resources(self, guild, role_names=(), channel_names=(), category_ids=()):
+        """Lista os recursos esperados que não existem no servidor."""
+        missing = [f"cargo '{name}'" for name in role_names if not self.get_role(guild, name)]
+        missing += [f"canal '#{name}'" for name in channel_names if not self.get_channel(guild, name)]
+        missing += [f"categoria {category_id}" for category_id in category_ids if not guild.get_channel(category_id)]
+        return missing
+
+    @staticmethod
+    def _add(index, guild_id, name, resource_id):
+        if guild_id not in index:
+            return  # O servidor será indexado por completo no primeiro uso
+        ids = index[guild_id].setdefault(name, [])
+        if resource_id not in ids:
+            ids.append(resource_id)
+
+    @staticmethod
+    def _remove(index, guild_id, name, resource_id):
+        names = index.get(guild_id)
+        if names is None or name not in names:
+            return
+        ids = names[name]
+        if resource_id in ids:
+            ids.remove(resource_id)
+        if not ids:
+            del names[name]
@@ -0,0 +1,67 @@
+import sqlite3
+import json
+import time
+
+class SharedState:
+    """Armazenamento chave/valor em SQLite compartilhado por todos os processos do bot.
+
+    Os dados da economia e da moderação já são separados por servidor, e cada servidor pertence a
+    um único shard, então eles não passam por aqui. Este armazenamento serve para o que é global,
+    como decidir qual processo executa tarefas únicas (ex.: verificação da live na Twitch).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_state ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, key, default=None):
+        row = self.conn.execute("SELECT value, expires_at FROM shared_state WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return default
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        self.conn.execute(
+            "INSERT INTO shared_state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), expires_at)
+        )
+
+    def delete(self, key):
+        self.conn.execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+    def acquire_lease(self, name, owner, ttl):
+        """Tenta obter (ou renovar) a posse de `name` por `ttl` segundos. Retorna True se `owner` a detém."""
+        key = f"lease:{name}"
+        now = time.time()
+        # BEGIN IMMEDIATE bloqueia outros escritores entre a leitura e a escrita
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT value, expires_at FROM shared_state WHERE key = ?", (key,)).fetchone()
+            if row is not None and json.loads(row[0]) != owner and row[1] is not None and row[1] >= now:
+                self.conn.execute("COMMIT")
+                return False
+            self.conn.execute(
+                "INSERT INTO shared_state (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, json.dumps(owner), now + ttl)
+            )
+            self.conn.execute("COMMIT")
+            return True
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def release_lease(self, name, owner):
+        self.conn.execute(
+            "DELETE FROM shared_state WHERE key = ? AND value = ?", (f"lease:{name}", json.dumps(owner))
+        )
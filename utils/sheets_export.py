@@ -0,0 +1,181 @@
+import logging
+import marshal
+import random
+import time
+import requests
+
+SHEETS_API_BASE = "https://sheets.googleapis.com/v4"
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+MAX_ROWS_PER_CALL = 10000  # Mantém cada batchUpdate perto do tamanho recomendado (~2 MB)
+
+
+class SheetsQuotaError(Exception):
+    """A API do Google Sheets continuou recusando a chamada (cota ou erro temporário) após as novas tentativas."""
+
+
+def column_letter(index):
+    """Converte um índice de coluna (0 = A) para a letra usada na notação A1."""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def normalize(row):
+    """Forma do valor como a planilha o devolve: tudo em texto e sem células vazias no final."""
+    values = [str(value) for value in row]
+    while values and values[-1] == "":
+        values.pop()
+    return values
+
+
+class SheetState:
+    """O que já foi exportado para a aba de um servidor: o conteúdo e a linha de cada usuário."""
+
+    def __init__(self):
+        self.rows = {}  # user_id -> valores exportados (lista)
+        self.row_numbers = {}  # user_id -> linha na planilha
+        self.next_row = 2  # A linha 1 é o cabeçalho
+        self.header = None
+        self.loaded = False
+
+
+class SheetsExporter:
+    """Exporta a economia para uma planilha do Google, enviando só as linhas que mudaram.
+
+    Cada servidor tem uma aba com o ID dele. Na primeira exportação a aba é lida uma vez para saber
+    o que já está lá; depois, cada exportação é um único values:batchUpdate com as linhas alteradas.
+    Os métodos são bloqueantes e devem rodar em uma thread.
+    """
+
+    def __init__(self, spreadsheet_id, definitions, credentials_file=None, api_base=SHEETS_API_BASE, max_retries=6):
+        self.spreadsheet_id = spreadsheet_id
+        self.definitions = definitions
+        self.credentials_file = credentials_file
+        self.api_base = api_base.rstrip("/")
+        self.max_retries = max_retries
+        self.states = {}  # guild_id -> SheetState
+        self.session = None
+        self.api_calls = 0
+
+    def get_session(self):
+        if self.session is None:
+            if self.credentials_file:
+                # Dependências do Google só são necessárias quando a exportação está configurada
+                from google.auth.transport.requests import AuthorizedSession
+                from google.oauth2.service_account import Credentials
+                credentials = Credentials.from_service_account_file(self.credentials_file, scopes=SHEETS_SCOPES)
+                self.session = AuthorizedSession(credentials)
+            else:
+                self.session = requests.Session()  # Sem credenciais: endpoint local de testes
+        return self.session
+
+    def call(self, method, path, **kwargs):
+        """Chama a API com novas tentativas e espera exponencial em erros de cota (429) e temporários (5xx)."""
+        url = f"{self.api_base}/spreadsheets/{self.spreadsheet_id}{path}"
+        delay = 1
+        for attempt in range(self.max_retries + 1):
+            self.api_calls += 1
+            response = self.get_session().request(method, url, timeout=60, **kwargs)
+            if response.status_code != 429 and response.status_code < 500:
+                response.raise_for_status()
+                return response.json()
+            if attempt == self.max_retries:
+                break
+            retry_after = response.headers.get("Retry-After")
+            wait = float(retry_after) if retry_after and retry_after.isdigit() else delay + random.uniform(0, delay / 2)
+            logging.warning(f"Google Sheets respondeu {response.status_code}; nova tentativa em {wait:.1f}s")
+            time.sleep(wait)
+            delay = min(delay * 2, 64)
+        raise SheetsQuotaError(f"Google Sheets indisponível após {self.max_retries + 1} tentativas ({response.status_code})")
+
+    def header(self):
+        return ["ID", "Nome", "Rupias"] + [definition["name"] for definition in self.definitions.values()]
+
+    def row_for(self, user_id, data):
+        row = [user_id, data.get("name", ""), data.get("coins", 0)]
+        achievements = data.get("achievements", {})
+        for achievement_id, definition in self.definitions.items():
+            progress = achievements.get(achievement_id)
+            if progress is None:
+                row.append("")
+            elif progress["completed"]:
+                row.append("✅")
+            else:
+                unit = definition.get("unit", 1)
+                row.append(f"{progress['progress'] // unit}/{definition['target'] // unit}")
+        return row
+
+    def load_sheet(self, guild_id, state):
+        """Lê a aba uma única vez (criando-a se não existir) para diffs corretos após um reinício."""
+        sheet = str(guild_id)
+        try:
+            result = self.call("GET", f"/values/'{sheet}'!A1:{column_letter(len(self.header()) - 1)}")
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 400:
+                raise
+            # Aba inexistente: cria
+            self.call("POST", ":batchUpdate", json={"requests": [{"addSheet": {"properties": {"title": sheet}}}]})
+            result = {}
+        values = result.get("values", [])
+        for row_number, row in enumerate(values[1:], start=2):
+            if row:
+                state.rows[row[0]] = row
+                state.row_numbers[row[0]] = row_number
+        state.next_row = len(values) + 1 if values else 2
+        state.header = values[0] if values else None
+        state.loaded = True
+
+    def export(self, guild_id, frozen_users):
+        """Exporta as alterações de um servidor. `frozen_users` vem de economy_api.freeze_users.
+
+        Retorna a quantidade de linhas enviadas.
+        """
+        users = marshal.loads(frozen_users)
+        state = self.states.setdefault(guild_id, SheetState())
+        if not state.loaded:
+            self.load_sheet(guild_id, state)
+
+        changed = {}  # linha -> valores
+        header = self.header()
+        if normalize(state.header or ()) != header:
+            changed[1] = header
+        new_rows = {}
+        for user_id, data in users.items():
+            row = self.row_for(user_id, data)
+            if normalize(row) == normalize(state.rows.get(user_id, ())):
+                continue
+            if user_id in state.row_numbers:
+                changed[state.row_numbers[user_id]] = row
+            else:
+                new_rows[user_id] = row
+        for user_id, row in new_rows.items():
+            state.row_numbers[user_id] = state.next_row
+            changed[state.next_row] = row
+            state.next_row += 1
+
+        if not changed:
+            return 0
+        sheet = str(guild_id)
+        last_column = column_letter(len(header) - 1)
+        row_numbers = sorted(changed)
+        for i in range(0, len(row_numbers), MAX_ROWS_PER_CALL):
+            ranges = []
+            # Linhas consecutivas viram um único intervalo
+            for row_number in row_numbers[i:i + MAX_ROWS_PER_CALL]:
+                if ranges and ranges[-1]["end"] == row_number - 1:
+                    ranges[-1]["end"] = row_number
+                    ranges[-1]["values"].append(changed[row_number])
+                else:
+                    ranges.append({"start": row_number, "end": row_number, "values": [changed[row_number]]})
+            data = [{"range": f"'{sheet}'!A{r['start']}:{last_column}{r['end']}", "values": r["values"]} for r in ranges]
+            self.call("POST", "/values:batchUpdate", json={"valueInputOption": "RAW", "data": data})
+
+        # Só marca como exportado depois que a API confirmou
+        state.header = header
+        for row_number, row in changed.items():
+            if row_number != 1:
+                state.rows[row[0]] = row
+        return len(changed)
@@ -0,0 +1,182 @@
+import re
+from operator import eq
+import unicodedata
+from collections import deque
+
+HASH_MASK = (1 << 64) - 1
+EMPTY_BIN = HASH_MASK  # Bin sem nenhum shingle
+_NORMALIZE = re.compile(r"[\W_]+")
+_ACCENTS = re.compile("[\u0300-\u036f]")  # Acentos separados pela normalização NFKD
+
+
+def shingles(text, size=4):
+    """Trechos de `size` caracteres do texto normalizado (minúsculo, sem acentos, pontuação nem espaços repetidos)."""
+    text = text.lower()
+    if not text.isascii():
+        text = _ACCENTS.sub("", unicodedata.normalize("NFKD", text))
+    text = _NORMALIZE.sub(" ", text).strip()
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(shingle_set, bins=32):
+    """Assinatura MinHash de uma única permutação: cada shingle é hasheado uma vez e vai para um bin.
+
+    Guarda o menor valor de cada bin, então o custo é linear no número de shingles (e não em
+    shingles x funções de hash). A fração de bins iguais entre duas assinaturas estima a
+    similaridade de Jaccard dos textos.
+    """
+    signature = [EMPTY_BIN] * bins
+    for h in map(hash, shingle_set):
+        h &= HASH_MASK
+        index = h % bins
+        if h < signature[index]:
+            signature[index] = h
+    return tuple(signature)
+
+
+def empty_mask(signature):
+    """Bits dos bins vazios da assinatura, para a similaridade descontar os vazios nas duas sem um laço."""
+    return sum(1 << i for i, value in enumerate(signature) if value == EMPTY_BIN)
+
+
+def similarity(a, b, mask_a=None, mask_b=None):
+    """Fração de bins iguais, ignorando os que estão vazios nas duas assinaturas."""
+    if mask_a is None:
+        mask_a = empty_mask(a)
+    if mask_b is None:
+        mask_b = empty_mask(b)
+    both_empty = (mask_a & mask_b).bit_count()
+    used = len(a) - both_empty
+    return (sum(map(eq, a, b)) - both_empty) / used if used else 0.0  # Comparação dos bins feita em C
+
+
+class SpamEntry:
+    __slots__ = ("timestamp", "guild_id", "channel_id", "user_id", "signature", "mask", "band_keys", "alive")
+
+    def __init__(self, timestamp, guild_id, channel_id, user_id, signature, mask, band_keys):
+        self.timestamp = timestamp
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.signature = signature
+        self.mask = mask
+        self.band_keys = band_keys
+        self.alive = True
+
+
+class SpamCluster:
+    """Resultado de uma mensagem sinalizada: quantos usuários e canais postaram textos quase iguais."""
+
+    __slots__ = ("users", "channels", "repeats")
+
+    def __init__(self, users, channels, repeats):
+        self.users = users
+        self.channels = channels
+        self.repeats = repeats  # Mensagens parecidas do próprio autor na janela
+
+
+class SpamDetector:
+    """Detecta mensagens quase idênticas entre usuários e canais em uma janela de tempo.
+
+    Cada mensagem vira uma assinatura MinHash, dividida em `bands` faixas; mensagens que coincidem
+    em alguma faixa caem no mesmo balde do índice LSH e são comparadas. O índice guarda no máximo
+    `capacity` mensagens dos últimos `window` segundos, então a memória é fixa. Cada mensagem é
+    comparada com no máximo `max_candidates` entradas somando todas as faixas (as mais recentes de
+    cada balde primeiro), e a busca para assim que a mensagem é sinalizada, o que limita o custo
+    por mensagem mesmo com conversas de vocabulário pequeno, em que os baldes enchem.
+    """
+
+    def __init__(self, window=600, capacity=20000, bins=32, bands=8, threshold=0.6,
+                 min_users=3, min_repeats=3, min_shingles=8, max_candidates=32):
+        self.window = window
+        self.capacity = capacity
+        self.bins = bins
+        self.bands = bands
+        self.rows = bins // bands
+        self.threshold = threshold
+        self.min_users = min_users  # Usuários diferentes com o mesmo texto para formar um grupo
+        self.min_repeats = min_repeats  # Mensagens parecidas do mesmo usuário (como a antiga checagem das 3 últimas)
+        self.min_shingles = min_shingles  # Mensagens curtas ("oi", "kkk") são comuns demais para comparar
+        self.max_candidates = max_candidates  # Total de entradas comparadas por mensagem
+        self.entries = deque()
+        self.buckets = {}  # (guild_id, faixa, valores) -> deque de SpamEntry
+
+    def expire(self, now):
+        """Remove as mensagens fora da janela e as excedentes da capacidade."""
+        entries = self.entries
+        while entries and (len(entries) > self.capacity or now - entries[0].timestamp > self.window):
+            entry = entries.popleft()
+            entry.alive = False
+            for key in entry.band_keys:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    continue
+                # Os baldes recebem as entradas em ordem, então as mais antigas estão no começo
+                while bucket and not bucket[0].alive:
+                    bucket.popleft()
+                if not bucket:
+                    del self.buckets[key]
+
+    def check(self, guild_id, channel_id, user_id, text, now):
+        """Indexa a mensagem e retorna um SpamCluster se ela repete um texto recente; senão, None."""
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return None
+        # Textos curtos só contam como repetição do próprio autor, nunca para grupos entre usuários
+        short = len(shingle_set) < self.min_shingles
+        signature = minhash(shingle_set, self.bins)
+        mask = empty_mask(signature)
+        rows = self.rows
+        empty_band = (EMPTY_BIN,) * rows
+        band_keys = tuple(
+            (guild_id, band, values) for band in range(self.bands)
+            if (values := signature[band * rows:(band + 1) * rows]) != empty_band
+        )
+
+        self.expire(now)
+        users = {user_id}
+        channels = {channel_id}
+        repeats = 1
+        seen = set()
+        flagged = False
+        budget = self.max_candidates
+        for key in band_keys:
+            bucket = self.buckets.get(key)
+            if not bucket:
+                continue
+            for i in range(len(bucket) - 1, max(-1, len(bucket) - 1 - budget), -1):
+                entry = bucket[i]
+                if id(entry) in seen or not entry.alive:
+                    continue
+                seen.add(id(entry))
+                budget -= 1
+                # Assinaturas iguais (o caso comum do spam copiado) dispensam o cálculo da similaridade
+                if entry.signature != signature and similarity(signature, entry.signature, mask, entry.mask) < self.threshold:
+                    continue
+                if entry.user_id == user_id:
+                    repeats += 1
+                elif short:
+                    continue
+                else:
+                    users.add(entry.user_id)
+                channels.add(entry.channel_id)
+                if len(users) >= self.min_users or repeats >= self.min_repeats:
+                    flagged = True
+                    break
+            # O range de cada balde já não passa do orçamento restante
+            if flagged or budget <= 0:
+                break
+
+        entry = SpamEntry(now, guild_id, channel_id, user_id, signature, mask, band_keys)
+        self.entries.append(entry)
+        for key in band_keys:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = deque()
+            bucket.append(entry)
+
+        if flagged:
+            return SpamCluster(len(users), len(channels), repeats)
+        return None